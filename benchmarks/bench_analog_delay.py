@@ -0,0 +1,53 @@
+"""CPU cost of the tempo-synced AnalogDelay against pedalboard's Delay.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_analog_delay
+"""
+import argparse
+import time
+import numpy as np
+from pedalboard import Delay
+from src.mixer.analog_delay import AnalogDelay, delay_seconds_for
+
+BLOCKS = (128, 512, 2048)
+CHANNELS = (2, 16)
+
+
+def _time_per_block(process, audio, blocks):
+    for _ in range(8):  # size buffers, warm caches
+        process(audio)
+    start = time.perf_counter()
+    for _ in range(blocks):
+        process(audio)
+    return (time.perf_counter() - start) / blocks * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sr", type=int, default=48000)
+    parser.add_argument("--bpm", type=float, default=120.0)
+    parser.add_argument("--blocks", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    seconds = delay_seconds_for(args.bpm)
+    print(f"1/8 note at {args.bpm} BPM, sr={args.sr} (microseconds per block, % of the block period)")
+    print(f"{'block':>6} {'channels':>8} {'pedalboard Delay':>18} {'AnalogDelay':>18}")
+    for block in BLOCKS:
+        period_us = block / args.sr * 1e6
+        for channels in CHANNELS:
+            audio = (rng.standard_normal((block, channels)) * 0.1).astype(np.float32)
+            stock = Delay(delay_seconds=seconds, feedback=0.35, mix=0.5)
+            analog = AnalogDelay(bpm=args.bpm, feedback=0.35, mix=0.5)
+            out = np.empty_like(audio)
+            cells = []
+            for process in (lambda x: stock.process(x, args.sr, reset=False),
+                            lambda x: analog.process(x, args.sr, out=out)):
+                us = _time_per_block(process, audio, args.blocks)
+                cells.append(f"{us:>9.1f} ({us / period_us:>5.1%})")
+            print(f"{block:>6} {channels:>8} " + " ".join(f"{cell:>18}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""CPU cost of the channel-strip EQ for every channel of the mixer.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_channel_eq
+"""
+import argparse
+import time
+import numpy as np
+from src.mixer.channel_eq import EQ_STYLES, ChannelEQ
+
+CHANNELS = (8, 32, 64, 128)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sr", type=int, default=48000)
+    parser.add_argument("--block", type=int, default=512)
+    parser.add_argument("--blocks", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    styles = list(EQ_STYLES)
+    period_us = args.block / args.sr * 1e6
+    print(f"block={args.block} sr={args.sr}, every band of every channel active")
+    print(f"{'channels':>8} {'per block (us)':>15} {'% of period':>12} {'coefficient update (us)':>24}")
+    for channels in CHANNELS:
+        eq = ChannelEQ(channels, args.sr, args.block)
+        for channel in range(channels):
+            eq.set_style(channel, styles[channel % len(styles)])
+            for band, gain in zip(("low", "mid", "high"), rng.uniform(-9, 9, 3)):
+                eq.set_gain(channel, band, gain)
+        inputs = rng.standard_normal((channels, args.block, 2)).astype(np.float32)
+        for _ in range(8):
+            eq.process(inputs)
+        start = time.perf_counter()
+        for _ in range(args.blocks):
+            eq.process(inputs)
+        us = (time.perf_counter() - start) / args.blocks * 1e6
+        # One slider move: three sections of one channel, on the GUI thread
+        start = time.perf_counter()
+        for step in range(args.blocks):
+            eq.set_gain(step % channels, "mid", float(step % 24 - 12))
+        update_us = (time.perf_counter() - start) / args.blocks * 1e6
+        print(f"{channels:>8} {us:>15.1f} {us / period_us:>12.1%} {update_us:>24.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""CPU cost of the partitioned convolution reverb per IR length and channel count.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_convolution
+"""
+import argparse
+import time
+import numpy as np
+from src.mixer.convolution import TAIL_PARTITION_BLOCKS, ConvolutionReverb
+
+IR_SECONDS = (1, 3, 8)
+CHANNELS = (1, 2, 8)
+
+
+def synthetic_ir(seconds, sr, channels, rt60=None):
+    """Exponentially decaying noise, a stand-in for a recorded hall."""
+    frames = int(seconds * sr)
+    rt60 = rt60 or seconds
+    envelope = 10 ** (-3 * np.arange(frames) / (rt60 * sr))
+    noise = np.random.default_rng(0).standard_normal((frames, channels))
+    return (noise * envelope[:, None] * 0.05).astype(np.float32)
+
+
+def _time_per_block(reverb, block, channels, blocks):
+    audio = (np.random.default_rng(1).standard_normal((block, channels)) * 0.3).astype(np.float32)
+    for _ in range(2 * TAIL_PARTITION_BLOCKS):  # fill the delay lines, warm the FFT plans
+        reverb.process(audio)
+    times = np.empty(blocks)
+    for i in range(blocks):
+        start = time.perf_counter()
+        reverb.process(audio)
+        times[i] = time.perf_counter() - start
+    return times.mean() * 1e6, times.max() * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sr", type=int, default=48000)
+    parser.add_argument("--block", type=int, default=512)
+    parser.add_argument("--blocks", type=int, default=200)
+    args = parser.parse_args()
+
+    period_us = args.block / args.sr * 1e6
+    print(f"block={args.block} sr={args.sr} (mean / worst microseconds per block, mean % of the block period)")
+    print(f"{'IR':>4} {'ch':>3} {'uniform':>26} {'non-uniform':>26}")
+    for seconds in IR_SECONDS:
+        for channels in CHANNELS:
+            ir = synthetic_ir(seconds, args.sr, channels)
+            cells = []
+            for tail_partition in (0, TAIL_PARTITION_BLOCKS * args.block):
+                reverb = ConvolutionReverb(ir, args.sr, args.block, channels, tail_partition=tail_partition)
+                mean, worst = _time_per_block(reverb, args.block, channels, args.blocks)
+                cells.append(f"{mean:>8.0f} / {worst:>6.0f} ({mean / period_us:>5.1%})")
+            print(f"{seconds:>3}s {channels:>3} " + " ".join(f"{cell:>26}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
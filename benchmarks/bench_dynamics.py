@@ -0,0 +1,68 @@
+"""CPU cost of the batched channel compressor and master limiter against pedalboard.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_dynamics
+"""
+import argparse
+import time
+import numpy as np
+from pedalboard import Compressor, Limiter
+from src.mixer.dynamics import BrickwallLimiter, ChannelCompressor, amount_settings
+
+CHANNELS = (8, 32, 64)
+
+
+def _time_per_block(process, blocks):
+    for _ in range(8):  # warm caches
+        process()
+    start = time.perf_counter()
+    for _ in range(blocks):
+        process()
+    return (time.perf_counter() - start) / blocks * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sr", type=int, default=48000)
+    parser.add_argument("--block", type=int, default=512)
+    parser.add_argument("--blocks", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    period_us = args.block / args.sr * 1e6
+    settings = amount_settings(5)
+    print(f"block={args.block} sr={args.sr} (microseconds per block, % of the block period)")
+    print(f"{'channels':>8} {'pedalboard Compressor x N':>26} {'ChannelCompressor':>20} {'speed-up':>9}")
+    for channels in CHANNELS:
+        inputs = (rng.standard_normal((channels, args.block, 2)) * 0.3).astype(np.float32)
+        stock = [Compressor(threshold_db=settings["threshold_db"], ratio=settings["ratio"])
+                 for _ in range(channels)]
+        # pedalboard takes (channels, frames); give each its own contiguous copy
+        planar = [np.ascontiguousarray(inputs[channel].T) for channel in range(channels)]
+
+        def run_stock():
+            for compressor, audio in zip(stock, planar):
+                compressor.process(audio, args.sr, reset=False)
+
+        batched = ChannelCompressor(channels, args.sr, args.block)
+        for channel in range(channels):
+            batched.set_amount(channel, 5)
+        stock_us = _time_per_block(run_stock, args.blocks)
+        batched_us = _time_per_block(lambda: batched.process(inputs), args.blocks)
+        print(f"{channels:>8} {stock_us:>10.1f} ({stock_us / period_us:>6.1%})      "
+              f"{batched_us:>8.1f} ({batched_us / period_us:>6.1%}) {stock_us / batched_us:>8.1f}x")
+
+    master = (rng.standard_normal((args.block, 2)) * 0.5).astype(np.float32)
+    master_planar = np.ascontiguousarray(master.T)
+    stock = Limiter(threshold_db=-1.0, release_ms=80.0)
+    limiter = BrickwallLimiter(args.sr, args.block, ceiling_db=-1.0)
+    stock_us = _time_per_block(lambda: stock.process(master_planar, args.sr, reset=False), args.blocks)
+    limiter_us = _time_per_block(lambda: limiter.process(master), args.blocks)
+    print(f"\nmaster limiter: pedalboard Limiter (sample peak, no lookahead) {stock_us:.1f} us, "
+          f"BrickwallLimiter (true peak, {limiter.latency_samples}-sample lookahead) {limiter_us:.1f} us "
+          f"({limiter_us / period_us:.1%})")
+
+
+if __name__ == "__main__":
+    main()
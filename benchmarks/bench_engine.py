@@ -0,0 +1,35 @@
+"""Throughput and callback-latency benchmark for AudioEngine on the null backend.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_engine
+"""
+import argparse
+import numpy as np
+from src.audio.engine import AudioEngine
+
+
+def run(sr=48000, buffer_size=512, blocks=2000, realtime=False):
+    engine = AudioEngine(sr=sr, buffer_size=buffer_size, backend="null", realtime=realtime)
+    noise = (np.random.default_rng(0).standard_normal((buffer_size, 2)) * 0.1).astype(np.float32)
+    engine.add_audio(noise)
+    engine.backend.run_blocks(blocks)
+    return engine.backend.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sr", type=int, default=48000)
+    parser.add_argument("--blocks", type=int, default=2000)
+    parser.add_argument("--realtime", action="store_true", help="pace blocks to the sample clock")
+    args = parser.parse_args()
+
+    print(f"{'buffer':>8} {'mean us':>10} {'p99 us':>10} {'max us':>10} {'load':>8} {'xruns':>6}")
+    for buffer_size in (64, 128, 256, 512, 1024):
+        stats = run(args.sr, buffer_size, args.blocks, args.realtime)
+        print(f"{buffer_size:>8} {stats['mean_us']:>10.1f} {stats['p99_us']:>10.1f} "
+              f"{stats['max_us']:>10.1f} {stats['load']:>8.3f} {stats['xruns']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Throughput and memory of the offline mastering passes on a long mix.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_mastering --minutes 10
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import soundfile as sf
+from src.mixer.mastering import analyse_mix, plan_master, render_master
+
+
+def _write_mix(path, sr, minutes):
+    # Written in pieces, so making the file does not hold it in memory either
+    rng = np.random.default_rng(0)
+    with sf.SoundFile(path, "w", samplerate=sr, channels=2, subtype="PCM_24") as f:
+        for _ in range(int(minutes * 6)):
+            f.write((rng.standard_normal((sr * 10, 2)) * 0.1).astype(np.float32))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sr", type=int, default=48000)
+    parser.add_argument("--minutes", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        source, target = os.path.join(folder, "mix.wav"), os.path.join(folder, "master.wav")
+        _write_mix(source, args.sr, args.minutes)
+        audio_seconds = args.minutes * 60
+        size_mb = audio_seconds * args.sr * 2 * 4 / 1e6
+        print(f"{args.minutes:g} min stereo at {args.sr} Hz ({size_mb:.0f} MB as float32)")
+        print(f"{'pass':<24} {'seconds':>8} {'x real time':>12} {'peak Python MB':>15}")
+        for name, run in (("analysis, 1 worker", lambda: analyse_mix(source, workers=1)),
+                          (f"analysis, {args.workers} workers", lambda: analyse_mix(source, workers=args.workers))):
+            tracemalloc.start()
+            start = time.perf_counter()
+            analysis = run()
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+            print(f"{name:<24} {seconds:>8.2f} {audio_seconds / seconds:>12.0f} {peak:>15.1f}")
+        settings = plan_master(analysis)
+        tracemalloc.start()
+        start = time.perf_counter()
+        render_master(source, target, settings)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+        print(f"{'render':<24} {seconds:>8.2f} {audio_seconds / seconds:>12.0f} {peak:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Per-block mix cost of MatrixMixer versus per-source accumulation.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_mixer
+"""
+import argparse
+import time
+import numpy as np
+from src.mixer.matrix_mixer import MatrixMixer
+
+
+def _time_per_block(fn, blocks):
+    fn()
+    start = time.perf_counter()
+    for _ in range(blocks):
+        fn()
+    return (time.perf_counter() - start) / blocks * 1e6
+
+
+def naive_mixer(num_channels, block_size):
+    """The old approach: one scaled ``+=`` per channel into a stereo buffer."""
+    rng = np.random.default_rng(0)
+    sources = rng.standard_normal((num_channels, block_size, 2)).astype(np.float32)
+    gains = rng.random((num_channels, 2)).astype(np.float32)
+    out = np.zeros((block_size, 2), dtype=np.float32)
+
+    def run():
+        out.fill(0)
+        for channel in range(num_channels):
+            out[:] += sources[channel] * gains[channel]
+    return run
+
+
+def matrix_mixer(num_channels, block_size, num_buses, method):
+    mixer = MatrixMixer(num_channels, block_size, num_buses=num_buses, method=method)
+    mixer.inputs[:] = np.random.default_rng(0).standard_normal(mixer.inputs.shape)
+    return mixer.process
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--block", type=int, default=512)
+    parser.add_argument("--buses", type=int, default=4, help="master + aux buses")
+    parser.add_argument("--blocks", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"block={args.block} buses={args.buses} (microseconds per block)")
+    print(f"{'channels':>8} {'naive +=':>10} {'einsum':>10} {'matmul':>10}")
+    for channels in (8, 16, 32, 64, 128):
+        naive = _time_per_block(naive_mixer(channels, args.block), args.blocks)
+        einsum = _time_per_block(matrix_mixer(channels, args.block, args.buses, "einsum"), args.blocks)
+        matmul = _time_per_block(matrix_mixer(channels, args.block, args.buses, "matmul"), args.blocks)
+        print(f"{channels:>8} {naive:>10.1f} {einsum:>10.1f} {matmul:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
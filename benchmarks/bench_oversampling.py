@@ -0,0 +1,52 @@
+"""CPU cost of the oversampled non-linear inserts per oversampling factor.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_oversampling
+"""
+import argparse
+import time
+import numpy as np
+from pedalboard import Distortion
+from src.mixer.saturation import OVERSAMPLING_FACTORS, OversampledInsert, TapeSaturator, TubeSaturator
+
+PROCESSORS = {
+    "tube": TubeSaturator,
+    "tape": TapeSaturator,
+    "distortion": lambda: Distortion(drive_db=20),
+}
+
+
+def _time_per_block(insert, block, sr, blocks):
+    audio = (np.random.default_rng(0).standard_normal((block, 2)) * 0.3).astype(np.float32)
+    work = np.empty_like(audio)
+    for _ in range(8):  # prepare buffers and compile kernels
+        np.copyto(work, audio)
+        insert.process(work, sr)
+    start = time.perf_counter()
+    for _ in range(blocks):
+        np.copyto(work, audio)
+        insert.process(work, sr)
+    return (time.perf_counter() - start) / blocks * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sr", type=int, default=48000)
+    parser.add_argument("--block", type=int, default=512)
+    parser.add_argument("--blocks", type=int, default=500)
+    args = parser.parse_args()
+
+    period_us = args.block / args.sr * 1e6
+    print(f"block={args.block} sr={args.sr} (microseconds per stereo block, % of the block period)")
+    print(f"{'insert':>10} " + " ".join(f"{f'{factor}x':>16}" for factor in OVERSAMPLING_FACTORS))
+    for name, make in PROCESSORS.items():
+        cells = []
+        for factor in OVERSAMPLING_FACTORS:
+            us = _time_per_block(OversampledInsert(make(), factor), args.block, args.sr, args.blocks)
+            cells.append(f"{us:>9.1f} ({us / period_us:>4.1%})")
+        print(f"{name:>10} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
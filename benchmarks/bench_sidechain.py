@@ -0,0 +1,60 @@
+"""CPU cost of sidechain ducking per mode and number of ducked channels.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sidechain
+"""
+import argparse
+import time
+import numpy as np
+from src.mixer.sidechain import SidechainEngine
+
+CHANNELS = (1, 4, 16)
+MODES = {
+    "broadband": {},
+    "lookahead": {"lookahead_ms": 5.0},
+    "multiband": {"crossovers": (120.0,), "duck_bands": (0,)},
+    "both": {"lookahead_ms": 5.0, "crossovers": (120.0,), "duck_bands": (0,)},
+}
+
+
+def _time_per_block(engines, mains, trigger, sr, blocks):
+    outs = [np.empty_like(main) for main in mains]
+    for _ in range(8):  # size buffers, compile kernels
+        for engine, main, out in zip(engines, mains, outs):
+            engine.process(main, trigger, sr, out)
+    start = time.perf_counter()
+    for _ in range(blocks):
+        for engine, main, out in zip(engines, mains, outs):
+            engine.process(main, trigger, sr, out)
+    return (time.perf_counter() - start) / blocks * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sr", type=int, default=48000)
+    parser.add_argument("--block", type=int, default=512)
+    parser.add_argument("--blocks", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    trigger = (rng.standard_normal((args.block, 2)) * 0.5).astype(np.float32)
+    period_us = args.block / args.sr * 1e6
+    print(f"block={args.block} sr={args.sr} (microseconds per block, % of the block period)")
+    print("shared: one engine ducks every channel; per channel: one engine each")
+    print(f"{'mode':>10} {'stereo ch':>9} {'shared':>18} {'per channel':>18}")
+    for mode, options in MODES.items():
+        for channels in CHANNELS:
+            shared = np.ascontiguousarray(rng.standard_normal((args.block, 2 * channels)), dtype=np.float32)
+            cells = []
+            for engines, mains in (
+                    ([SidechainEngine(sr=args.sr, **options)], [shared]),
+                    ([SidechainEngine(sr=args.sr, **options) for _ in range(channels)],
+                     [np.ascontiguousarray(shared[:, 2 * c:2 * c + 2]) for c in range(channels)])):
+                us = _time_per_block(engines, mains, trigger, args.sr, args.blocks)
+                cells.append(f"{us:>9.1f} ({us / period_us:>5.1%})")
+            print(f"{mode:>10} {channels:>9} " + " ".join(f"{cell:>18}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Cost of 32 per-channel FX chains as the number of active channels grows.
+
+Silent channels skip their chain once the effect tails have died out, so
+the cost should follow the active channels rather than the channel count.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_silence
+"""
+import argparse
+import time
+import numpy as np
+from src.mixer.fx_rack import FXEngine
+
+
+def run(active, channels=32, block=512, sr=48000, blocks=100):
+    chains = [FXEngine() for _ in range(channels)]
+    noise = (np.random.default_rng(0).standard_normal((block, 2)) * 0.1).astype(np.float32)
+    silence = np.zeros_like(noise)
+    out = np.zeros_like(noise)
+    inputs = [noise if index < active else silence for index in range(channels)]
+    # Let the silent chains ring out so they reach bypass.
+    for _ in range(int(6 * sr / block)):
+        for chain, audio in zip(chains, inputs):
+            chain.process_block(audio, sr, out)
+    start = time.perf_counter()
+    for _ in range(blocks):
+        for chain, audio in zip(chains, inputs):
+            chain.process_block(audio, sr, out)
+    return (time.perf_counter() - start) / blocks * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--block", type=int, default=512)
+    parser.add_argument("--blocks", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"block={args.block} (microseconds per block for 32 chains)")
+    print(f"{'active':>8} {'us/block':>10}")
+    for active in (0, 1, 4, 8, 16, 32):
+        print(f"{active:>8} {run(active, block=args.block, blocks=args.blocks):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
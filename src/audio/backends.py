@@ -0,0 +1,384 @@
+import threading
+import time
+import numpy as np
+import logging
+from src.audio.buffers import RingBuffer
+
+# Optional audio I/O bindings. Each backend checks for its own binding when it
+# is constructed so the engine can still be imported on machines without them.
+try:
+    import pipewire as pw
+except ImportError:
+    pw = None
+
+try:
+    import sounddevice as sd
+except (ImportError, OSError):  # OSError: PortAudio library not found
+    sd = None
+
+try:
+    import soundfile as sf
+except (ImportError, OSError):
+    sf = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+class AudioBackend:
+    """Base class for the audio I/O backends that drive the engine callback.
+
+    A backend owns the device (or clock) and calls ``callback(outdata, indata)``
+    once per block. ``outdata`` is a (frames, channels) float32 array the
+    callback fills in place; ``indata`` is the (frames, input_channels) block
+    captured in the same cycle, or None when the backend runs output-only.
+
+    Attributes:
+        callback (callable): Engine block callback
+        sr (int): Sample rate in Hz
+        buffer_size (int): Frames per block
+        channels (int): Number of output channels
+        input_channels (int): Number of captured channels (0 = output only)
+    """
+
+    name = "base"
+
+    def __init__(self, callback, sr=48000, buffer_size=512, channels=2, input_channels=0):
+        self.callback = callback
+        self.sr = sr
+        self.buffer_size = buffer_size
+        self.channels = channels
+        self.input_channels = input_channels
+
+    def start(self):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
+
+    def set_latency(self, latency_ms):
+        """Request a device latency in milliseconds."""
+        raise NotImplementedError
+
+    def get_latency(self):
+        """Return the current device latency in milliseconds."""
+        return self.buffer_size / self.sr * 1000.0
+
+
+class PipeWireBackend(AudioBackend):
+    """Backend streaming through the PipeWire Python binding.
+
+    Playback goes through an output stream. With ``input_channels`` a capture
+    stream is connected as well; both are driven by the same graph cycle and
+    the capture node runs first, so the block captured in a cycle is handed
+    to the callback together with that cycle's output (duplex, one period).
+    The two streams have their own process callbacks, so captured audio goes
+    through a single-producer, single-consumer ``RingBuffer`` between them
+    rather than a shared array.
+
+    Attributes:
+        capture_ring (RingBuffer): Captured frames not yet handed to the
+            callback; its overrun/underrun counts show capture glitches
+    """
+
+    name = "pipewire"
+
+    def __init__(self, callback, sr=48000, buffer_size=512, channels=2, input_channels=0,
+                 stream_name="TuxTrax-Audio"):
+        super().__init__(callback, sr, buffer_size, channels, input_channels)
+        if pw is None:
+            raise RuntimeError("The pipewire Python binding is not installed")
+        pw.init(None, None)
+        self.context = pw.Context()
+        self.core = self.context.connect()
+        flags = pw.STREAM_FLAG_AUTOCONNECT | pw.STREAM_FLAG_RT_PROCESS
+
+        self.indata = None
+        self.capture = None
+        self.capture_ring = None
+        if input_channels:
+            self.indata = np.zeros((buffer_size, input_channels), dtype=np.float32)
+            self.capture_ring = RingBuffer(4 * buffer_size, input_channels)
+            self.capture = pw.Stream(self.core, f"{stream_name}-Capture", None)
+            self.capture.add_listener(self._capture_listener)
+            self.capture.connect(pw.DIRECTION_INPUT, pw.ID_ANY, flags, None, 0)
+
+        self.stream = pw.Stream(self.core, stream_name, None)
+        self.stream.add_listener(self._stream_listener)
+        self.stream.connect(pw.DIRECTION_OUTPUT, pw.ID_ANY, flags, None, 0)
+
+    def _capture_listener(self, stream, buffer):
+        self.capture_ring.write(buffer)
+
+    def _stream_listener(self, stream, buffer):
+        if self.capture_ring is not None:
+            self.capture_ring.read(self.indata)
+        self.callback(buffer, self.indata)
+
+    def start(self):
+        if self.capture is not None:
+            self.capture_ring.clear()
+            self.capture.start()
+        self.stream.start()
+
+    def stop(self):
+        self.stream.stop()
+        if self.capture is not None:
+            self.capture.stop()
+
+    def set_latency(self, latency_ms):
+        self.stream.set_latency(latency_ms)
+
+    def get_latency(self):
+        return self.stream.get_latency()
+
+
+class SoundDeviceBackend(AudioBackend):
+    """Backend using a PortAudio stream from ``sounddevice``.
+
+    Opens a full-duplex stream when ``input_channels`` is set, so input and
+    output arrive in the same callback.
+    """
+
+    name = "sounddevice"
+
+    def __init__(self, callback, sr=48000, buffer_size=512, channels=2, input_channels=0, device=None,
+                 latency="low"):
+        super().__init__(callback, sr, buffer_size, channels, input_channels)
+        if sd is None:
+            raise RuntimeError("sounddevice (PortAudio) is not available")
+        self.device = device
+        self.latency = latency
+        self.stream = None
+
+    def _open_stream(self):
+        if self.input_channels:
+            self.stream = sd.Stream(
+                samplerate=self.sr,
+                blocksize=self.buffer_size,
+                channels=(self.input_channels, self.channels),
+                dtype="float32",
+                device=self.device,
+                latency=self.latency,
+                callback=self._duplex_callback,
+            )
+            return
+        self.stream = sd.OutputStream(
+            samplerate=self.sr,
+            blocksize=self.buffer_size,
+            channels=self.channels,
+            dtype="float32",
+            device=self.device,
+            latency=self.latency,
+            callback=self._stream_callback,
+        )
+
+    def _stream_callback(self, outdata, frames, time_info, status):
+        if status:
+            logger.warning(f"sounddevice status: {status}")
+        self.callback(outdata, None)
+
+    def _duplex_callback(self, indata, outdata, frames, time_info, status):
+        if status:
+            logger.warning(f"sounddevice status: {status}")
+        self.callback(outdata, indata)
+
+    def start(self):
+        if self.stream is None:
+            self._open_stream()
+        self.stream.start()
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+    def set_latency(self, latency_ms):
+        # PortAudio fixes latency when the stream is opened, so reopen it.
+        self.latency = latency_ms / 1000.0
+        if self.stream is not None:
+            self.stop()
+            self.start()
+
+    def get_latency(self):
+        if self.stream is None:
+            return super().get_latency()
+        latency = self.stream.latency
+        if self.input_channels:
+            latency = latency[1]  # (input, output) for duplex streams
+        return latency * 1000.0
+
+
+class NullBackend(AudioBackend):
+    """Device-less backend driven by a high-resolution clock.
+
+    Runs the engine callback from a worker thread, either paced to real time
+    or as fast as possible, and optionally writes the rendered audio to a
+    file. Per-callback timings are kept so latency and throughput benchmarks
+    can run on any machine, including CI.
+
+    With ``input_channels`` the callback also gets an input block, which is
+    silent unless ``loopback`` is set: then each block's output is fed back as
+    the next block's input, like a cable from the outputs to the inputs.
+
+    Attributes:
+        realtime (bool): Pace blocks to the sample clock instead of free-running
+        loopback (bool): Feed the output back into the input one block later
+        output_path (str): Optional file the rendered output is written to
+        max_blocks (int): Stop automatically after this many blocks (None = run until stopped)
+        blocks_processed (int): Number of callbacks run so far
+        xruns (int): Callbacks that took longer than one block period
+    """
+
+    name = "null"
+
+    def __init__(self, callback, sr=48000, buffer_size=512, channels=2, input_channels=0, realtime=True,
+                 loopback=False, output_path=None, max_blocks=None, history=4096):
+        super().__init__(callback, sr, buffer_size, channels, input_channels)
+        self.realtime = realtime
+        self.loopback = loopback
+        self.indata = np.zeros((buffer_size, input_channels), dtype=np.float32) if input_channels else None
+        self._loop_channels = min(channels, input_channels)
+        self.output_path = output_path
+        self.max_blocks = max_blocks
+        self.outdata = np.zeros((buffer_size, channels), dtype=np.float32)
+        self.callback_times = np.zeros(history, dtype=np.float64)
+        self.blocks_processed = 0
+        self.xruns = 0
+        self._period = buffer_size / sr
+        self._file = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def _open_output(self):
+        if self.output_path is None or self._file is not None:
+            return
+        if sf is None:
+            raise RuntimeError("soundfile is required to write null backend output")
+        self._file = sf.SoundFile(self.output_path, mode="w", samplerate=self.sr,
+                                  channels=self.channels, subtype="FLOAT")
+
+    def _close_output(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _tick(self):
+        self.outdata.fill(0)
+        t0 = time.perf_counter()
+        self.callback(self.outdata, self.indata)
+        elapsed = time.perf_counter() - t0
+        if self.loopback and self._loop_channels:
+            np.copyto(self.indata[:, :self._loop_channels], self.outdata[:, :self._loop_channels])
+        self.callback_times[self.blocks_processed % len(self.callback_times)] = elapsed
+        if elapsed > self._period:
+            self.xruns += 1
+        self.blocks_processed += 1
+        if self._file is not None:
+            self._file.write(self.outdata)
+
+    def run_blocks(self, num_blocks):
+        """Synchronously run ``num_blocks`` callbacks on the calling thread.
+
+        Args:
+            num_blocks (int): Number of blocks to render
+
+        Returns:
+            np.ndarray: The output buffer holding the last rendered block
+        """
+        self._open_output()
+        for _ in range(num_blocks):
+            self._tick()
+        return self.outdata
+
+    def _run(self):
+        next_deadline = time.perf_counter()
+        try:
+            while not self._stop_event.is_set():
+                if self.max_blocks is not None and self.blocks_processed >= self.max_blocks:
+                    break
+                self._tick()
+                if self.realtime:
+                    next_deadline += self._period
+                    delay = next_deadline - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        next_deadline = time.perf_counter()
+        except Exception as e:
+            logger.error(f"Error in null backend clock: {e}")
+        finally:
+            self._close_output()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._open_output()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="NullBackendClock", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._close_output()
+
+    def wait(self, timeout=None):
+        """Block until a ``max_blocks`` run has finished."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def set_latency(self, latency_ms):
+        # The null clock has no device buffering; latency is one block period.
+        logger.info(f"Null backend ignores latency request of {latency_ms} ms")
+
+    def stats(self):
+        """Summarise callback timings.
+
+        Returns:
+            dict: Block count, xruns and mean/p99/max callback time in microseconds
+        """
+        count = min(self.blocks_processed, len(self.callback_times))
+        if count == 0:
+            return {"blocks": 0, "xruns": 0, "mean_us": 0.0, "p99_us": 0.0, "max_us": 0.0, "load": 0.0}
+        times = self.callback_times[:count]
+        return {
+            "blocks": self.blocks_processed,
+            "xruns": self.xruns,
+            "mean_us": float(times.mean() * 1e6),
+            "p99_us": float(np.percentile(times, 99) * 1e6),
+            "max_us": float(times.max() * 1e6),
+            "load": float(times.mean() / self._period),
+        }
+
+
+BACKENDS = {
+    PipeWireBackend.name: PipeWireBackend,
+    SoundDeviceBackend.name: SoundDeviceBackend,
+    NullBackend.name: NullBackend,
+}
+
+
+def create_backend(name, callback, sr=48000, buffer_size=512, channels=2, input_channels=0, **options):
+    """Create an audio backend by name.
+
+    Args:
+        name (str): One of ``BACKENDS`` ("pipewire", "sounddevice", "null")
+        callback (callable): Engine block callback ``callback(outdata, indata)``
+        sr (int): Sample rate in Hz
+        buffer_size (int): Frames per block
+        channels (int): Number of output channels
+        input_channels (int): Number of capture channels (0 = output only)
+        **options: Backend specific keyword arguments
+
+    Returns:
+        AudioBackend: The constructed backend
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown audio backend '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](callback, sr=sr, buffer_size=buffer_size, channels=channels,
+                          input_channels=input_channels, **options)
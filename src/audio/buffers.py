@@ -0,0 +1,223 @@
+import tracemalloc
+import numpy as np
+from pedalboard import Pedalboard
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+class RealtimeAllocationError(AssertionError):
+    """Raised in allocation debug mode when a steady-state callback allocates."""
+
+
+class RingBuffer:
+    """Single-producer, single-consumer ring of (frames, channels) audio.
+
+    One thread writes and one thread reads. Each side only advances its own
+    counter, and a counter is published after the samples are copied, so no
+    lock is needed. Overflowing writes are dropped and short reads are
+    padded with silence; both are counted.
+
+    Attributes:
+        capacity (int): Frames the ring can hold
+        overruns (int): Writes that did not fit
+        underruns (int): Reads that came up short
+    """
+
+    def __init__(self, capacity, channels=1, dtype=np.float32):
+        self.capacity = capacity
+        self.channels = channels
+        self._data = np.zeros((capacity, channels), dtype=dtype)
+        self._written = 0
+        self._read = 0
+        self.overruns = 0
+        self.underruns = 0
+
+    def available(self):
+        """Frames ready to be read."""
+        return self._written - self._read
+
+    def space(self):
+        """Frames that can be written without overflowing."""
+        return self.capacity - self.available()
+
+    def write(self, block):
+        """Append a (frames, channels) block; returns the frames written (producer)."""
+        frames = min(len(block), self.space())
+        if frames < len(block):
+            self.overruns += 1
+        start = self._written % self.capacity
+        first = min(frames, self.capacity - start)
+        np.copyto(self._data[start:start + first], block[:first])
+        if first < frames:
+            np.copyto(self._data[:frames - first], block[first:frames])
+        self._written += frames
+        return frames
+
+    def read(self, out):
+        """Fill ``out`` (frames, channels); returns the frames read (consumer)."""
+        frames = min(len(out), self.available())
+        if frames < len(out):
+            self.underruns += 1
+            out[frames:].fill(0)
+        start = self._read % self.capacity
+        first = min(frames, self.capacity - start)
+        np.copyto(out[:first], self._data[start:start + first])
+        if first < frames:
+            np.copyto(out[first:frames], self._data[:frames - first])
+        self._read += frames
+        return frames
+
+    def clear(self):
+        """Drop everything not yet read (consumer)."""
+        self._read = self._written
+
+
+class BufferPool:
+    """Fixed set of preallocated audio buffers handed out without allocating.
+
+    Buffers are created once up front; ``acquire`` and ``release`` only flip
+    an in-use flag, so they are safe to call from the audio callback.
+
+    Attributes:
+        shape (tuple): Shape of every buffer in the pool
+        dtype (np.dtype): Sample type of the buffers
+    """
+
+    def __init__(self, shape, count=8, dtype=np.float32):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self._buffers = [np.zeros(self.shape, dtype=self.dtype) for _ in range(count)]
+        self._in_use = [False] * count
+
+    def __len__(self):
+        return len(self._buffers)
+
+    def acquire(self, clear=True):
+        """Take a free buffer from the pool.
+
+        Args:
+            clear (bool): Zero the buffer before handing it out
+
+        Returns:
+            np.ndarray: A buffer of ``shape``; raises RuntimeError if the pool is exhausted
+        """
+        for i in range(len(self._buffers)):
+            if not self._in_use[i]:
+                self._in_use[i] = True
+                buf = self._buffers[i]
+                if clear:
+                    buf.fill(0)
+                return buf
+        raise RuntimeError(f"Buffer pool of {len(self._buffers)} x {self.shape} exhausted")
+
+    def release(self, buf):
+        """Return a buffer obtained from ``acquire`` to the pool."""
+        for i in range(len(self._buffers)):
+            if self._buffers[i] is buf:
+                self._in_use[i] = False
+                return
+        raise ValueError("Buffer does not belong to this pool")
+
+    def release_all(self):
+        for i in range(len(self._in_use)):
+            self._in_use[i] = False
+
+
+class AllocationGuard:
+    """Debug helper that uses tracemalloc to check a callback allocates nothing.
+
+    Wrap each callback in ``begin()``/``end()``. After ``warmup_blocks`` calls
+    the traced peak inside the callback is compared with the memory in use when
+    it started; anything above ``tolerance_bytes`` is reported. The default
+    tolerance absorbs interpreter-level churn (small ints, views, the iterator
+    numpy's matmul sets up) but not a numpy temporary of any useful block size.
+
+    Code we do not own, such as pedalboard plugins, can be excluded with
+    ``pause()``/``resume()``.
+
+    Attributes:
+        warmup_blocks (int): Callbacks ignored while buffers are first sized
+        tolerance_bytes (int): Peak growth allowed per callback
+        raise_on_violation (bool): Raise RealtimeAllocationError instead of only logging
+        violations (list): (block index, bytes) of offending callbacks
+    """
+
+    def __init__(self, warmup_blocks=8, tolerance_bytes=1024, raise_on_violation=True):
+        self.warmup_blocks = warmup_blocks
+        self.tolerance_bytes = tolerance_bytes
+        self.raise_on_violation = raise_on_violation
+        self.violations = []
+        self.blocks = 0
+        self._baseline = 0
+        self._excess = 0
+        self._active = False
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin(self):
+        self._active = self.blocks >= self.warmup_blocks
+        if self._active:
+            self._excess = 0
+            tracemalloc.reset_peak()
+            self._baseline = tracemalloc.get_traced_memory()[0]
+
+    def pause(self):
+        if self._active:
+            peak = tracemalloc.get_traced_memory()[1]
+            self._excess = max(self._excess, peak - self._baseline)
+
+    def resume(self):
+        if self._active:
+            tracemalloc.reset_peak()
+            self._baseline = tracemalloc.get_traced_memory()[0]
+
+    def end(self):
+        block = self.blocks
+        self.blocks += 1
+        if not self._active:
+            return
+        self._active = False
+        peak = tracemalloc.get_traced_memory()[1]
+        excess = max(self._excess, peak - self._baseline)
+        if excess > self.tolerance_bytes:
+            self.violations.append((block, excess))
+            message = f"Audio callback {block} allocated {excess} bytes in steady state"
+            if self.raise_on_violation:
+                raise RealtimeAllocationError(message)
+            logger.error(message)
+
+    def stop(self):
+        tracemalloc.stop()
+
+
+def process_into(board, audio, sample_rate, out, guard=None):
+    """Run a pedalboard chain in streaming mode and copy the result into ``out``.
+
+    Pedalboard always returns a fresh array, so the caller keeps one reused
+    output buffer instead of holding on to a new one every block. Plugin state
+    is kept across calls (``reset=False``) so tails continue between blocks.
+
+    Args:
+        board (Pedalboard): Plugin chain (any pedalboard plugin works)
+        audio (np.ndarray): Input block
+        sample_rate (float): Sample rate in Hz
+        out (np.ndarray): Preallocated output of the same shape as ``audio``
+        guard (AllocationGuard): Optional guard paused around the plugin call
+
+    Returns:
+        np.ndarray: ``out``
+    """
+    if isinstance(board, Pedalboard) and len(board) == 0:
+        if out is not audio:
+            np.copyto(out, audio)
+        return out
+    if guard is not None:
+        guard.pause()
+    processed = board.process(audio, sample_rate, reset=False)
+    if guard is not None:
+        guard.resume()
+    np.copyto(out, processed)
+    return out
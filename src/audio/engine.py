@@ -1,63 +1,464 @@
-import sounddevice as sd
 import numpy as np
-from threading import Lock
+from collections import deque
 from pedalboard import Pedalboard
-import pipewire as pw
 import logging
 import subprocess
+import threading
+import time
+from concurrent.futures import Future
+from src.audio.backends import create_backend
+from src.audio.buffers import AllocationGuard, BufferPool, RealtimeAllocationError, process_into
+from src.audio.latency import DelayLine, LatencyGraph, LoopbackTest, MultiDelayLine, plugin_latency
+from src.audio.metering import MeterBank
+from src.audio.parameters import ParameterStore
+from src.audio.plugin_host import PluginHost
+from src.audio.plugin_scan import PluginScanner
+from src.audio.snapshot import ConfigSwap, EngineConfig
+from src.audio.silence import PLUGIN_TAIL_GAP_SECONDS, TailGate, block_peak, effect_gap_seconds
+from src.utils.dsp import row_peaks
+from src.mixer.matrix_mixer import MASTER_BUS, MatrixMixer
+from src.mixer.aux_bus import AuxBus, default_aux_buses
+from src.mixer.channel_eq import ChannelEQ
+from src.mixer.dynamics import BrickwallLimiter, ChannelCompressor
+from src.mixer.convolution import ConvolutionReverb
+from src.mixer.ir_cache import IRCache, resample_ir
+from src.mixer.freeze import ClipPlayer, TrackFreezer, freeze_key, source_digest
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 class AudioEngine:
-    def __init__(self, sr=48000, buffer_size=512):
+    """Real-time mixing engine driven by a pluggable audio backend.
+
+    Args:
+        sr (int): Sample rate in Hz
+        buffer_size (int): Frames per block
+        num_channels (int): Number of mixer channels (numbered from 1)
+        backend (str): Audio backend name ("pipewire", "sounddevice" or "null")
+        input_channels (int): Line inputs captured in duplex with the output.
+            Off (0) by default: capture opens a duplex stream, which
+            output-only devices cannot
+        debug_allocations (bool): Check with tracemalloc that steady-state
+            callbacks allocate nothing (slow; for tests and profiling only)
+        metering (bool): Meter every channel (pre-fader) and the master output
+        max_compensation (int): Longest plugin delay compensation in samples
+        freeze_cache_dir (str): Where frozen tracks are cached (default
+            ``~/.cache/tuxtrax/freeze``)
+        aux_buses (dict): Send/return effect buses as name -> chain
+            (default ``default_aux_buses()``: reverb, chorus and delay)
+        tempo: Object with a ``current_bpm`` attribute, e.g. ``SamplerEngine``,
+            that the default delay bus syncs to
+        ir_cache_dir (str): Where prepared impulse responses are cached
+            (default ``~/.cache/tuxtrax/ir``)
+        **backend_options: Extra keyword arguments for the backend, e.g.
+            ``realtime``/``output_path`` for the null backend
+    """
+
+    def __init__(self, sr=48000, buffer_size=512, num_channels=32, backend="pipewire", input_channels=0,
+                 debug_allocations=False,
+                 metering=True, max_compensation=8192, freeze_cache_dir=None, aux_buses=None,
+                 ir_cache_dir=None, tempo=None, **backend_options):
         self.sr = sr
         self.buffer_size = buffer_size
+        self.num_channels = num_channels
         self.mix_buffer = np.zeros((buffer_size, 2), dtype=np.float32)
-        self.lock = Lock()
-        self.fx_rack = Pedalboard()
+        # Routing and processing the callback reads, swapped in whole (see
+        # ConfigSwap) so the callback never locks or sees a partial edit.
+        self.config = ConfigSwap(EngineConfig(Pedalboard()), buffer_size)
+        # Audio queued by add_audio for the next block; used blocks are
+        # handed back so they are freed on the control thread
+        self._pending_audio = deque()
+        self._spent_audio = deque()
+        self.allocation_guard = AllocationGuard() if debug_allocations else None
+
+        # Automatable parameters, written lock-free by the GUI/MIDI threads
+        # and smoothed once per block by the callback.
+        self.params = ParameterStore(sr=sr, block_size=buffer_size)
+        channels = range(1, num_channels + 1)
+        self.volume_ids = self.params.register_group([f"ch{ch}.volume" for ch in channels], default=0.8)
+        self.pan_ids = self.params.register_group([f"ch{ch}.pan" for ch in channels], default=0.0,
+                                                  minimum=-1.0, maximum=1.0)
+        self.master_volume_id = self.params.register("master.volume", default=1.0)
+        self._channel_volumes = self.params.current[self.volume_ids:self.volume_ids + num_channels]
+        self._channel_pans = self.params.current[self.pan_ids:self.pan_ids + num_channels]
+
+        # Per-channel audio is summed by one gain-matrix multiply per block,
+        # which also produces the sends into each aux bus (bus 1 onwards).
+        # Every aux bus runs its effect once on the summed sends.
+        aux_chains = default_aux_buses(tempo) if aux_buses is None else aux_buses
+        self.aux_names = list(aux_chains)
+        self.mixer = MatrixMixer(num_channels, buffer_size, num_buses=1 + len(self.aux_names))
+        self._master_out = self.mixer.outputs[MASTER_BUS]
+        self._dry_delay = DelayLine(max_compensation, buffer_size)
+        self.config.update(aux_buses=[
+            (self.mixer.outputs[1 + index], AuxBus(name, aux_chains[name], sr, buffer_size, max_delay=max_compensation))
+            for index, name in enumerate(self.aux_names)])
+        self._master_ramp = np.zeros(buffer_size, dtype=np.float32)
+        self._master_gain = np.zeros((buffer_size, 2), dtype=np.float32)
+
+        # Channel-strip EQ for all channels in one filter bank, run on the
+        # channel inputs before the faders.
+        self.channel_eq = ChannelEQ(num_channels, sr, buffer_size)
+        # Channel compressors after the EQ, batched the same way, and a
+        # lookahead true-peak limiter as the last master stage (off until
+        # set_master_limiter; its lookahead counts as master latency).
+        self.channel_dynamics = ChannelCompressor(num_channels, sr, buffer_size)
+        self.master_limiter = BrickwallLimiter(sr, buffer_size)
+        self.limiter_enabled = False
+
+        # Silence flags, computed per channel every block. The master rack is
+        # skipped once its input is silent and its effect tails have died out.
+        self.channel_silent = np.zeros(num_channels, dtype=bool)
+        self._channel_peaks = np.zeros(num_channels, dtype=np.float32)
+        self._channel_rows = self.mixer.inputs.reshape(num_channels, -1)
+        self.master_gate = TailGate.for_chain(self.fx_rack, sr)
+        self._silence_threshold = np.full(num_channels, self.master_gate.threshold, dtype=np.float32)
+        self._peak = np.zeros(1, dtype=np.float32)
+        self.master_silent = False
+
+        # Plugin delay compensation: channels whose processing adds less
+        # latency are delayed so every path into the master stays aligned.
+        self.channel_latency = np.zeros(num_channels, dtype=np.int64)
+        self.channel_compensation = np.zeros(num_channels, dtype=np.int64)
+        self.output_latency = 0
+        self.channel_delays = MultiDelayLine(num_channels, max_compensation, buffer_size)
+        self.update_latency_compensation()
+
+        # Line inputs arrive in the same callback as the output (duplex);
+        # routed channels are fed from that block, so monitoring through
+        # the mix costs one period.
+        self.input_channels = input_channels
+        self._line_in_block = np.zeros((buffer_size, max(input_channels, 1)), dtype=np.float32)
+        self.line_in_routes = {}
+        self._loopback_test = None
+
+        # Channel sources (preloaded clips) with an optional FXEngine each.
+        # A frozen channel plays its cached insert render instead and only
+        # runs the sends live.
+        self.channel_sources = {}
+        self.channel_fx = {}
+        self.frozen_tracks = {}
+        self._source_digests = {}
+        self._frozen_players = {}
+        # Source scratch and FX output per playing channel, from a pool
+        # allocated up front rather than per source change
+        self._source_scratch = {}
+        self._scratch_pool = BufferPool((buffer_size, 2), count=2 * num_channels)
+        self.freezer = TrackFreezer(sr, cache_dir=freeze_cache_dir)
+        self.ir_cache = IRCache(ir_cache_dir)
+        self._freeze_watch = None
+        self._freeze_lock = threading.Lock()
+
+        # Third-party plugins run in worker processes (see PluginHost); a
+        # late or crashed plugin silences its channel for that block only.
+        # Each has a TailGate, so a silent channel stops waking its plugins.
+        self.channel_plugins = {}
+        self._plugin_gates = {}
+        self._plugin_budget = 0.0
+        self.plugin_scanner = None
+
+        # Channel inputs (pre-fader) and the final output, published to the
+        # GUI at a fixed rate via get_meters().
+        self.meters = None
+        if metering:
+            names = [f"ch{ch}" for ch in channels] + ["master"]
+            self.meters = MeterBank(num_channels + 1, sr=sr, block_size=buffer_size, names=names)
         
         try:
-            pw.init(None, None)
-            self.context = pw.Context()
-            self.core = self.context.connect()
-            
-            self.stream = pw.Stream(self.core, "TuxTrax-Audio", None)
-            self.stream.add_listener(self._stream_listener)
-            self.stream.connect(pw.DIRECTION_INPUT, pw.ID_ANY, pw.STREAM_FLAG_AUTOCONNECT | pw.STREAM_FLAG_RT_PROCESS, None, 0)
+            self.backend = create_backend(backend, self._process_block, sr=sr, buffer_size=buffer_size,
+                                          channels=2, input_channels=input_channels, **backend_options)
         except Exception as e:
-            logger.error(f"Error initializing PipeWire: {e}")
+            logger.error(f"Error initializing audio backend '{backend}': {e}")
             raise
 
-    def _stream_listener(self, stream, buffer):
+    @property
+    def fx_rack(self):
+        """Master insert chain (read-only view of the current snapshot)."""
+        return self.config.current.fx_rack
+
+    @fx_rack.setter
+    def fx_rack(self, chain):
+        # A new chain is swapped in whole; editing the published one in place
+        # would race the callback.
+        self.config.update(fx_rack=chain)
+        self.update_latency_compensation()
+
+    def _process_block(self, buffer, indata=None):
+        """Render one block into ``buffer``; called by the backend.
+
+        Everything here works on preallocated buffers so the steady-state
+        callback does not allocate (see ``debug_allocations``).
+        """
+        guard = self.allocation_guard
         try:
-            with self.lock:
-                processed = self.fx_rack.process(self.mix_buffer, self.sr)
-                buffer[:] = processed
-                self.mix_buffer.fill(0)
+            config = self.config.current
+            if guard is not None:
+                guard.begin()
+            while self._pending_audio:
+                item = self._pending_audio.popleft()
+                np.add(item[0], item[1], out=item[0])
+                self._spent_audio.append(item)
+                item = None
+            if indata is not None and self.input_channels:
+                np.copyto(self._line_in_block, indata)
+                for channel_input, line_in in config.line_in_views:
+                    np.add(channel_input, line_in, out=channel_input)
+            for channel_input, player, fx, block, fx_out, inserts in config.source_views:
+                player.render(block)
+                if fx is None:
+                    np.add(channel_input, block, out=channel_input)
+                elif not (fx.process_block(block, self.sr, fx_out, guard=guard, inserts=inserts)
+                          and fx.bypassed):
+                    np.add(channel_input, fx_out, out=channel_input)
+            if config.plugin_views:
+                if guard is not None:
+                    guard.pause()
+                # Every worker in a stage runs at once; all stages share
+                # one deadline, so stalled plugins cannot add up past it
+                deadline = time.perf_counter() + self._plugin_budget
+                for stage in config.plugin_views:
+                    # A plugin on a silent channel stops running once its tail is over
+                    for channel_input, host, gate in stage:
+                        if not gate.should_skip(gate.is_silent(block_peak(channel_input, self._peak))):
+                            host.submit(channel_input)
+                    for channel_input, host, gate in stage:
+                        if not gate.bypassed:
+                            host.collect(channel_input, deadline)
+                            gate.update(gate.input_silent, block_peak(channel_input, self._peak), self.buffer_size)
+                if guard is not None:
+                    guard.resume()
+            # Silent channels drop out of the EQ and compressor passes
+            row_peaks(self._channel_rows, self._channel_peaks)
+            np.less(self._channel_peaks, self._silence_threshold, out=self.channel_silent)
+            self.channel_eq.process(self.mixer.inputs, self.channel_silent)
+            self.channel_dynamics.process(self.mixer.inputs, self.channel_silent)
+            self.params.process_block()
+            self.mixer.set_gains(self._channel_volumes, self._channel_pans)
+            self.channel_delays.process(self.mixer.inputs)
+            row_peaks(self._channel_rows, self._channel_peaks)
+            np.less(self._channel_peaks, self._silence_threshold, out=self.channel_silent)
+            if self.meters is not None:
+                self.meters.write(self.mixer.inputs)
+            if np.count_nonzero(self.channel_silent) < self.num_channels:
+                self.mixer.process()
+            else:
+                self.mixer.skip()
+            if self._dry_delay.delay:
+                self._dry_delay.process(self._master_out)
+            np.add(self.mix_buffer, self._master_out, out=self.mix_buffer)
+            for sends, aux in config.aux_buses:
+                returned = aux.process(sends, guard)
+                if returned is not None:
+                    np.add(self.mix_buffer, returned, out=self.mix_buffer)
+            master_in_silent = self.master_gate.is_silent(block_peak(self.mix_buffer, self._peak))
+            if self.master_gate.should_skip(master_in_silent):
+                buffer.fill(0)
+                self.master_silent = True
+            else:
+                process_into(config.fx_rack, self.mix_buffer, self.sr, buffer, guard)
+                self.master_silent = self.master_gate.update(master_in_silent, block_peak(buffer, self._peak),
+                                                             self.buffer_size)
+            self.params.ramp(self.master_volume_id, self._master_ramp)
+            # Expand to the block layout first: a broadcasting multiply
+            # against a column makes numpy allocate iterator buffers.
+            np.copyto(self._master_gain, self._master_ramp[:, None])
+            np.multiply(buffer, self._master_gain, out=buffer)
+            if self.limiter_enabled:
+                self.master_limiter.process(buffer)
+            if self._loopback_test is not None:
+                self._loopback_test.process(buffer, indata)
+            if self.meters is not None:
+                self.meters.write_stereo(self.num_channels, buffer)
+                self.meters.process()
+            self.mix_buffer.fill(0)
+            self.mixer.clear()
+            if guard is not None:
+                guard.end()
+            # Drop our reference before counting the block, so a replaced
+            # snapshot is always released by the control thread.
+            config = None
+            self.config.end_block()
+        except RealtimeAllocationError:
+            raise
         except Exception as e:
-            logger.error(f"Error in stream listener: {e}")
+            logger.error(f"Error in audio callback: {e}")
             buffer.fill(0)
 
-    def add_audio(self, audio):
+    def add_audio(self, audio, channel_id=None):
+        """Add audio to the next block.
+
+        Args:
+            audio (np.ndarray): (frames,) mono or (frames, 2) stereo samples
+            channel_id (int): Mixer channel (from 1) to feed, so channel gain,
+                pan and mute/solo apply; None adds straight to the master mix
+        """
         try:
-            with self.lock:
-                end = min(len(audio), self.buffer_size)
-                self.mix_buffer[:end] += audio[:end]
+            end = min(len(audio), self.buffer_size)
+            if audio.ndim == 1:
+                audio = audio[:, None]
+            # Copied and queued here; the callback adds it at the start of
+            # its next block.
+            audio = np.array(np.broadcast_to(audio[:end], (end, 2)), dtype=np.float32)
+            target = self.mix_buffer if channel_id is None else self.mixer.inputs[channel_id - 1]
+            self._pending_audio.append((target[:end], audio))
+            while self._spent_audio:
+                self._spent_audio.popleft()
         except Exception as e:
             logger.error(f"Error adding audio: {e}")
 
+    def update_latency_compensation(self):
+        """Recompute plugin delay compensation after latency or routing changes.
+
+        Builds the routing graph (channels into the mixer, the mixer into
+        the master both directly and through every aux bus, then the master
+        FX rack), finds every path's latency and sets the channel, dry and
+        aux return delay lines so all paths reaching the master are
+        sample-aligned. Called by ``fx_rack`` assignment, so the tail gate
+        follows the chain.
+        """
+        try:
+            graph = LatencyGraph()
+            for index, latency in enumerate(self.channel_latency):
+                graph.add_node(f"ch{index + 1}", latency)
+                graph.add_edge(f"ch{index + 1}", "mix")
+            graph.add_edge("mix", "master")
+            aux_buses = [aux for _, aux in self.config.current.aux_buses]
+            for aux in aux_buses:
+                graph.add_node(f"aux:{aux.name}", aux.latency_samples)
+                graph.add_edge("mix", f"aux:{aux.name}")
+                graph.add_edge(f"aux:{aux.name}", "master")
+            fx_rack = self.fx_rack
+            master_latency = plugin_latency(fx_rack)
+            if self.limiter_enabled:
+                master_latency += self.master_limiter.latency_samples
+            graph.add_node("master", master_latency)
+            output, delays = graph.compensate()
+            self.master_gate.configure(effect_gap_seconds(fx_rack), master_latency)
+            compensation = [delays[(f"ch{index + 1}", "mix")] for index in range(self.num_channels)]
+            self.channel_delays.set_delays(compensation)
+            self._dry_delay.set_delay(delays[("mix", "master")])
+            for aux in aux_buses:
+                aux.return_delay.set_delay(delays[(f"aux:{aux.name}", "master")])
+            np.copyto(self.channel_compensation, compensation)
+            self.output_latency = output["master"]
+            logger.info(f"Latency compensation updated: output latency {self.output_latency} samples")
+        except Exception as e:
+            logger.error(f"Error updating latency compensation: {e}")
+
+    def _aux_index(self, aux):
+        if aux not in self.aux_names:
+            raise KeyError(f"Unknown aux bus '{aux}'")
+        return self.aux_names.index(aux)
+
+    def set_send(self, channel_id, aux, level, pre_fader=None):
+        """Set how much of a channel feeds a send/return aux bus.
+
+        Args:
+            channel_id (int): Mixer channel (from 1)
+            aux (str): Aux bus name, e.g. "reverb"
+            level (float): Send level (0.0-1.0)
+            pre_fader (bool): Tap before the channel fader and pan; None
+                keeps the current tap
+        """
+        try:
+            self.mixer.set_send(1 + self._aux_index(aux), channel_id - 1, level, pre_fader)
+        except Exception as e:
+            logger.error(f"Error setting send: {e}")
+
+    def set_aux_return(self, aux, level):
+        """Set the level an aux bus returns into the master."""
+        try:
+            index = self._aux_index(aux)
+            buses = list(self.config.current.aux_buses)
+            sends, bus = buses[index]
+            buses[index] = (sends, bus.with_return_level(level))
+            self.config.update(aux_buses=buses)
+        except Exception as e:
+            logger.error(f"Error setting aux return: {e}")
+
+    def set_aux_chain(self, aux, chain):
+        """Replace the effect chain of an aux bus (swapped in whole)."""
+        try:
+            index = self._aux_index(aux)
+            buses = list(self.config.current.aux_buses)
+            sends, old = buses[index]
+            bus = AuxBus(aux, chain, self.sr, self.buffer_size, old.return_level, old.return_delay.max_delay)
+            buses[index] = (sends, bus)
+            self.config.update(aux_buses=buses)
+            self.update_latency_compensation()
+        except Exception as e:
+            logger.error(f"Error setting aux chain: {e}")
+
+    def set_convolution_reverb(self, ir, aux="reverb", tail_partition=None, ir_sample_rate=None):
+        """Use a convolution reverb with impulse response ``ir`` on an aux bus.
+
+        Args:
+            ir: Path of an IR file (prepared once, then loaded from
+                ``ir_cache``) or a (frames,) / (frames, 2) array
+            aux (str): Aux bus to replace the chain of
+            tail_partition (int): See ``ConvolutionReverb``
+            ir_sample_rate (int): Rate of an array ``ir`` (default: the engine rate)
+
+        Returns:
+            ConvolutionReverb: The installed reverb, or None on error
+        """
+        try:
+            if isinstance(ir, str):
+                reverb = self.ir_cache.reverb(ir, self.sr, self.buffer_size, tail_partition=tail_partition)
+            else:
+                if ir_sample_rate:
+                    ir = resample_ir(ir, ir_sample_rate, self.sr)
+                reverb = ConvolutionReverb(ir, self.sr, self.buffer_size, tail_partition=tail_partition)
+        except Exception as e:
+            logger.error(f"Error building convolution reverb: {e}")
+            return None
+        self.set_aux_chain(aux, reverb)
+        return reverb
+
+    def set_channel_latency(self, channel_id, samples):
+        """Report the latency (in samples) that a channel's processing adds."""
+        self.channel_latency[channel_id - 1] = samples
+        self.update_latency_compensation()
+
+    def get_channel_latency(self, channel_id):
+        """Latency figures for one channel, in samples.
+
+        Returns:
+            dict: "plugin" latency reported by the channel, "compensation"
+            delay added to align it, and "total" of the two
+        """
+        plugin = int(self.channel_latency[channel_id - 1])
+        compensation = int(self.channel_compensation[channel_id - 1])
+        return {"plugin": plugin, "compensation": compensation, "total": plugin + compensation}
+
+    def get_meters(self):
+        """Latest published meter readings, safe to poll from the GUI thread.
+
+        Returns:
+            dict: "peak_db", "rms_db", "true_peak_db" as (meters, 2) arrays and
+            "momentary_lufs", "short_term_lufs" as (meters,) arrays, where
+            meter ``n - 1`` is channel ``n`` and the last one is the master;
+            None when metering is disabled
+        """
+        if self.meters is None:
+            return None
+        return self.meters.read()
+
     def start(self):
         try:
-            self.stream.start()
+            self.backend.start()
+            # Frees replaced snapshots and unloaded plugins off the audio thread
+            self.config.start_reclaimer()
         except Exception as e:
             logger.error(f"Error starting stream: {e}")
             raise
 
     def stop(self):
         try:
-            self.stream.stop()
+            self.backend.stop()
+            self.config.stop_reclaimer()
+            self.config.reclaim(force=True)
         except Exception as e:
             logger.error(f"Error stopping stream: {e}")
             raise
@@ -65,14 +466,14 @@ class AudioEngine:
     def set_latency(self, latency_ms):
         """Set the desired latency for the audio engine."""
         try:
-            self.stream.set_latency(latency_ms)
+            self.backend.set_latency(latency_ms)
         except Exception as e:
             logger.error(f"Error setting latency: {e}")
 
     def get_latency(self):
         """Get the current latency of the audio engine."""
         try:
-            return self.stream.get_latency()
+            return self.backend.get_latency()
         except Exception as e:
             logger.error(f"Error getting latency: {e}")
             return None
@@ -94,30 +495,394 @@ class AudioEngine:
         except subprocess.CalledProcessError as e:
             logger.error(f"Error generating music with Magenta Studio: {e}")
 
-    def route_line_in(self, channel_id):
-        """Route external line-in to a specific channel."""
+    def _update_line_in_views(self):
+        # (channel input, line-in column) pairs, built here rather than in the callback
+        views = []
+        for channel_id, input_channel in self.line_in_routes.items():
+            column = self._line_in_block[:, input_channel]
+            for side in range(2):
+                views.append((self.mixer.inputs[channel_id - 1, :, side], column))
+        self.config.update(line_in_views=views)
+
+    def route_line_in(self, channel_id, input_channel=None):
+        """Route external line-in to a specific channel.
+
+        Args:
+            channel_id (int): Mixer channel (from 1)
+            input_channel (int): Capture channel (from 0); defaults to the
+                channel's position on the interface, wrapping around
+        """
         try:
-            logger.info(f"Routing external line-in to channel {channel_id}.")
+            if not self.input_channels:
+                raise RuntimeError("engine was created without input channels")
+            if input_channel is None:
+                input_channel = (channel_id - 1) % self.input_channels
+            if not 0 <= input_channel < self.input_channels:
+                raise ValueError(f"input channel {input_channel} does not exist")
+            self.line_in_routes[channel_id] = input_channel
+            self._update_line_in_views()
+            logger.info(f"Routing external line-in {input_channel + 1} to channel {channel_id}.")
         except Exception as e:
             logger.error(f"Error routing external line-in: {e}")
 
-    def load_vst3_plugin(self, path, channel_id):
-        """Load a VST3 plugin for a specific channel."""
+    def unroute_line_in(self, channel_id):
+        """Stop feeding a channel from the line inputs."""
+        try:
+            self.line_in_routes.pop(channel_id, None)
+            self._update_line_in_views()
+        except Exception as e:
+            logger.error(f"Error unrouting external line-in: {e}")
+
+    def measure_loopback_latency(self, input_channel=0, timeout=2.0):
+        """Measure input-to-output latency with a cable (or null loopback) from outputs to inputs.
+
+        Returns:
+            dict: "samples" and "ms" of the round trip, or None if the click
+            was not heard before ``timeout`` seconds
+        """
         try:
+            test = LoopbackTest(self.sr, input_channel, timeout_s=timeout)
+            self._loopback_test = test
+            test.done.wait(timeout + 1.0)
+            self._loopback_test = None
+            if test.latency_samples is None:
+                logger.warning("Loopback click was not heard; check the loopback cable")
+                return None
+            logger.info(f"Loopback latency: {test.latency_samples} samples ({test.latency_ms:.2f} ms)")
+            return {"samples": test.latency_samples, "ms": test.latency_ms}
+        except Exception as e:
+            logger.error(f"Error measuring loopback latency: {e}")
+            return None
+
+    def _update_source_views(self):
+        # (channel input, player, fx, scratch, fx output, run inserts) per
+        # playing channel, built here rather than in the callback
+        views = []
+        for channel_id, player in self.channel_sources.items():
+            if channel_id not in self._source_scratch:
+                self._source_scratch[channel_id] = (self._scratch_pool.acquire(), self._scratch_pool.acquire())
+            block, fx_out = self._source_scratch[channel_id]
+            frozen = self._frozen_players.get(channel_id)
+            views.append((self.mixer.inputs[channel_id - 1], frozen or player, self.channel_fx.get(channel_id),
+                          block, fx_out, frozen is None))
+        unused = [self._source_scratch.pop(channel_id) for channel_id in list(self._source_scratch)
+                  if channel_id not in self.channel_sources]
+        self.config.update(source_views=views)
+        # Back to the pool once the callback is past the snapshot using them
+        for buffers in unused:
+            self.config.defer(lambda buffers=buffers: [self._scratch_pool.release(buf) for buf in buffers])
+
+    def _update_channel_latency(self, channel_id):
+        fx = self.channel_fx.get(channel_id)
+        latency = sum(host.latency_samples for host in self.channel_plugins.get(channel_id, []))
+        if fx is not None:
+            latency += fx.latency_samples
+            if channel_id in self.frozen_tracks:
+                latency -= fx.insert_latency_samples
+        self.set_channel_latency(channel_id, latency)
+
+    def set_channel_source(self, channel_id, audio, loop=True):
+        """Play a preloaded clip on a channel (None stops it).
+
+        Replacing the source unfreezes the channel.
+
+        Args:
+            channel_id (int): Mixer channel (from 1)
+            audio (np.ndarray): (frames,) mono or (frames, 2) stereo samples
+            loop (bool): Start over at the end of the clip
+        """
+        try:
+            self.unfreeze_channel(channel_id)
+            if audio is None:
+                self.channel_sources.pop(channel_id, None)
+                self._source_digests.pop(channel_id, None)
+            else:
+                audio = np.asarray(audio, dtype=np.float32)
+                if audio.ndim == 1:
+                    audio = np.repeat(audio[:, None], 2, axis=1)
+                self.channel_sources[channel_id] = ClipPlayer(audio, loop)
+                self._source_digests[channel_id] = source_digest(audio, self.sr)
+            self._update_source_views()
+        except Exception as e:
+            logger.error(f"Error setting channel source: {e}")
+
+    def set_channel_fx(self, channel_id, fx):
+        """Run a channel's source through an ``FXEngine`` (None removes it)."""
+        try:
+            self.unfreeze_channel(channel_id)
+            if fx is None:
+                self.channel_fx.pop(channel_id, None)
+            else:
+                self.channel_fx[channel_id] = fx
+            self._update_source_views()
+            self._update_channel_latency(channel_id)
+        except Exception as e:
+            logger.error(f"Error setting channel FX: {e}")
+
+    def toggle_channel_effect(self, channel_id, effect_name, state):
+        """Switch one of a channel's inserts on or off (e.g. "Saturation", "Tape").
+
+        The channel's chain is recompiled without the disabled effects and
+        the change is crossfaded over the next block.
+
+        Returns:
+            bool: False if the channel has no ``FXEngine``
+        """
+        fx = self.channel_fx.get(channel_id)
+        if fx is None:
+            return False
+        try:
+            fx.toggle_effect(fx.channel_id, effect_name, state)
+            self._update_channel_latency(channel_id)
+            return True
+        except Exception as e:
+            logger.error(f"Error toggling {effect_name} on channel {channel_id}: {e}")
+            return False
+
+    def _freeze_key(self, channel_id):
+        # None once the channel has lost its source or FX (a concurrent
+        # set_channel_source/set_channel_fx), so no freeze matches it
+        digest, fx = self._source_digests.get(channel_id), self.channel_fx.get(channel_id)
+        if digest is None or fx is None:
+            return None
+        return freeze_key(digest, fx)
+
+    def freeze_channel(self, channel_id):
+        """Render a channel's source through its inserts and play the render instead.
+
+        The render runs on a background worker, faster than real time, and
+        is cached on disk; the channel keeps playing live until it is done.
+        Sends, fader and pan stay live. The freeze is dropped automatically
+        when the source or any insert parameter changes.
+
+        Returns:
+            Future: Resolves to the ``FrozenTrack`` once it is playing (None if
+            the channel changed during the render); None on error
+        """
+        try:
+            if channel_id not in self.channel_sources or channel_id not in self.channel_fx:
+                raise ValueError(f"channel {channel_id} has no source and FX chain to freeze")
+            future = self.freezer.freeze(self.channel_sources[channel_id].audio, self.channel_fx[channel_id],
+                                         self._source_digests[channel_id])
+            installed = Future()
+            future.add_done_callback(lambda done: installed.set_result(self._install_frozen(channel_id, done)))
+            return installed
+        except Exception as e:
+            logger.error(f"Error freezing channel {channel_id}: {e}")
+            return None
+
+    def _install_frozen(self, channel_id, future):
+        try:
+            track = future.result()
+            with self._freeze_lock:
+                if channel_id not in self.channel_fx or self._freeze_key(channel_id) != track.key:
+                    logger.info(f"Channel {channel_id} changed while freezing; render discarded")
+                    return None
+                player = ClipPlayer(track.audio, self.channel_sources[channel_id].loop)
+                player.seek(self.channel_sources[channel_id].position)
+                self.frozen_tracks[channel_id] = track
+                self._frozen_players[channel_id] = player
+                self._update_source_views()
+            self._update_channel_latency(channel_id)
+            self._start_freeze_watch()
+            logger.info(f"Channel {channel_id} frozen")
+            return track
+        except Exception as e:
+            logger.error(f"Error freezing channel {channel_id}: {e}")
+            return None
+
+    def unfreeze_channel(self, channel_id):
+        """Go back to processing a frozen channel's inserts live."""
+        try:
+            with self._freeze_lock:
+                if self.frozen_tracks.pop(channel_id, None) is None:
+                    return
+                player = self._frozen_players.pop(channel_id)
+                self.channel_sources[channel_id].seek(player.position)
+                self._update_source_views()
+            self._update_channel_latency(channel_id)
+            logger.info(f"Channel {channel_id} unfrozen")
+        except Exception as e:
+            logger.error(f"Error unfreezing channel {channel_id}: {e}")
+
+    def check_frozen_tracks(self):
+        """Unfreeze every channel whose source or insert settings changed since its render.
+
+        Returns:
+            list: Channels that were unfrozen
+        """
+        stale = [channel_id for channel_id, track in list(self.frozen_tracks.items())
+                 if self._freeze_key(channel_id) != track.key]
+        for channel_id in stale:
+            logger.info(f"Channel {channel_id} settings changed; dropping its freeze")
+            self.unfreeze_channel(channel_id)
+        return stale
+
+    def _start_freeze_watch(self, interval=0.5):
+        # Plugin parameters are plain attributes, so changes are found by
+        # polling the signatures while anything is frozen. The watcher
+        # decides to exit under the freeze lock and clears _freeze_watch
+        # there, so a freeze installed meanwhile always gets a watcher.
+        def watch():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.check_frozen_tracks()
+                except Exception as e:
+                    logger.error(f"Error checking frozen tracks: {e}")
+                with self._freeze_lock:
+                    if not self.frozen_tracks:
+                        self._freeze_watch = None
+                        return
+
+        with self._freeze_lock:
+            if self._freeze_watch is not None:
+                return
+            self._freeze_watch = threading.Thread(target=watch, name="FreezeWatch", daemon=True)
+            self._freeze_watch.start()
+
+    def _update_plugin_views(self):
+        # Stage n runs the n-th plugin of every channel; a channel's chain
+        # stays in order because each stage is collected before the next
+        depth = max((len(hosts) for hosts in self.channel_plugins.values()), default=0)
+        stages = [tuple((self.mixer.inputs[channel_id - 1], hosts[n], self._plugin_gates[hosts[n]])
+                        for channel_id, hosts in self.channel_plugins.items() if n < len(hosts))
+                  for n in range(depth)]
+        hosts = [host for chain in self.channel_plugins.values() for host in chain]
+        self._plugin_budget = max((host.timeout_ms for host in hosts), default=0.0) / 1000.0
+        self.config.update(plugin_views=stages)
+
+    def load_vst3_plugin(self, path, channel_id, timeout_ms=None, options=None):
+        """Load a VST3 plugin for a specific channel, hosted in its own process.
+
+        Args:
+            path (str): VST3 bundle path
+            channel_id (int): Mixer channel (from 1); plugins run in load order
+            timeout_ms (float): Longest wait per block before the plugin's
+                output is replaced with silence (default half a block). All
+                hosted plugins share one deadline per callback: the longest
+                of their timeouts, counted from when the first is woken
+            options (dict): Plugin parameters to set after loading
+
+        Returns:
+            PluginHost: The running host, or None if the plugin did not load
+        """
+        try:
+            host = PluginHost(path, self.sr, self.buffer_size, 2, timeout_ms, options).start()
+            self._plugin_gates[host] = TailGate(self.sr, gap_seconds=PLUGIN_TAIL_GAP_SECONDS,
+                                                latency_samples=host.latency_samples)
+            self.channel_plugins.setdefault(channel_id, []).append(host)
+            self._update_plugin_views()
+            self._update_channel_latency(channel_id)
             logger.info(f"Loaded VST3 Plugin: {path} → Channel {channel_id}")
+            return host
         except Exception as e:
             logger.error(f"Error loading VST3 plugin: {e}")
+            return None
+
+    def unload_vst3_plugins(self, channel_id):
+        """Remove and stop every hosted plugin on a channel."""
+        try:
+            hosts = self.channel_plugins.pop(channel_id, [])
+            self._update_plugin_views()
+            for host in hosts:
+                self._plugin_gates.pop(host, None)
+            # The callback may still be inside a block of the old snapshot
+            for host in hosts:
+                self.config.defer(host.close)
+            self._update_channel_latency(channel_id)
+        except Exception as e:
+            logger.error(f"Error unloading VST3 plugins: {e}")
+
+    def scan_vst3_plugins(self, folder, retry_blacklisted=False):
+        """List the VST3 plugins in ``folder``, probing only new or changed bundles.
+
+        Returns:
+            list: Plugin metadata dicts (see ``PluginScanner.scan``)
+        """
+        try:
+            if self.plugin_scanner is None:
+                self.plugin_scanner = PluginScanner()
+            return self.plugin_scanner.scan(folder, retry_blacklisted)
+        except Exception as e:
+            logger.error(f"Error scanning VST3 plugins: {e}")
+            return []
+
+    def get_plugin_stats(self, channel_id):
+        """CPU accounting for each hosted plugin on a channel (see ``PluginHost.cpu_stats``)."""
+        return {host.name: host.cpu_stats() for host in self.channel_plugins.get(channel_id, [])}
 
     def set_volume(self, channel_id, value):
-        """Set the volume for a specific channel."""
+        """Set the volume (0.0-1.0) for a specific channel; safe from any thread."""
         try:
-            logger.info(f"Volume for Channel {channel_id} set to {value}")
+            self.params.set_by_name(f"ch{channel_id}.volume", value)
         except Exception as e:
             logger.error(f"Error setting volume: {e}")
 
     def set_pan(self, channel_id, value):
-        """Set the pan for a specific channel."""
+        """Set the pan (-1.0 left to 1.0 right) for a specific channel; safe from any thread."""
         try:
-            logger.info(f"Pan for Channel {channel_id} set to {value}")
+            self.params.set_by_name(f"ch{channel_id}.pan", value)
         except Exception as e:
             logger.error(f"Error setting pan: {e}")
+
+    def set_eq(self, channel_id, band, gain_db):
+        """Boost or cut one EQ band ("low", "mid" or "high") of a channel in dB."""
+        try:
+            self.channel_eq.set_gain(channel_id - 1, band, gain_db)
+        except Exception as e:
+            logger.error(f"Error setting EQ: {e}")
+
+    def set_eq_style(self, channel_id, style):
+        """Pick a channel's EQ character from ``EQ_STYLES``."""
+        try:
+            self.channel_eq.set_style(channel_id - 1, style)
+        except Exception as e:
+            logger.error(f"Error setting EQ style: {e}")
+
+    def set_compressor(self, channel_id, amount):
+        """Set a channel's compression from the strip's 0-10 knob (0 is off)."""
+        try:
+            self.channel_dynamics.set_amount(channel_id - 1, amount)
+        except Exception as e:
+            logger.error(f"Error setting compressor: {e}")
+
+    def set_master_limiter(self, enabled=True, ceiling_db=None, release_ms=None):
+        """Switch the master brickwall limiter and optionally set its ceiling (dBTP) and release.
+
+        Enabling it adds its lookahead to the output latency.
+        """
+        try:
+            if ceiling_db is not None:
+                self.master_limiter.set_ceiling(ceiling_db)
+            if release_ms is not None:
+                self.master_limiter.set_release(release_ms)
+            if enabled != self.limiter_enabled:
+                if enabled:
+                    # Not running while disabled, so its state is ours to clear
+                    self.master_limiter.reset()
+                self.limiter_enabled = enabled
+                self.update_latency_compensation()
+        except Exception as e:
+            logger.error(f"Error setting master limiter: {e}")
+
+    def set_mute(self, channel_id, state):
+        """Mute or unmute a specific channel."""
+        try:
+            self.mixer.set_mute(channel_id - 1, state)
+        except Exception as e:
+            logger.error(f"Error setting mute: {e}")
+
+    def set_solo(self, channel_id, state):
+        """Solo or unsolo a specific channel."""
+        try:
+            self.mixer.set_solo(channel_id - 1, state)
+        except Exception as e:
+            logger.error(f"Error setting solo: {e}")
+
+    def set_master_volume(self, value):
+        """Set the master output volume (0.0-1.0); safe from any thread."""
+        try:
+            self.params.set(self.master_volume_id, value)
+        except Exception as e:
+            logger.error(f"Error setting master volume: {e}")
@@ -0,0 +1,241 @@
+import threading
+import numpy as np
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def plugin_latency(plugin):
+    """Latency in samples that a plugin, chain or processing node adds.
+
+    Nodes report latency through a ``latency_samples`` attribute (our own
+    processors) or ``reported_latency_samples`` (pedalboard's VST3/AU
+    plugins). Chains such as a ``Pedalboard`` report the sum of their plugins.
+    Anything else is treated as latency-free.
+    """
+    if plugin is None:
+        return 0
+    for attr in ("latency_samples", "reported_latency_samples"):
+        latency = getattr(plugin, attr, None)
+        if latency is not None:
+            return int(latency)
+    if hasattr(plugin, "__iter__") and hasattr(plugin, "append"):
+        return sum(plugin_latency(child) for child in plugin)
+    return 0
+
+
+def _ring_length(max_delay, block_size):
+    # A whole number of blocks, so a block write never wraps.
+    return -(-(max_delay + block_size) // block_size) * block_size
+
+
+class DelayLine:
+    """Preallocated delay for a (frames, channels) stream, applied in place.
+
+    Args:
+        max_delay (int): Largest delay in samples ``set_delay`` accepts
+        block_size (int): Frames per block
+        channels (int): Channels per frame
+    """
+
+    def __init__(self, max_delay, block_size, channels=2, dtype=np.float32):
+        self.max_delay = max_delay
+        self.block_size = block_size
+        self.delay = 0
+        self._length = _ring_length(max_delay, block_size)
+        self._ring = np.zeros((self._length, channels), dtype=dtype)
+        self._pos = 0
+
+    def set_delay(self, samples):
+        if not 0 <= samples <= self.max_delay:
+            raise ValueError(f"Delay {samples} is outside 0..{self.max_delay} samples")
+        self.delay = int(samples)
+
+    def reset(self):
+        self._ring.fill(0)
+
+    def process(self, block):
+        """Delay ``block`` (block_size, channels) in place and return it."""
+        frames = block.shape[0]
+        pos = self._pos
+        np.copyto(self._ring[pos:pos + frames], block)
+        if self.delay:
+            start = (pos - self.delay) % self._length
+            first = min(frames, self._length - start)
+            np.copyto(block[:first], self._ring[start:start + first])
+            if first < frames:
+                np.copyto(block[first:], self._ring[:frames - first])
+        self._pos = (pos + frames) % self._length
+        return block
+
+
+class MultiDelayLine:
+    """Independent delays for every line of a (lines, frames, 2) block.
+
+    Used by the engine to align mixer channels. All lines share one ring and
+    are read back with a single gather through a precomputed index table, so
+    the cost does not depend on how many lines are delayed. With every delay
+    at zero ``process`` returns immediately.
+
+    Attributes:
+        delays (np.ndarray): Current delay per line in samples
+    """
+
+    def __init__(self, num_lines, max_delay, block_size, channels=2, dtype=np.float32):
+        self.num_lines = num_lines
+        self.max_delay = max_delay
+        self.block_size = block_size
+        self.delays = np.zeros(num_lines, dtype=np.int64)
+        self._length = _ring_length(max_delay, block_size)
+        self._ring = np.zeros((num_lines, self._length, channels), dtype=dtype)
+        self._ring_rows = self._ring.reshape(num_lines * self._length, channels)
+        self._pos = 0
+        # Read index = line * length + (pos + frame - delay) % length; the
+        # (offsets, active) table is rebuilt and swapped in whole by
+        # set_delays, so the callback never reads a half-updated one.
+        self._table = (np.zeros((num_lines, block_size), dtype=np.intp), False)
+        self._line_base = np.repeat(np.arange(num_lines, dtype=np.intp)[:, None] * self._length, block_size, axis=1)
+        self._length_table = np.full((num_lines, block_size), self._length, dtype=np.intp)
+        self._index = np.zeros((num_lines, block_size), dtype=np.intp)
+        self._index_flat = self._index.reshape(-1)
+        self._pos_table = np.zeros((num_lines, block_size), dtype=np.intp)
+        self._update_offsets()
+
+    def set_delays(self, delays):
+        """Set every line's delay in samples (control thread)."""
+        delays = np.asarray(delays, dtype=np.int64)
+        if delays.min() < 0 or delays.max() > self.max_delay:
+            raise ValueError(f"Delays must be within 0..{self.max_delay} samples")
+        np.copyto(self.delays, delays)
+        self._update_offsets()
+
+    def _update_offsets(self):
+        frames = np.arange(self.block_size, dtype=np.intp)
+        # + length keeps the index positive before the modulo
+        offsets = frames[None, :] - self.delays[:, None].astype(np.intp) + self._length
+        self._table = (offsets, bool(self.delays.any()))
+
+    def reset(self):
+        self._ring.fill(0)
+
+    def process(self, block):
+        """Delay each line of ``block`` (lines, block_size, channels) in place."""
+        pos = self._pos
+        offsets, active = self._table
+        if active:
+            np.copyto(self._ring[:, pos:pos + self.block_size], block)
+            self._pos_table.fill(pos)
+            np.add(offsets, self._pos_table, out=self._index)
+            np.remainder(self._index, self._length_table, out=self._index)
+            np.add(self._index, self._line_base, out=self._index)
+            # mode="clip" lets numpy gather straight into ``out``
+            np.take(self._ring_rows, self._index_flat, axis=0, mode="clip",
+                    out=block.reshape(self.num_lines * self.block_size, -1))
+        self._pos = (pos + self.block_size) % self._length
+        return block
+
+
+class LatencyGraph:
+    """Routing graph used to work out plugin delay compensation.
+
+    Nodes are processing stages (channels, buses) with the latency they add;
+    edges carry audio from one node to another. ``compensate`` finds, for
+    every node, when its inputs arrive, and for every edge, how much it must
+    be delayed so that all paths reaching a node are sample-aligned.
+    """
+
+    def __init__(self):
+        self.latency = {}
+        self.edges = []
+
+    def add_node(self, name, latency=0):
+        self.latency[name] = int(latency)
+
+    def add_edge(self, source, destination):
+        for name in (source, destination):
+            self.latency.setdefault(name, 0)
+        self.edges.append((source, destination))
+
+    def _topological_order(self):
+        incoming = {name: 0 for name in self.latency}
+        outgoing = {name: [] for name in self.latency}
+        for source, destination in self.edges:
+            incoming[destination] += 1
+            outgoing[source].append(destination)
+        ready = [name for name, count in incoming.items() if count == 0]
+        order = []
+        while ready:
+            name = ready.pop()
+            order.append(name)
+            for destination in outgoing[name]:
+                incoming[destination] -= 1
+                if incoming[destination] == 0:
+                    ready.append(destination)
+        if len(order) != len(self.latency):
+            raise ValueError("Routing graph has a feedback loop; latency cannot be compensated")
+        return order
+
+    def compensate(self):
+        """Compute path latencies and per-edge compensation delays.
+
+        Returns:
+            tuple: (output latency per node, compensation delay per edge),
+            both dicts in samples; a node's output latency is the latest
+            arrival at its input plus its own latency
+        """
+        arrival = {name: 0 for name in self.latency}
+        output = {}
+        for name in self._topological_order():
+            output[name] = arrival[name] + self.latency[name]
+            for source, destination in self.edges:
+                if source == name:
+                    arrival[destination] = max(arrival[destination], output[name])
+        delays = {(source, destination): arrival[destination] - output[source]
+                  for source, destination in self.edges}
+        return output, delays
+
+
+class LoopbackTest:
+    """Measures input-to-output latency through a physical (or null) loopback.
+
+    Sends a single click on every output channel and listens for it on one
+    input channel. The engine calls ``process`` at the end of each callback
+    while the test is armed; ``done`` is set once the click is heard or the
+    timeout passes.
+
+    Attributes:
+        latency_samples (int): Measured round trip, None until heard
+    """
+
+    def __init__(self, sr, input_channel=0, threshold=0.5, timeout_s=1.0):
+        self.sr = sr
+        self.input_channel = input_channel
+        self.threshold = threshold
+        self.latency_samples = None
+        self.done = threading.Event()
+        self._timeout = int(timeout_s * sr)
+        self._sent_at = None
+        self._clock = 0
+
+    def process(self, outdata, indata):
+        if self.done.is_set():
+            return
+        if self._sent_at is None:
+            outdata[0] = 1.0
+            self._sent_at = self._clock
+        elif indata is not None:
+            heard = np.flatnonzero(np.abs(indata[:, self.input_channel]) >= self.threshold)
+            if heard.size:
+                self.latency_samples = self._clock + int(heard[0]) - self._sent_at
+                self.done.set()
+        if self._clock - self._sent_at > self._timeout:
+            self.done.set()
+        self._clock += len(outdata)
+
+    @property
+    def latency_ms(self):
+        if self.latency_samples is None:
+            return None
+        return self.latency_samples / self.sr * 1000.0
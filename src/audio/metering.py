@@ -0,0 +1,238 @@
+import numpy as np
+import logging
+from src.utils.dsp import BiquadBank, TruePeakDetector, accumulate_power, row_peaks, to_db
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+LUFS_OFFSET = -0.691  # ITU-R BS.1770 loudness offset
+SILENCE_DB = -120.0
+
+
+def k_weighting_coefficients(sr):
+    """ITU-R BS.1770 K-weighting filter for any sample rate.
+
+    The two stages are derived from their analogue prototypes so that at
+    48 kHz they match the coefficients tabulated in the standard.
+
+    Returns:
+        list: (b0, b1, b2, a1, a2) for the high-shelf and the high-pass stage
+    """
+    # Stage 1: high shelf, about +4 dB above 1.5 kHz (head diffraction).
+    K = np.tan(np.pi * 1681.974450955533 / sr)
+    Q = 0.7071752369554196
+    Vh = 10.0 ** (3.999843853973347 / 20.0)
+    Vb = Vh ** 0.4996667741545416
+    a0 = 1.0 + K / Q + K * K
+    shelf = np.array([(Vh + Vb * K / Q + K * K) / a0, 2.0 * (K * K - Vh) / a0,
+                      (Vh - Vb * K / Q + K * K) / a0, 2.0 * (K * K - 1.0) / a0,
+                      (1.0 - K / Q + K * K) / a0])
+    # Stage 2: RLB high-pass around 38 Hz.
+    K = np.tan(np.pi * 38.13547087602444 / sr)
+    Q = 0.5003270373238773
+    a0 = 1.0 + K / Q + K * K
+    highpass = np.array([1.0, -2.0, 1.0, 2.0 * (K * K - 1.0) / a0, (1.0 - K / Q + K * K) / a0])
+    return [shelf, highpass]
+
+
+class MeterSnapshot:
+    """Double-buffered meter readings published by the audio thread.
+
+    The audio thread fills the back buffer and flips ``_front`` with a single
+    attribute store; the GUI copies the front buffer and retries if a publish
+    happened while it was copying (a sequence lock), so neither side ever
+    waits on the other. Buffers are flat so the audio thread can write them
+    without creating views.
+    """
+
+    STEREO_FIELDS = ("peak_db", "rms_db", "true_peak_db")
+    MONO_FIELDS = ("momentary_lufs", "short_term_lufs")
+
+    def __init__(self, num_meters):
+        self.num_meters = num_meters
+        self._buffers = []
+        for _ in range(2):
+            buf = {name: np.full(num_meters * 2, SILENCE_DB, dtype=np.float32) for name in self.STEREO_FIELDS}
+            buf.update({name: np.full(num_meters, SILENCE_DB, dtype=np.float32) for name in self.MONO_FIELDS})
+            self._buffers.append(buf)
+        self._front = 0
+        self.sequence = 0
+
+    def back(self):
+        """Buffer the audio thread may write into before the next ``publish``."""
+        return self._buffers[1 - self._front]
+
+    def publish(self):
+        self._front = 1 - self._front
+        self.sequence += 1
+
+    def read(self):
+        """Copy the latest readings (GUI thread).
+
+        Returns:
+            dict: "peak_db", "rms_db", "true_peak_db" as (meters, 2) arrays,
+            "momentary_lufs", "short_term_lufs" as (meters,) arrays and the
+            publish ``sequence``
+        """
+        while True:
+            sequence = self.sequence
+            front = self._buffers[self._front]
+            data = {name: values.copy() for name, values in front.items()}
+            if sequence == self.sequence:
+                for name in self.STEREO_FIELDS:
+                    data[name] = data[name].reshape(self.num_meters, 2)
+                data["sequence"] = sequence
+                return data
+
+
+class MeterBank:
+    """Peak, RMS, true-peak and LUFS meters for many stereo signals at once.
+
+    The audio thread copies each block into one (frames, meters * 2) scratch
+    array with ``write``/``write_stereo`` and calls ``process`` once, which
+    updates every meter in a single pass plus the stateful K-weighting and
+    true-peak filters. Readings are accumulated between publishes and pushed
+    to a ``MeterSnapshot`` at ``publish_hz``, so the GUI polls a fixed-rate
+    snapshot instead of touching the audio data.
+
+    True peak is oversampled on every block and never reads below the
+    sample peak. It costs more than everything else together, so it is
+    skipped while every meter is silent once the interpolator's history
+    has run out; an idle bank then costs no more than the sample meters.
+
+    Attributes:
+        names (list): Meter names, e.g. ["ch1", ..., "master"]
+        snapshot (MeterSnapshot): Latest published readings
+        publish_every (int): Blocks between publishes
+    """
+
+    def __init__(self, num_meters, sr=48000, block_size=512, publish_hz=30.0, names=None, true_peak=True):
+        self.num_meters = num_meters
+        self.sr = sr
+        self.block_size = block_size
+        self.names = list(names) if names is not None else [f"meter{i}" for i in range(num_meters)]
+        self.snapshot = MeterSnapshot(num_meters)
+        rows = num_meters * 2
+
+        self._block = np.zeros((block_size, rows), dtype=np.float32)
+        self._block_view = self._block.reshape(block_size, num_meters, 2)
+        self._work = np.zeros_like(self._block)
+
+        self._k_filter = BiquadBank(rows, 2)
+        for section, coefficients in enumerate(k_weighting_coefficients(sr)):
+            self._k_filter.set_section(section, coefficients)
+        self._true_peak_detector = TruePeakDetector(rows, block_size) if true_peak else None
+        if true_peak:
+            # Silent blocks still to oversample before the history is all zeros
+            history = self._true_peak_detector.taps.shape[1] - 1
+            self._true_peak_tail = -(-history // block_size)
+        self._true_peak_pending = 0
+        self._block_flat = self._block.reshape(1, -1)
+        self._block_peak = np.zeros(1, dtype=np.float32)
+
+        # Accumulated between publishes.
+        self._peak = np.zeros(rows, dtype=np.float32)
+        self._true_peak = np.zeros(rows, dtype=np.float32)
+        self._sum_squares = np.zeros(rows, dtype=np.float64)
+        self._frames = 0
+        self._blocks_since_publish = 0
+        self.publish_every = max(1, int(round(sr / block_size / publish_hz)))
+
+        # K-weighted energy per block in a ring, with running window sums for
+        # momentary (400 ms) and short-term (3 s) loudness.
+        block_seconds = block_size / sr
+        self._momentary_blocks = max(1, int(round(0.4 / block_seconds)))
+        self._short_term_blocks = max(self._momentary_blocks, int(round(3.0 / block_seconds)))
+        self._ring = np.zeros((self._short_term_blocks, rows), dtype=np.float64)
+        self._ring_rows = list(self._ring)
+        self._ring_pos = 0
+        self._k_peak = np.zeros(rows, dtype=np.float32)
+        self._k_energy = np.zeros(rows, dtype=np.float64)
+        self._momentary = np.zeros(rows, dtype=np.float64)
+        self._short_term = np.zeros(rows, dtype=np.float64)
+
+        # Views the publish step hands to to_db(), built once.
+        self._peak_rows = self._peak.reshape(rows, 1)
+        self._true_peak_rows = (self._true_peak if true_peak else self._peak).reshape(rows, 1)
+        self._sum_squares_rows = self._sum_squares.reshape(rows, 1)
+        self._momentary_pairs = self._momentary.reshape(num_meters, 2)
+        self._short_term_pairs = self._short_term.reshape(num_meters, 2)
+        self._momentary_gain = 1.0 / (self._momentary_blocks * block_size)
+        self._short_term_gain = 1.0 / (self._short_term_blocks * block_size)
+
+        # Compile the kernels for every layout used here before the first callback.
+        accumulate_power(self._block[:1], self._k_peak, self._k_energy)
+        row_peaks(self._block_flat, self._block_peak)
+        self._k_energy.fill(0)
+        self._k_peak.fill(0)
+        scratch = np.zeros(rows, dtype=np.float32)
+        to_db(self._peak_rows, 1.0, 20.0, 0.0, SILENCE_DB, scratch)
+        to_db(self._sum_squares_rows, 1.0, 10.0, 0.0, SILENCE_DB, scratch)
+        to_db(self._momentary_pairs, 1.0, 10.0, 0.0, SILENCE_DB, scratch[:num_meters])
+
+    def index(self, name):
+        return self.names.index(name)
+
+    def write(self, block, start=0):
+        """Copy a (meters, frames, 2) block into meters ``start`` onwards."""
+        np.copyto(self._block_view[:, start:start + block.shape[0]], block.transpose(1, 0, 2))
+
+    def write_stereo(self, index, block):
+        """Copy one (frames, 2) signal into meter ``index``."""
+        np.copyto(self._block_view[:, index], block)
+
+    def process(self):
+        """Update all meters from the blocks written since the last call (audio thread)."""
+        block = self._block
+        accumulate_power(block, self._peak, self._sum_squares)
+        self._frames += self.block_size
+        self._blocks_since_publish += 1
+        if self._true_peak_detector is not None:
+            row_peaks(self._block_flat, self._block_peak)
+            if self._block_peak[0] > 0.0:
+                self._true_peak_pending = self._true_peak_tail
+                self._true_peak_detector.process(block, self._true_peak)
+            elif self._true_peak_pending:
+                self._true_peak_pending -= 1
+                self._true_peak_detector.process(block, self._true_peak)
+
+        # K-weighted energy, kept per row; left and right are summed at publish (BS.1770).
+        np.copyto(self._work, block)
+        self._k_filter.process(self._work)
+        self._k_energy.fill(0)
+        accumulate_power(self._work, self._k_peak, self._k_energy)
+        pos = self._ring_pos
+        length = self._short_term_blocks
+        np.add(self._momentary, self._k_energy, out=self._momentary)
+        np.subtract(self._momentary, self._ring_rows[(pos - self._momentary_blocks) % length], out=self._momentary)
+        np.add(self._short_term, self._k_energy, out=self._short_term)
+        np.subtract(self._short_term, self._ring_rows[pos], out=self._short_term)
+        np.copyto(self._ring_rows[pos], self._k_energy)
+        self._ring_pos = (pos + 1) % length
+
+        block.fill(0)
+        if self._blocks_since_publish >= self.publish_every:
+            self._publish()
+
+    def _publish(self):
+        back = self.snapshot.back()
+        if self._true_peak_detector is not None:
+            np.maximum(self._true_peak, self._peak, out=self._true_peak)
+        to_db(self._peak_rows, 1.0, 20.0, 0.0, SILENCE_DB, back["peak_db"])
+        to_db(self._true_peak_rows, 1.0, 20.0, 0.0, SILENCE_DB, back["true_peak_db"])
+        to_db(self._sum_squares_rows, 1.0 / self._frames, 10.0, 0.0, SILENCE_DB, back["rms_db"])
+        to_db(self._momentary_pairs, self._momentary_gain, 10.0, LUFS_OFFSET, SILENCE_DB, back["momentary_lufs"])
+        to_db(self._short_term_pairs, self._short_term_gain, 10.0, LUFS_OFFSET, SILENCE_DB,
+              back["short_term_lufs"])
+        self.snapshot.publish()
+
+        self._peak.fill(0)
+        self._true_peak.fill(0)
+        self._sum_squares.fill(0)
+        self._frames = 0
+        self._blocks_since_publish = 0
+
+    def read(self):
+        """Latest published readings (GUI thread); see ``MeterSnapshot.read``."""
+        return self.snapshot.read()
@@ -0,0 +1,156 @@
+import numpy as np
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+ONE_POLE = 0
+LINEAR = 1
+
+
+class ParameterStore:
+    """Flat float32 store of automatable parameter values shared with the audio thread.
+
+    The GUI or MIDI thread writes targets with ``set``; each write is a single
+    element store into a preallocated array, so no lock is taken. The audio
+    thread calls ``process_block`` once per block, which moves every
+    parameter towards its target with one-pole or linear smoothing using a
+    handful of vectorised ops over the whole array. The cost is the same for
+    one parameter or the full ``capacity``.
+
+    Within a block, ``ramp``/``ramps`` expand the move from the previous to
+    the current value into per-sample linear ramps to avoid zipper noise.
+
+    Attributes:
+        targets (np.ndarray): Values last written by the control threads
+        current (np.ndarray): Smoothed values at the end of the current block
+        previous (np.ndarray): Smoothed values at the end of the previous block
+        count (int): Number of registered parameters
+    """
+
+    def __init__(self, sr=48000, block_size=512, capacity=1024, smoothing_ms=20.0):
+        self.sr = sr
+        self.block_size = block_size
+        self.capacity = capacity
+        self.smoothing_ms = smoothing_ms
+        self.targets = np.zeros(capacity, dtype=np.float32)
+        self.current = np.zeros(capacity, dtype=np.float32)
+        self.previous = np.zeros(capacity, dtype=np.float32)
+        self.minimum = np.zeros(capacity, dtype=np.float32)
+        self.maximum = np.ones(capacity, dtype=np.float32)
+        self._coeff = np.ones(capacity, dtype=np.float32)
+        self._step = np.full(capacity, np.inf, dtype=np.float32)
+        self._neg_step = np.full(capacity, -np.inf, dtype=np.float32)
+        self._linear = np.zeros(capacity, dtype=bool)
+        self._delta = np.zeros(capacity, dtype=np.float32)
+        self._linear_delta = np.zeros(capacity, dtype=np.float32)
+        self._abs = np.zeros(capacity, dtype=np.float32)
+        self._settled = np.zeros(capacity, dtype=bool)
+        self._epsilon = np.full(capacity, 1e-6, dtype=np.float32)
+        self._ramp = (np.arange(1, block_size + 1, dtype=np.float32) / block_size)
+        self._ids = {}
+        self.names = []
+        self.count = 0
+
+    def register(self, name, default=0.0, minimum=0.0, maximum=1.0, smoothing_ms=None, mode=ONE_POLE):
+        """Register a parameter and return its ID.
+
+        Registration only fills preallocated slots, so it is safe while the
+        audio thread is running.
+
+        Args:
+            name (str): Unique parameter name, e.g. "ch1.volume"
+            default (float): Initial value
+            minimum (float): Lowest allowed value
+            maximum (float): Highest allowed value
+            smoothing_ms (float): Smoothing time (None = store default, 0 = none)
+            mode (int): ONE_POLE or LINEAR smoothing
+
+        Returns:
+            int: Parameter ID used for ``set``/``get``
+        """
+        if name in self._ids:
+            return self._ids[name]
+        if self.count >= self.capacity:
+            raise RuntimeError(f"Parameter store is full ({self.capacity} parameters)")
+        param_id = self.count
+        smoothing_ms = self.smoothing_ms if smoothing_ms is None else smoothing_ms
+        self.minimum[param_id] = minimum
+        self.maximum[param_id] = maximum
+        self.targets[param_id] = self.current[param_id] = self.previous[param_id] = default
+        self._linear[param_id] = mode == LINEAR
+        if smoothing_ms > 0:
+            blocks = smoothing_ms / 1000.0 * self.sr / self.block_size
+            # One-pole: reach ~63% of a step after smoothing_ms.
+            self._coeff[param_id] = 1.0 - np.exp(-1.0 / blocks)
+            # Linear: traverse the full range in smoothing_ms.
+            self._step[param_id] = (maximum - minimum) / blocks
+            self._neg_step[param_id] = -self._step[param_id]
+        self._ids[name] = param_id
+        self.names.append(name)
+        self.count += 1
+        return param_id
+
+    def register_group(self, names, **kwargs):
+        """Register several parameters in consecutive slots.
+
+        Returns:
+            int: ID of the first parameter; the rest follow contiguously
+        """
+        ids = [self.register(name, **kwargs) for name in names]
+        if ids != list(range(ids[0], ids[0] + len(ids))):
+            raise ValueError("Parameter group is not contiguous; names already registered elsewhere")
+        return ids[0]
+
+    def id_of(self, name):
+        return self._ids[name]
+
+    def set(self, param_id, value):
+        """Write a new target value (control thread, lock-free)."""
+        lo = self.minimum[param_id]
+        hi = self.maximum[param_id]
+        self.targets[param_id] = lo if value < lo else hi if value > hi else value
+
+    def set_by_name(self, name, value):
+        self.set(self._ids[name], value)
+
+    def set_normalized(self, param_id, value):
+        """Write a target from a 0.0-1.0 control value, e.g. a MIDI CC."""
+        lo = self.minimum[param_id]
+        self.set(param_id, lo + (self.maximum[param_id] - lo) * value)
+
+    def get(self, param_id):
+        """Smoothed value at the end of the current block."""
+        return float(self.current[param_id])
+
+    def process_block(self):
+        """Advance every parameter by one block of smoothing (audio thread)."""
+        np.copyto(self.previous, self.current)
+        np.subtract(self.targets, self.current, out=self._delta)
+        np.minimum(self._delta, self._step, out=self._linear_delta)
+        np.maximum(self._linear_delta, self._neg_step, out=self._linear_delta)
+        np.multiply(self._delta, self._coeff, out=self._delta)
+        np.copyto(self._delta, self._linear_delta, where=self._linear)
+        np.add(self.current, self._delta, out=self.current)
+        # Snap to the target once close enough so values settle exactly.
+        np.subtract(self.targets, self.current, out=self._abs)
+        np.abs(self._abs, out=self._abs)
+        np.less(self._abs, self._epsilon, out=self._settled)
+        np.copyto(self.current, self.targets, where=self._settled)
+
+    def ramp(self, param_id, out):
+        """Fill ``out`` (block_size,) with a per-sample ramp from previous to current."""
+        start = self.previous[param_id]
+        np.multiply(self._ramp, self.current[param_id] - start, out=out)
+        np.add(out, start, out=out)
+        return out
+
+    def ramps(self, first_id, count, out):
+        """Fill ``out`` (count, block_size) with ramps for consecutive parameters."""
+        end = first_id + count
+        delta = self._delta[first_id:end]
+        np.subtract(self.current[first_id:end], self.previous[first_id:end], out=delta)
+        np.multiply(delta[:, None], self._ramp, out=out)
+        np.add(out, self.previous[first_id:end, None], out=out)
+        return out
@@ -0,0 +1,373 @@
+"""Out-of-process plugin hosting.
+
+Each hosted plugin runs in its own worker process. Audio moves through a
+shared-memory block ring and the two sides wake each other with eventfds
+(pipes where eventfd is unavailable), so a plugin that hangs or crashes
+costs a block of silence instead of the whole engine.
+
+The worker is this module run as a script; see ``_worker_main``.
+"""
+import os
+import sys
+import json
+import time
+import select
+import atexit
+import argparse
+import subprocess
+import numpy as np
+import logging
+from multiprocessing import resource_tracker, shared_memory
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Plugin path that selects the built-in ``DummyPlugin`` instead of a VST3;
+# a bundle directory holding a ``DUMMY_MANIFEST`` (JSON keyword arguments)
+# loads as one too, for scanner tests
+DUMMY_PLUGIN = "dummy"
+DUMMY_MANIFEST = "dummy.json"
+RING_SLOTS = 4
+
+# Header words (int64) at the start of the shared segment
+_REQUEST, _RESPONSE, _CPU_NS, _BLOCKS, _MAX_CPU_NS, _LATENCY, _STATE, _FRAMES = range(8)
+_HEADER_WORDS = 8
+_STARTING, _READY, _FAILED, _STOP = 0, 1, 2, 3
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class DummyPlugin:
+    """Stand-in for a VST3 plugin, for tests and for checking the host.
+
+    Args:
+        gain (float): Gain applied to every sample
+        latency_samples (int): Latency it reports (the audio is not delayed)
+        process_ms (float): Time to spend in each block, to simulate a heavy plugin
+        crash_after (int): Exit the worker process after this many blocks
+        name (str): Plugin name it reports
+        load_ms (float): Time to spend loading
+        crash_on_load (bool): Exit the process while loading
+    """
+
+    manufacturer_name = "TuxTrax"
+    category = "Fx"
+    is_effect = True
+    is_instrument = False
+
+    def __init__(self, gain=1.0, latency_samples=0, process_ms=0.0, crash_after=None, name="Dummy",
+                 load_ms=0.0, crash_on_load=False):
+        if crash_on_load:
+            os._exit(1)
+        time.sleep(load_ms / 1000.0)
+        self.name = name
+        self.gain = gain
+        self.reported_latency_samples = latency_samples
+        self.process_ms = process_ms
+        self.crash_after = crash_after
+        self._blocks = 0
+
+    @property
+    def parameters(self):
+        return {"gain": self.gain}
+
+    def process(self, audio, sample_rate, reset=False):
+        self._blocks += 1
+        if self.crash_after is not None and self._blocks > self.crash_after:
+            os._exit(1)
+        if self.process_ms:
+            # Busy-wait so the time shows up as plugin CPU
+            end = time.perf_counter() + self.process_ms / 1000.0
+            while time.perf_counter() < end:
+                pass
+        return audio * self.gain
+
+
+def _load(path, options, plugin_name=None):
+    manifest = os.path.join(path, DUMMY_MANIFEST)
+    if path == DUMMY_PLUGIN or os.path.isfile(manifest):
+        if path != DUMMY_PLUGIN:
+            with open(manifest) as f:
+                options = dict(json.load(f), **options)
+        return DummyPlugin(**options)
+    from pedalboard import load_plugin
+    plugin = load_plugin(path, plugin_name=plugin_name) if plugin_name else load_plugin(path)
+    for name, value in options.items():
+        setattr(plugin, name, value)
+    return plugin
+
+
+def _make_wakeup():
+    # (read end, write end); an eventfd is both
+    if hasattr(os, "eventfd"):
+        fd = os.eventfd(0, os.EFD_CLOEXEC)
+        return fd, fd
+    return os.pipe()
+
+
+def _signal(fd):
+    if hasattr(os, "eventfd_write"):
+        os.eventfd_write(fd, 1)
+    else:
+        os.write(fd, b"\x01")
+
+
+def _drain(fd):
+    if hasattr(os, "eventfd_read"):
+        os.eventfd_read(fd)
+    else:
+        os.read(fd, 4096)
+
+
+def _layout(block_size, channels):
+    slot = block_size * channels
+    header = _HEADER_WORDS * 8
+    return header, slot, header + 2 * RING_SLOTS * slot * 4
+
+
+def _views(buffer, block_size, channels):
+    header_bytes, slot, _ = _layout(block_size, channels)
+    header = np.ndarray(_HEADER_WORDS, dtype=np.int64, buffer=buffer)
+    blocks = np.ndarray((2, RING_SLOTS, block_size, channels), dtype=np.float32, buffer=buffer,
+                        offset=header_bytes)
+    return header, blocks[0], blocks[1]
+
+
+class PluginHost:
+    """Runs one plugin in a worker process, block by block.
+
+    ``process`` is called from the audio callback: it copies the block into
+    the next shared-memory slot, wakes the worker and waits for the result.
+    The engine splits this into ``submit`` and ``collect`` so that all its
+    hosts work at once against one deadline per callback.
+    If the worker has not answered within ``timeout_ms`` the block is
+    replaced with silence and counted in ``timeouts``; the late answer is
+    ignored because every slot carries its request number. A worker that
+    died is reported once and then bypassed with silence.
+
+    Args:
+        path (str): VST3 bundle path, or ``DUMMY_PLUGIN``
+        sample_rate (int): Engine sample rate
+        block_size (int): Frames per block
+        channels (int): Channels per frame
+        timeout_ms (float): Longest wait per block; defaults to half a block
+        options (dict): Plugin parameters to set after loading (keyword
+            arguments for ``DummyPlugin``)
+
+    Attributes:
+        latency_samples (int): Latency the plugin reports
+        timeouts (int): Blocks replaced with silence because the worker was late
+        crashed (bool): The worker process has exited
+    """
+
+    def __init__(self, path, sample_rate, block_size, channels=2, timeout_ms=None, options=None):
+        self.path = path
+        self.name = os.path.basename(os.path.normpath(path))
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.channels = channels
+        self.timeout_ms = timeout_ms if timeout_ms is not None else 500.0 * block_size / sample_rate
+        self.options = options or {}
+        self.latency_samples = 0
+        self.timeouts = 0
+        self.crashed = False
+        self._process = None
+        self._shm = None
+        self._seq = 0
+        self._pending = 0
+
+    def start(self, startup_timeout=30.0):
+        """Launch the worker and wait until the plugin is loaded."""
+        _, _, size = _layout(self.block_size, self.channels)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._header, self._inputs, self._outputs = _views(self._shm.buf, self.block_size, self.channels)
+        self._header.fill(0)
+        self._request_read, self._request_write = _make_wakeup()
+        self._response_read, self._response_write = _make_wakeup()
+        self._poll = select.poll()
+        self._poll.register(self._response_read, select.POLLIN)
+        command = [sys.executable, "-m", "src.audio.plugin_host", "--shm", self._shm.name,
+                   "--request-fd", str(self._request_read), "--response-fd", str(self._response_write),
+                   "--sample-rate", str(self.sample_rate), "--block-size", str(self.block_size),
+                   "--channels", str(self.channels), "--plugin", self.path, "--options", json.dumps(self.options)]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_PROJECT_ROOT, os.environ.get("PYTHONPATH")])))
+        fds = {self._request_read, self._response_write}
+        for fd in fds:
+            os.set_inheritable(fd, True)
+        self._process = subprocess.Popen(command, pass_fds=tuple(fds), env=env, cwd=_PROJECT_ROOT)
+        deadline = time.monotonic() + startup_timeout
+        while self._header[_STATE] == _STARTING:
+            if self._process.poll() is not None or time.monotonic() > deadline:
+                self.close()
+                raise RuntimeError(f"Plugin worker for {self.name} did not start")
+            self._poll.poll(50)
+        if self._header[_STATE] != _READY:
+            self.close()
+            raise RuntimeError(f"Plugin worker could not load {self.path}")
+        _drain(self._response_read)
+        self.latency_samples = int(self._header[_LATENCY])
+        atexit.register(self.close)
+        logger.info(f"Hosting {self.name} in process {self._process.pid} ({self.latency_samples} samples latency)")
+        return self
+
+    def submit(self, block):
+        """Hand ``block`` (frames, channels) float32 to the worker without waiting.
+
+        The result is picked up by ``collect``; submitting every host before
+        collecting any lets their workers run in parallel.
+
+        Returns:
+            bool: False when the host is bypassed and ``block`` was silenced
+        """
+        if self.crashed or self._process is None:
+            block.fill(0)
+            self._pending = 0
+            return False
+        self._seq += 1
+        slot = self._seq % RING_SLOTS
+        np.copyto(self._inputs[slot, :len(block)], block)
+        self._header[_FRAMES] = len(block)
+        self._header[_REQUEST] = self._seq
+        _signal(self._request_write)
+        self._pending = self._seq
+        return True
+
+    def collect(self, block, deadline):
+        """Wait until ``deadline`` (``time.perf_counter`` seconds) for the submitted block.
+
+        The result is copied into ``block`` in place; a late or crashed
+        worker leaves silence instead.
+
+        Returns:
+            bool: False when the block was replaced with silence
+        """
+        seq = self._pending
+        if not seq:
+            return False
+        self._pending = 0
+        while self._header[_RESPONSE] < seq:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                if self._process.poll() is not None:
+                    self.crashed = True
+                    logger.error(f"Plugin worker for {self.name} exited; bypassing it with silence")
+                else:
+                    self.timeouts += 1
+                block.fill(0)
+                return False
+            if self._poll.poll(remaining * 1000.0):
+                _drain(self._response_read)
+        np.copyto(block, self._outputs[seq % RING_SLOTS, :len(block)])
+        return True
+
+    def process(self, block):
+        """Run ``block`` through the plugin in place, waiting up to ``timeout_ms``.
+
+        Returns:
+            bool: False when the block was replaced with silence
+        """
+        if not self.submit(block):
+            return False
+        return self.collect(block, time.perf_counter() + self.timeout_ms / 1000.0)
+
+    def cpu_stats(self):
+        """Plugin CPU accounting measured in the worker.
+
+        Returns:
+            dict: "blocks" processed, "mean_us" and "max_us" of CPU time per
+            block, and "load" as CPU time over the audio time it covered
+        """
+        if self._shm is None:
+            return {"blocks": 0, "mean_us": 0.0, "max_us": 0.0, "load": 0.0, "timeouts": self.timeouts}
+        blocks = int(self._header[_BLOCKS])
+        cpu_ns = int(self._header[_CPU_NS])
+        audio_ns = blocks * self.block_size / self.sample_rate * 1e9
+        return {
+            "blocks": blocks,
+            "mean_us": cpu_ns / blocks / 1000.0 if blocks else 0.0,
+            "max_us": int(self._header[_MAX_CPU_NS]) / 1000.0,
+            "load": cpu_ns / audio_ns if blocks else 0.0,
+            "timeouts": self.timeouts,
+        }
+
+    def close(self, timeout=2.0):
+        """Stop the worker and free the shared memory."""
+        if self._process is not None:
+            self._header[_STATE] = _STOP
+            try:
+                _signal(self._request_write)
+                self._process.wait(timeout)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+                self._process.wait()
+            self._process = None
+            for fd in {self._request_read, self._request_write, self._response_read, self._response_write}:
+                os.close(fd)
+        if self._shm is not None:
+            del self._header, self._inputs, self._outputs
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+def _worker_main(argv=None):
+    parser = argparse.ArgumentParser(description="Plugin host worker")
+    parser.add_argument("--shm", required=True)
+    parser.add_argument("--request-fd", type=int, required=True)
+    parser.add_argument("--response-fd", type=int, required=True)
+    parser.add_argument("--sample-rate", type=int, required=True)
+    parser.add_argument("--block-size", type=int, required=True)
+    parser.add_argument("--channels", type=int, required=True)
+    parser.add_argument("--plugin", required=True)
+    parser.add_argument("--options", default="{}")
+    args = parser.parse_args(argv)
+
+    shm = shared_memory.SharedMemory(name=args.shm)
+    # The host owns the segment; don't let this process's tracker unlink it.
+    resource_tracker.unregister(shm._name, "shared_memory")
+    header, inputs, outputs = _views(shm.buf, args.block_size, args.channels)
+    try:
+        plugin = _load(args.plugin, json.loads(args.options))
+    except Exception as e:
+        logger.error(f"Could not load plugin {args.plugin}: {e}")
+        header[_STATE] = _FAILED
+        _signal(args.response_fd)
+        return 1
+    header[_LATENCY] = int(getattr(plugin, "reported_latency_samples", 0) or 0)
+    header[_STATE] = _READY
+    _signal(args.response_fd)
+
+    parent = os.getppid()
+    done = 0
+    poll = select.poll()
+    poll.register(args.request_fd, select.POLLIN)
+    while header[_STATE] != _STOP:
+        if not poll.poll(1000):
+            if os.getppid() != parent:
+                break  # the engine died
+            continue
+        _drain(args.request_fd)
+        seq = int(header[_REQUEST])
+        if seq <= done:
+            continue
+        # Only the newest request matters; older ones have already timed out.
+        slot = seq % RING_SLOTS
+        frames = int(header[_FRAMES])
+        start = time.thread_time_ns()
+        result = plugin.process(inputs[slot, :frames], args.sample_rate, reset=False)
+        np.copyto(outputs[slot, :frames], result)
+        elapsed = time.thread_time_ns() - start
+        header[_CPU_NS] += elapsed
+        header[_BLOCKS] += 1
+        header[_MAX_CPU_NS] = max(int(header[_MAX_CPU_NS]), elapsed)
+        header[_RESPONSE] = seq
+        done = seq
+        _signal(args.response_fd)
+    del header, inputs, outputs
+    shm.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_worker_main())
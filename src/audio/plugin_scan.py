@@ -0,0 +1,186 @@
+"""VST3 discovery with a persistent scan cache.
+
+Every bundle is probed in its own subprocess (a plugin that crashes or
+hangs while loading only takes its probe down) and the metadata is cached
+by bundle path and modification time, so later scans only load what was
+added or changed. Bundles that crashed or timed out are remembered as
+blacklisted until they change.
+"""
+import os
+import sys
+import json
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import logging
+from src.audio.plugin_host import _PROJECT_ROOT, _load
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+SCAN_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "tuxtrax", "vst3_scan.json")
+SCAN_CACHE_VERSION = 1
+PROBE_TIMEOUT = 20.0
+
+
+def find_bundles(folder):
+    """Every ``.vst3`` bundle below ``folder`` (bundles are not searched inside)."""
+    bundles = []
+    for root, dirs, files in os.walk(os.path.abspath(folder)):
+        for name in list(dirs):
+            if name.lower().endswith(".vst3"):
+                bundles.append(os.path.join(root, name))
+                dirs.remove(name)
+        bundles.extend(os.path.join(root, name) for name in files if name.lower().endswith(".vst3"))
+    return sorted(bundles)
+
+
+def bundle_mtime(path):
+    """Newest modification time (ns) of a bundle and everything in it."""
+    newest = os.stat(path).st_mtime_ns
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            for name in dirs + files:
+                try:
+                    newest = max(newest, os.stat(os.path.join(root, name)).st_mtime_ns)
+                except OSError:
+                    pass
+    return newest
+
+
+def plugin_metadata(plugin):
+    """Name, vendor, type, parameters and latency of a loaded plugin."""
+    return {
+        "name": getattr(plugin, "name", None) or type(plugin).__name__,
+        "vendor": getattr(plugin, "manufacturer_name", ""),
+        "category": getattr(plugin, "category", ""),
+        "version": getattr(plugin, "version", ""),
+        # pedalboard does not expose bus layouts; effects take audio in,
+        # instruments only produce it
+        "is_effect": bool(getattr(plugin, "is_effect", True)),
+        "is_instrument": bool(getattr(plugin, "is_instrument", False)),
+        "parameters": sorted(getattr(plugin, "parameters", {})),
+        "latency_samples": int(getattr(plugin, "reported_latency_samples", 0) or 0),
+    }
+
+
+def _probe_main(path):
+    # Runs in the probe subprocess: load every plugin in the bundle and
+    # print their metadata as one JSON line.
+    names = [None]
+    try:
+        from pedalboard import VST3Plugin
+        names = VST3Plugin.get_plugin_names_for_file(path) or [None]
+    except Exception:
+        pass
+    plugins = []
+    for name in names:
+        plugin = _load(path, {}, name if len(names) > 1 else None)
+        plugins.append(plugin_metadata(plugin))
+    print(json.dumps(plugins))
+    return 0
+
+
+def probe_bundle(path, timeout=PROBE_TIMEOUT):
+    """Load a bundle in a subprocess and return its cache entry."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [_PROJECT_ROOT, os.environ.get("PYTHONPATH")])))
+    entry = {"mtime": bundle_mtime(path), "status": "ok", "plugins": [], "error": ""}
+    try:
+        result = subprocess.run([sys.executable, "-m", "src.audio.plugin_scan", path], capture_output=True,
+                                text=True, timeout=timeout, env=env, cwd=_PROJECT_ROOT)
+    except subprocess.TimeoutExpired:
+        entry.update(status="timeout", error=f"no answer within {timeout:g} s")
+        return entry
+    lines = result.stdout.strip().splitlines()
+    if result.returncode != 0 or not lines:
+        error = result.stderr.strip().splitlines()
+        entry.update(status="failed", error=error[-1] if error else f"exit code {result.returncode}")
+        return entry
+    entry["plugins"] = json.loads(lines[-1])
+    return entry
+
+
+class PluginScanner:
+    """Finds VST3 plugins and keeps their metadata in a JSON cache.
+
+    Args:
+        cache_path (str): Cache file (default ``~/.cache/tuxtrax/vst3_scan.json``)
+        timeout (float): Seconds a probe may take before the bundle is blacklisted
+        max_workers (int): Probes run in parallel (default: CPU count)
+    """
+
+    def __init__(self, cache_path=None, timeout=PROBE_TIMEOUT, max_workers=None):
+        self.cache_path = cache_path or SCAN_CACHE_PATH
+        self.timeout = timeout
+        self.max_workers = max_workers or os.cpu_count() or 4
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._load_cache()
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path) as f:
+                cache = json.load(f)
+            if cache.get("version") == SCAN_CACHE_VERSION:
+                self.entries = cache["bundles"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error reading plugin scan cache, rescanning: {e}")
+
+    def _save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        partial = f"{self.cache_path}.partial"
+        with open(partial, "w") as f:
+            json.dump({"version": SCAN_CACHE_VERSION, "bundles": self.entries}, f, indent=1)
+        os.replace(partial, self.cache_path)
+
+    def scan(self, folder, retry_blacklisted=False):
+        """Scan ``folder``; only new or changed bundles are probed.
+
+        Args:
+            folder (str): Plugin folder, e.g. ``settings.vst3_plugin_path``
+            retry_blacklisted (bool): Probe bundles that failed before even
+                if they have not changed
+
+        Returns:
+            list: Metadata dicts of every usable plugin, each with its "path"
+        """
+        bundles = find_bundles(folder) if os.path.isdir(folder) else []
+        with self._lock:
+            stale = []
+            for path in bundles:
+                entry = self.entries.get(path)
+                if (entry is None or entry["mtime"] != bundle_mtime(path)
+                        or (retry_blacklisted and entry["status"] != "ok")):
+                    stale.append(path)
+            if stale:
+                logger.info(f"Probing {len(stale)} of {len(bundles)} VST3 bundles")
+                with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="PluginProbe") as pool:
+                    for path, entry in zip(stale, pool.map(lambda p: probe_bundle(p, self.timeout), stale)):
+                        if entry["status"] != "ok":
+                            logger.warning(f"Blacklisted VST3 {path}: {entry['status']} ({entry['error']})")
+                        self.entries[path] = entry
+            prefix = os.path.join(os.path.abspath(folder), "")
+            removed = [path for path in self.entries if path.startswith(prefix) and path not in bundles]
+            for path in removed:
+                del self.entries[path]
+            if stale or removed:
+                self._save_cache()
+        return self.plugins(folder)
+
+    def plugins(self, folder=None):
+        """Cached metadata of every usable plugin (optionally only below ``folder``)."""
+        prefix = os.path.join(os.path.abspath(folder), "") if folder else ""
+        return [dict(plugin, path=path) for path, entry in sorted(self.entries.items())
+                if path.startswith(prefix) and entry["status"] == "ok" for plugin in entry["plugins"]]
+
+    def blacklisted(self):
+        """Bundles that crashed or timed out, with the reason."""
+        return {path: f"{entry['status']}: {entry['error']}" for path, entry in self.entries.items()
+                if entry["status"] != "ok"}
+
+
+if __name__ == "__main__":
+    sys.exit(_probe_main(sys.argv[1]))
@@ -0,0 +1,99 @@
+import logging
+from src.audio.latency import plugin_latency
+from src.utils.dsp import row_peaks
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+SILENCE_THRESHOLD_DB = -90.0
+# Hosted plugins do not report their tails, so their output has to stay
+# quiet this long (long enough for a delay's gap between repeats) first
+PLUGIN_TAIL_GAP_SECONDS = 2.0
+
+
+def db_to_amplitude(db):
+    return 10.0 ** (db / 20.0)
+
+
+def effect_gap_seconds(plugin):
+    """Longest stretch an effect can stay quiet while its tail is still running.
+
+    A reverb decays continuously, so watching its output is enough. A delay
+    goes quiet between repeats, so its output must stay quiet for a whole
+    delay time before the tail can be called finished. Chains report the sum
+    of their plugins.
+    """
+    if plugin is None:
+        return 0.0
+    if hasattr(plugin, "__iter__") and hasattr(plugin, "append"):
+        return sum(effect_gap_seconds(child) for child in plugin)
+    gap = getattr(plugin, "tail_gap_seconds", None)
+    if gap is not None:
+        return float(gap)
+    gap = float(getattr(plugin, "delay_seconds", 0.0))
+    gap += float(getattr(plugin, "centre_delay_ms", 0.0)) / 1000.0
+    return gap
+
+
+class TailGate:
+    """Decides when a processing chain can be skipped because it is silent.
+
+    Fed the input silence flag and the output peak of every block the chain
+    runs. Once the input is silent and the output has stayed below the
+    threshold for longer than the chain's quiet gap (plus its latency), the
+    tail is over and ``bypassed`` turns on: callers skip the chain and pass a
+    silence flag on instead of samples. Any non-silent input turns it off.
+
+    Args:
+        sample_rate (float): Sample rate in Hz
+        threshold_db (float): Level below which a block counts as silent
+        gap_seconds (float): Quiet time required (see ``effect_gap_seconds``)
+        latency_samples (int): Chain latency; silence takes this long to come out
+    """
+
+    def __init__(self, sample_rate, threshold_db=SILENCE_THRESHOLD_DB, gap_seconds=0.0, latency_samples=0):
+        self.sample_rate = sample_rate
+        self.threshold = db_to_amplitude(threshold_db)
+        self.bypassed = False
+        self.input_silent = False
+        self._quiet = 0
+        self.configure(gap_seconds, latency_samples)
+
+    def configure(self, gap_seconds=0.0, latency_samples=0):
+        """Update the quiet time after the chain changes."""
+        self.hold_samples = int(gap_seconds * self.sample_rate) + int(latency_samples)
+        self.bypassed = False
+        self._quiet = 0
+
+    @classmethod
+    def for_chain(cls, chain, sample_rate, threshold_db=SILENCE_THRESHOLD_DB):
+        return cls(sample_rate, threshold_db, effect_gap_seconds(chain), plugin_latency(chain))
+
+    def is_silent(self, peak):
+        return bool(peak < self.threshold)
+
+    def should_skip(self, input_silent):
+        """Call before running the chain; True means skip it this block."""
+        self.input_silent = input_silent
+        if not input_silent:
+            self.bypassed = False
+            self._quiet = 0
+        return self.bypassed
+
+    def update(self, input_silent, output_peak, frames):
+        """Call after running the chain; returns the output silence flag."""
+        output_silent = bool(output_peak < self.threshold)
+        if input_silent and output_silent:
+            self._quiet += frames
+            if self._quiet > self.hold_samples:
+                self.bypassed = True
+        else:
+            self._quiet = 0
+        return output_silent
+
+
+def block_peak(block, scratch):
+    """Absolute peak of a whole C-contiguous block, using a (1,) ``scratch`` array."""
+    row_peaks(block.reshape(1, -1), scratch)
+    return scratch[0]
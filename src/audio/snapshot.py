@@ -0,0 +1,201 @@
+import threading
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+class EngineConfig:
+    """Immutable snapshot of everything the audio callback routes through.
+
+    Control threads never edit a snapshot the callback may be reading; they
+    build a new one with ``replace`` and publish it through ``ConfigSwap``.
+    Sequences are stored as tuples so nothing inside can be edited in place.
+
+    Attributes:
+        fx_rack (Pedalboard): Master insert chain
+        line_in_views (tuple): (channel input, line-in column) pairs
+        source_views (tuple): (channel input, player, fx, scratch, fx output,
+            run inserts) per channel with a source
+        plugin_views (tuple): Stages of (channel input, PluginHost, TailGate);
+            stage n holds the n-th plugin of every channel, so the hosts in
+            a stage can run at once
+        aux_buses (tuple): (mixer bus output, AuxBus) per send/return bus
+        version (int): Increases by one with every published change
+    """
+
+    __slots__ = ("fx_rack", "line_in_views", "source_views", "plugin_views", "aux_buses", "version")
+
+    def __init__(self, fx_rack, line_in_views=(), source_views=(), plugin_views=(), aux_buses=(), version=0):
+        for name, value in (("fx_rack", fx_rack), ("line_in_views", tuple(line_in_views)),
+                            ("source_views", tuple(source_views)), ("plugin_views", tuple(plugin_views)),
+                            ("aux_buses", tuple(aux_buses)), ("version", version)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("EngineConfig is immutable; publish a replace()d copy instead")
+
+    def replace(self, **changes):
+        """A new snapshot with ``changes`` applied and the version bumped."""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        fields["version"] = self.version + 1
+        return EngineConfig(**fields)
+
+    def validate(self, block_size):
+        """Check the snapshot can be used for ``block_size`` blocks; raises ValueError."""
+        if not callable(getattr(self.fx_rack, "process", None)):
+            raise ValueError("fx_rack must be a pedalboard chain or plugin")
+        for channel_input, line_in in self.line_in_views:
+            if len(channel_input) != block_size or len(line_in) != block_size:
+                raise ValueError("line-in routes must cover exactly one block")
+        for channel_input, player, fx, block, fx_out, inserts in self.source_views:
+            if block.shape != channel_input.shape or fx_out.shape != channel_input.shape:
+                raise ValueError("source scratch buffers must match the channel block")
+            if len(channel_input) != block_size:
+                raise ValueError("source routes must cover exactly one block")
+        for channel_input, host, gate in (view for stage in self.plugin_views for view in stage):
+            if host.block_size != block_size:
+                raise ValueError(f"plugin {host.name} was started for {host.block_size}-frame blocks")
+        for bus_output, aux in self.aux_buses:
+            if bus_output.shape != aux.out.shape or len(bus_output) != block_size:
+                raise ValueError(f"aux bus {aux.name} does not match the block size")
+
+
+class ConfigSwap:
+    """Publishes ``EngineConfig`` snapshots to the audio thread without locks.
+
+    The audio callback reads ``current`` once at the start of a block and
+    uses that snapshot throughout, then calls ``end_block``. Control threads
+    call ``publish``/``update``, which validate the new snapshot and swap it
+    in with a single reference assignment (atomic in CPython), so the
+    callback never waits and never sees a half-edited configuration.
+
+    Replaced snapshots are not dropped on the spot: the callback might still
+    be inside a block that uses one, and releasing a large kit or chain there
+    would free memory on the audio thread. They are kept until the callback
+    has finished a later block and released by ``reclaim``, which runs on
+    the publishing (control) thread. ``start_reclaimer`` also runs it on a
+    control thread of its own every few milliseconds, so releases do not
+    wait for the next change.
+
+    Args:
+        initial (EngineConfig): First snapshot
+        block_size (int): Block size snapshots are validated against
+    """
+
+    def __init__(self, initial, block_size):
+        initial.validate(block_size)
+        self.current = initial
+        self.block_size = block_size
+        self.blocks = 0
+        self._retired = []
+        self._deferred = []
+        self._writer = threading.Lock()
+        self._reclaimer = None
+
+    def end_block(self):
+        """Called by the audio callback after each block."""
+        self.blocks += 1
+
+    def _swap(self, config):
+        retired = self.current
+        self.current = config
+        # Blocks counted so far may have started before the swap; one more
+        # finished block means none can still hold the old snapshot.
+        self._retired.append((self.blocks + 1, retired))
+        self._reclaim()
+        return config
+
+    def publish(self, config):
+        """Validate ``config`` and make it the one the next block uses."""
+        config.validate(self.block_size)
+        with self._writer:
+            return self._swap(config)
+
+    def update(self, **changes):
+        """Publish the current snapshot with ``changes`` applied.
+
+        Concurrent updates from several control threads are serialised, so
+        none of them is lost.
+        """
+        with self._writer:
+            config = self.current.replace(**changes)
+            config.validate(self.block_size)
+            return self._swap(config)
+
+    def _reclaim(self, force=False):
+        blocks = self.blocks
+        keep = [(after, config) for after, config in self._retired if not force and blocks < after]
+        released = len(self._retired) - len(keep)
+        self._retired = keep
+        due = [release for after, release in self._deferred if force or blocks >= after]
+        self._deferred = [(after, release) for after, release in self._deferred if not force and blocks < after]
+        for release in due:
+            try:
+                release()
+            except Exception as e:
+                logger.error(f"Error releasing a retired resource: {e}")
+        return released
+
+    def defer(self, release):
+        """Call ``release`` once no block can still be using the current snapshot.
+
+        For resources a just-replaced snapshot referred to, such as plugin
+        hosts, that must not be shut down while the callback may be inside
+        a block using them. ``release`` runs on a control thread, during a
+        later ``publish``/``update``/``reclaim`` or reclaimer tick.
+        """
+        with self._writer:
+            self._deferred.append((self.blocks + 1, release))
+            self._reclaim()
+
+    def reclaim(self, force=False):
+        """Release replaced snapshots the callback can no longer be using.
+
+        Args:
+            force (bool): Release all of them; only safe with the stream stopped
+
+        Returns:
+            int: Number of snapshots released
+        """
+        with self._writer:
+            return self._reclaim(force)
+
+    def start_reclaimer(self, interval=0.02):
+        """Call ``reclaim`` on a control thread every ``interval`` seconds.
+
+        Runs until ``stop_reclaimer``; starting it twice keeps the first.
+        """
+        with self._writer:
+            if self._reclaimer is not None:
+                return
+            stop = threading.Event()
+
+            def tick():
+                while not stop.wait(interval):
+                    self.reclaim()
+
+            thread = threading.Thread(target=tick, name="ConfigReclaim", daemon=True)
+            self._reclaimer = (thread, stop)
+            thread.start()
+
+    def stop_reclaimer(self):
+        """Stop the thread ``start_reclaimer`` started and wait for it."""
+        with self._writer:
+            reclaimer, self._reclaimer = self._reclaimer, None
+        if reclaimer is not None:
+            thread, stop = reclaimer
+            stop.set()
+            thread.join()
+
+    @property
+    def pending(self):
+        """Replaced snapshots still waiting to be reclaimed."""
+        return len(self._retired)
+
+    @property
+    def deferred(self):
+        """Releases from ``defer`` that have not run yet."""
+        return len(self._deferred)
@@ -2,7 +2,7 @@ import os
 import json
 
 class AudioMIDISettings:
-    def __init__(self, sample_rate=44100, buffer_size=512, midi_device="default", magenta_studio_path="", db_path="learning_data.db", pattern_save_path="patterns", volume=0.8, pan=0.0, line_in_channel=1, vst3_plugin_path=""):
+    def __init__(self, sample_rate=44100, buffer_size=512, midi_device="default", magenta_studio_path="", db_path="learning_data.db", pattern_save_path="patterns", volume=0.8, pan=0.0, line_in_channel=1, vst3_plugin_path="", audio_backend="pipewire"):
         script_dir = os.path.dirname(os.path.abspath(__file__))
         self.sample_rate = sample_rate
         self.buffer_size = buffer_size
@@ -14,6 +14,7 @@ class AudioMIDISettings:
         self.pan = pan
         self.line_in_channel = line_in_channel
         self.vst3_plugin_path = os.path.join(script_dir, vst3_plugin_path)
+        self.audio_backend = audio_backend
 
     def load_settings(self, settings_dict):
         self.sample_rate = settings_dict.get("sample_rate", self.sample_rate)
@@ -26,6 +27,7 @@ class AudioMIDISettings:
         self.pan = settings_dict.get("pan", self.pan)
         self.line_in_channel = settings_dict.get("line_in_channel", self.line_in_channel)
         self.vst3_plugin_path = settings_dict.get("vst3_plugin_path", self.vst3_plugin_path)
+        self.audio_backend = settings_dict.get("audio_backend", self.audio_backend)
 
     def save_settings(self):
         return {
@@ -38,7 +40,8 @@ class AudioMIDISettings:
             "volume": self.volume,
             "pan": self.pan,
             "line_in_channel": self.line_in_channel,
-            "vst3_plugin_path": self.vst3_plugin_path
+            "vst3_plugin_path": self.vst3_plugin_path,
+            "audio_backend": self.audio_backend
         }
 
     def save_to_json(self, file_path):
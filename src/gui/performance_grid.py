@@ -1,5 +1,6 @@
 import customtkinter as ctk
 import json
+from src.mixer.beat_repeat import REPEAT_DIVISIONS
 
 # Apply custom theme settings
 def apply_custom_theme():
@@ -21,8 +22,9 @@ def apply_custom_theme():
 apply_custom_theme()
 
 class PerformanceGrid(ctk.CTkFrame):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, stutter=None):
         super().__init__(parent)
+        self.stutter = stutter
         self.layout = ctk.CTkFrame(self)
         self.play_button = ctk.CTkButton(self, text="Play")
         self.stop_button = ctk.CTkButton(self, text="Stop")
@@ -31,8 +33,25 @@ class PerformanceGrid(ctk.CTkFrame):
         self.play_button.pack(pady=5)
         self.stop_button.pack(pady=5)
         self.record_button.pack(pady=5)
+
+        # Stutter pads: hold to repeat the last 1/n note, release to let go
+        self.stutter_pads = ctk.CTkFrame(self)
+        self.stutter_pads.pack(pady=5)
+        for division in REPEAT_DIVISIONS:
+            pad = ctk.CTkButton(self.stutter_pads, text=f"1/{division}", width=48)
+            pad.bind("<ButtonPress-1>", lambda event, division=division: self.trigger_stutter(division))
+            pad.bind("<ButtonRelease-1>", lambda event: self.release_stutter())
+            pad.pack(side="left", padx=2)
         self.setLayout(self.layout)
 
         self.play_button.configure(command=self.parent().play)
         self.stop_button.configure(command=self.parent().stop)
         self.record_button.configure(command=self.parent().record)
+
+    def trigger_stutter(self, division):
+        if self.stutter is not None:
+            self.stutter.trigger(division)
+
+    def release_stutter(self):
+        if self.stutter is not None:
+            self.stutter.release()
@@ -14,12 +14,14 @@ from mixer.channel_strip import ChannelStrip
 from src.sampler.midi_mapper import MidiMapper
 from pedalboard import Pedalboard
 from src.audio.engine import AudioEngine
+from src.mixer.fx_rack import FXEngine
 import logging
 import pipewire as pw
 import os
 from src.sampler.sample_control import SampleControl
 from src.utils.learning_manager import SamplerLoader
 from src.utils.state_manager import ProjectManager
+from src.config.settings import AudioMIDISettings
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -32,14 +34,15 @@ class MainWindow(ctk.CTk):
         self.sampler = SamplerEngine()
         self.midi_mapper = MidiMapper()
         self.midi_mapper.start_listening_thread()
-        self._setup_ui()
+        self.settings = AudioMIDISettings()
         try:
-            self.audio_engine = AudioEngine()
+            self.audio_engine = AudioEngine(backend=self.settings.audio_backend, tempo=self.sampler)
             self.audio_thread = Thread(target=self.audio_engine.start)
             self.audio_thread.start()
         except Exception as e:
             logger.error(f"Error initializing AudioEngine: {e}")
             sys.exit(1)
+        self._setup_ui()
         
     def _setup_ui(self):
         self.title("Performinator")
@@ -52,12 +55,21 @@ class MainWindow(ctk.CTk):
         # Mixer
         self.mixer_frame = ctk.CTkFrame(self)
         self.mixer_frame.pack(side="left", fill="y")
+        self.strips = []
         for i in range(8):
-            strip = ChannelStrip(self.mixer_frame, channel_id=i+1)
+            strip = ChannelStrip(self.mixer_frame, channel_id=i+1, engine=self.audio_engine)
             strip.pack(pady=5)
-        
+            self.strips.append(strip)
+
+        # Channel 1's inserts, synced to the sampler tempo; its Stutter is
+        # played from the grid pads and the MIDI pad notes
+        self.channel_fx = FXEngine(channel_id=1, effect_unit=self.strips[0].effect_unit, tempo=self.sampler,
+                                   sample_rate=self.audio_engine.sr)
+        self.audio_engine.set_channel_fx(1, self.channel_fx)
+        self.midi_mapper.map_stutter(self.channel_fx.stutter)
+
         # Performance Grid
-        self.grid = PerformanceGrid(self)
+        self.grid = PerformanceGrid(self, stutter=self.channel_fx.stutter)
         self.grid.pack(side="right", fill="both", expand=True)
         
         # Elektron-style menu
@@ -0,0 +1,228 @@
+import numpy as np
+import logging
+from src.utils.dsp import BiquadBank, rbj_coefficients
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+MAX_BLOCK_FRAMES = 8192
+FEELS = {"straight": 1.0, "dotted": 1.5, "triplet": 2.0 / 3.0}
+
+
+def delay_seconds_for(bpm, division=8, feel="straight"):
+    """Length of a 1/``division`` note (optionally dotted or triplet) at ``bpm``."""
+    return 60.0 / bpm * 4.0 / division * FEELS[feel]
+
+
+class AnalogDelay:
+    """Tempo-synced, tape/BBD-style feedback delay.
+
+    The delay time follows ``tempo.current_bpm`` (or ``bpm``) as a note
+    ``division``. Changes glide exponentially over ``glide_ms``, which bends
+    the pitch of the repeats like a real tape delay instead of clicking, and
+    slow wow plus faster flutter modulate the time continuously. The read
+    position is fractional and linearly interpolated. The feedback path is
+    band-limited (``low_cut_hz`` to ``tone_hz``) and softly saturated, so
+    repeats darken and never run away.
+
+    A block is processed with whole-array operations in as few chunks as
+    the shortest delay in it allows (one chunk whenever the delay is longer
+    than the block); glide, modulation phase, filter state and the ring all
+    carry over between blocks, whatever their size. Buffers are sized on
+    the first block.
+
+    Args:
+        division (int): Note value of the delay, e.g. 8 for 1/8 notes
+        feel (str): "straight", "dotted" or "triplet"
+        bpm (float): Tempo used when no ``tempo`` source is given
+        tempo: Object with a ``current_bpm`` attribute, e.g. ``SamplerEngine``
+        feedback (float): Level of each repeat fed back, 0 to <1
+        mix (float): Wet level; the dry signal gets ``1 - mix``
+        tone_hz (float): Low-pass corner of the feedback path
+        low_cut_hz (float): High-pass corner of the feedback path
+        wow_depth_ms, wow_rate_hz (float): Slow delay-time modulation
+        flutter_depth_ms, flutter_rate_hz (float): Fast delay-time modulation
+        glide_ms (float): Time constant of delay-time changes
+        max_delay_seconds (float): Longest delay the ring holds
+
+    Attributes:
+        latency_samples (int): Always 0
+    """
+
+    latency_samples = 0
+
+    def __init__(self, division=8, feel="straight", bpm=120.0, tempo=None, feedback=0.35, mix=0.5,
+                 tone_hz=3500.0, low_cut_hz=100.0, wow_depth_ms=0.8, wow_rate_hz=0.5,
+                 flutter_depth_ms=0.08, flutter_rate_hz=6.5, glide_ms=150.0, max_delay_seconds=4.0):
+        if feel not in FEELS:
+            raise ValueError(f"feel must be one of {tuple(FEELS)}")
+        self.division = division
+        self.feel = feel
+        self.bpm = bpm
+        self.tempo = tempo
+        self.feedback = feedback
+        self.mix = mix
+        self.tone_hz = tone_hz
+        self.low_cut_hz = low_cut_hz
+        self.wow_depth_ms = wow_depth_ms
+        self.wow_rate_hz = wow_rate_hz
+        self.flutter_depth_ms = flutter_depth_ms
+        self.flutter_rate_hz = flutter_rate_hz
+        self.glide_ms = glide_ms
+        self.max_delay_seconds = max_delay_seconds
+        self.sample_rate = None
+        self._key = None
+        self._filter_key = None
+        self._delay = None
+        self._written = 0
+        self._frames = 0
+        self._phases = np.zeros(2)
+
+    @property
+    def current_bpm(self):
+        return self.tempo.current_bpm if self.tempo is not None else self.bpm
+
+    @property
+    def delay_seconds(self):
+        """Delay time the glide is heading for (also the tail gap between repeats)."""
+        return min(delay_seconds_for(self.current_bpm, self.division, self.feel), self.max_delay_seconds)
+
+    def _prepare(self, frames, channels, sample_rate):
+        if frames > MAX_BLOCK_FRAMES:
+            raise ValueError(f"AnalogDelay takes blocks of up to {MAX_BLOCK_FRAMES} frames")
+        if (channels, sample_rate) != self._key:
+            self.sample_rate = sample_rate
+            self._ring_length = int(self.max_delay_seconds * sample_rate) + MAX_BLOCK_FRAMES + 4
+            self._ring = np.zeros((self._ring_length, channels), dtype=np.float32)
+            self._filter = BiquadBank(channels, 2)
+            self._delay = self.delay_seconds * sample_rate
+            self._written = 0
+            self._frames = 0
+            self._key = (channels, sample_rate)
+        if frames > self._frames:
+            # Scratch grows with the block; shorter blocks use the front of it
+            self._steps = np.arange(1, frames + 1, dtype=np.float64)
+            self._glide = np.zeros(frames)
+            self._position = np.zeros(frames)
+            self._scratch = np.zeros(frames)
+            self._floor = np.zeros(frames)
+            self._index = np.zeros(frames, dtype=np.int64)
+            # Per channel, so the interpolation multiply needs no broadcasting
+            self._weights = np.zeros((frames, channels), dtype=np.float32)
+            self._wet = np.zeros((frames, channels), dtype=np.float32)
+            self._return = np.zeros((frames, channels), dtype=np.float32)
+            self._filter_key = None
+            self._frames = frames
+
+    def _update_filters(self):
+        key = (self.tone_hz, self.low_cut_hz, self.glide_ms)
+        if key == self._filter_key:
+            return
+        self._filter.set_section(0, rbj_coefficients("lowpass", self.tone_hz, self.sample_rate))
+        self._filter.set_section(1, rbj_coefficients("highpass", self.low_cut_hz, self.sample_rate))
+        # g ** n for the closed-form glide of a one-pole smoother
+        g = np.exp(-1000.0 / (max(self.glide_ms, 1e-3) * self.sample_rate))
+        np.power(g, self._steps, out=self._glide)
+        self._filter_key = key
+
+    def reset(self):
+        if self._key is None:
+            return
+        self._ring.fill(0)
+        self._filter.reset()
+        self._phases.fill(0)
+        self._delay = self.delay_seconds * self.sample_rate
+
+    def _delay_times(self, frames):
+        # Delay in samples for every frame of the block: glide towards the
+        # tempo-synced target, then wow and flutter on top
+        sr = self.sample_rate
+        delay = self._position[:frames]
+        target = self.delay_seconds * sr
+        np.multiply(self._glide[:frames], self._delay - target, out=delay)
+        np.add(delay, target, out=delay)
+        self._delay = float(delay[-1])
+        scratch = self._scratch[:frames]
+        for k, (depth_ms, rate) in enumerate(((self.wow_depth_ms, self.wow_rate_hz),
+                                              (self.flutter_depth_ms, self.flutter_rate_hz))):
+            if not depth_ms:
+                continue
+            step = 2 * np.pi * rate / sr
+            np.multiply(self._steps[:frames], step, out=scratch)
+            np.add(scratch, self._phases[k], out=scratch)
+            np.sin(scratch, out=scratch)
+            np.multiply(scratch, depth_ms * sr / 1000.0, out=scratch)
+            np.add(delay, scratch, out=delay)
+            self._phases[k] = (self._phases[k] + frames * step) % (2 * np.pi)
+        np.maximum(delay, 2.0, out=delay)
+        np.minimum(delay, self._ring_length - frames - 2, out=delay)
+        return delay
+
+    def _run_chunk(self, audio, delay, start, stop):
+        frames = stop - start
+        buffers = (self._scratch, self._floor, self._index, self._weights, self._wet, self._return)
+        if frames != len(self._wet):
+            buffers = tuple(buffer[start:stop] for buffer in buffers)
+            audio, delay = audio[start:stop], delay[start:stop]
+        position, floor, index, weights, wet, returned = buffers
+        # Fractional read position behind the write head
+        np.add(self._steps[:frames], self._written - 1, out=position)
+        np.subtract(position, delay, out=position)
+        np.floor(position, out=floor)
+        np.copyto(index, floor, casting="unsafe")
+        np.subtract(position, floor, out=position)
+        np.copyto(weights, position[:, None], casting="same_kind")
+        np.take(self._ring, index, axis=0, out=wet, mode="wrap")
+        np.add(index, 1, out=index)
+        np.take(self._ring, index, axis=0, out=returned, mode="wrap")
+        np.subtract(returned, wet, out=returned)
+        np.multiply(returned, weights, out=returned)
+        np.add(wet, returned, out=wet)
+
+        # Band-limited, softly saturated feedback plus the new input
+        np.copyto(returned, wet)
+        self._filter.process(returned)
+        np.tanh(returned, out=returned)
+        np.multiply(returned, self.feedback, out=returned)
+        np.add(returned, audio, out=returned)
+        head = self._written % self._ring_length
+        first = min(frames, self._ring_length - head)
+        self._ring[head:head + first] = returned[:first]
+        self._ring[:frames - first] = returned[first:]
+        self._written += frames
+
+    def process(self, audio, sample_rate=None, reset=False, out=None, guard=None):
+        """Delay one (frames, channels) float32 block.
+
+        Args:
+            audio (np.ndarray): Input block
+            sample_rate (float): Sample rate in Hz (default: the last one used)
+            reset (bool): Clear the ring and filter state first
+            out (np.ndarray): Output buffer; defaults to ``audio`` (in place)
+            guard (AllocationGuard): Accepted for the insert-chain interface
+
+        Returns:
+            np.ndarray: ``out``, dry and wet mixed by ``mix``
+        """
+        frames, channels = audio.shape
+        self._prepare(frames, channels, sample_rate or self.sample_rate)
+        if reset:
+            self.reset()
+        self._update_filters()
+        delay = self._delay_times(frames)
+        # Every read in a chunk must land on frames written before it, so a
+        # chunk is at most as long as the shortest delay in it. The glide is
+        # monotonic, so the ends of the block bound it up to the modulation.
+        swing = 2 * (self.wow_depth_ms + self.flutter_depth_ms) * self.sample_rate / 1000.0
+        start = 0
+        while start < frames:
+            shortest = min(delay[start], delay[frames - 1]) - swing
+            stop = min(frames, start + max(1, int(shortest) - 1))
+            self._run_chunk(audio, delay, start, stop)
+            start = stop
+        out = audio if out is None else out
+        np.multiply(audio, 1.0 - self.mix, out=out)
+        np.multiply(self._wet[:frames], self.mix, out=self._wet[:frames])
+        np.add(out, self._wet[:frames], out=out)
+        return out
@@ -0,0 +1,98 @@
+from pedalboard import Pedalboard, Chorus, Reverb
+import copy
+import numpy as np
+import logging
+from src.audio.buffers import process_into
+from src.audio.latency import DelayLine, plugin_latency
+from src.audio.silence import SILENCE_THRESHOLD_DB, TailGate, block_peak, effect_gap_seconds
+from src.mixer.analog_delay import AnalogDelay
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def default_aux_buses(tempo=None):
+    """The engine's stock send effects, fully wet (the dry signal stays on the channel).
+
+    Args:
+        tempo: Object with a ``current_bpm`` attribute (e.g. ``SamplerEngine``)
+            the delay follows; 120 BPM without one
+    """
+    return {
+        "reverb": Pedalboard([Reverb(room_size=0.7, damping=0.5, wet_level=1.0, dry_level=0.0)]),
+        "chorus": Pedalboard([Chorus(mix=1.0)]),
+        "delay": AnalogDelay(mix=1.0, tempo=tempo),
+    }
+
+
+class AuxBus:
+    """Shared send/return effect: one instance serves every channel sending to it.
+
+    Channels feed the bus through the mixer's send matrix; the bus runs its
+    chain once per block on the summed sends and returns the result to the
+    master at ``return_level``. Once the sends fall silent and the effect's
+    tail has died away the chain is skipped (see ``TailGate``).
+
+    Args:
+        name (str): Bus name
+        chain: Pedalboard chain or plugin, normally 100% wet
+        sample_rate (int): Engine sample rate
+        block_size (int): Frames per block
+        return_level (float): Gain of the return into the master
+        max_delay (int): Longest return delay plugin delay compensation may set
+        threshold_db (float): Level below which blocks count as silent
+
+    Attributes:
+        return_delay (DelayLine): Aligns the return with slower parallel paths
+        silent (bool): The last block returned nothing
+    """
+
+    def __init__(self, name, chain, sample_rate, block_size, return_level=1.0, max_delay=8192,
+                 threshold_db=SILENCE_THRESHOLD_DB):
+        self.name = name
+        self.chain = chain
+        self.sample_rate = sample_rate
+        self.out = np.zeros((block_size, 2), dtype=np.float32)
+        self.gate = TailGate(sample_rate, threshold_db, effect_gap_seconds(chain), plugin_latency(chain))
+        self.return_delay = DelayLine(max_delay, block_size)
+        self.silent = True
+        # 0-d, so the return multiply does not broadcast (which allocates)
+        self._return = np.array(return_level, dtype=np.float32)
+        self._peak = np.zeros(1, dtype=np.float32)
+
+    @property
+    def latency_samples(self):
+        return plugin_latency(self.chain)
+
+    @property
+    def return_level(self):
+        return float(self._return)
+
+    def with_return_level(self, level):
+        """This bus with another return level, for publishing in a new snapshot.
+
+        The chain, tail gate and return delay are shared, so the effect's
+        state carries over; the snapshot being replaced keeps its own level.
+        """
+        bus = copy.copy(self)
+        bus._return = np.array(level, dtype=np.float32)
+        return bus
+
+    def process(self, sends, guard=None):
+        """Run the chain over this block's summed sends.
+
+        Returns:
+            np.ndarray: The scaled return (``out``), or None when the bus
+            was skipped and contributes nothing
+        """
+        silent = self.gate.is_silent(block_peak(sends, self._peak))
+        if self.gate.should_skip(silent):
+            self.silent = True
+            return None
+        process_into(self.chain, sends, self.sample_rate, self.out, guard)
+        self.silent = self.gate.update(silent, block_peak(self.out, self._peak), len(self.out))
+        if self.return_delay.delay:
+            self.return_delay.process(self.out)
+        np.multiply(self.out, self._return, out=self.out)
+        return self.out
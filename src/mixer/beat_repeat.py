@@ -0,0 +1,215 @@
+import numpy as np
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+REPEAT_DIVISIONS = (4, 8, 16, 32, 64)
+# Pads from C1 upwards: 1/4, 1/8, 1/16, 1/32, 1/64
+NOTE_DIVISIONS = {36 + index: division for index, division in enumerate(REPEAT_DIVISIONS)}
+
+
+def slice_frames(bpm, division, sample_rate):
+    """Length of a 1/``division`` note at ``bpm`` in frames."""
+    return max(1, int(round(sample_rate * 60.0 / bpm * 4.0 / division)))
+
+
+class BeatRepeat:
+    """Tempo-synced beat-repeat (stutter) insert.
+
+    The channel is written continuously into a preallocated ring. A trigger
+    captures the last 1/4 to 1/64 note before the trigger frame and loops it
+    until released; each repetition fades in over ``fade_ms`` from the audio
+    that followed the slice, and a release fades back to the live input, so
+    neither loop points nor switching click. The ring is stored twice end to
+    end, so every slice is read as one contiguous view and nothing is copied
+    or allocated per block.
+
+    Triggers and releases take an absolute frame (``position`` counts frames
+    processed so far) and take effect on exactly that sample; without one
+    they apply at the start of the next block.
+
+    Args:
+        sample_rate (int): Engine sample rate
+        channels (int): Channels processed
+        bpm (float): Tempo used when no ``tempo`` source is given
+        tempo: Object with a ``current_bpm`` attribute, e.g. ``SamplerEngine``
+        min_bpm (float): Slowest tempo the ring must hold a 1/4 note for
+        hold_seconds (float): How long a repeat can hold before the slice is
+            recaptured from fresh input
+        fade_ms (float): Crossfade length at loop points and on release
+        max_block (int): Largest block ``process`` accepts
+
+    Attributes:
+        position (int): Frames processed so far
+        active (bool): A repeat is playing
+        live (bool): Always True: a track freeze leaves it running live
+    """
+
+    live = True
+
+    def __init__(self, sample_rate=48000, channels=2, bpm=120.0, tempo=None, min_bpm=40.0, hold_seconds=8.0,
+                 fade_ms=2.0, max_block=4096):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.bpm = bpm
+        self.tempo = tempo
+        self.latency_samples = 0
+        self.max_slice = slice_frames(min_bpm, REPEAT_DIVISIONS[0], sample_rate)
+        self.hold_frames = int(hold_seconds * sample_rate)
+        self.capacity = self.max_slice + self.hold_frames + 2 * max_block
+        self._ring = np.zeros((2 * self.capacity, channels), dtype=np.float32)
+        self.fade = max(1, int(fade_ms * sample_rate / 1000.0))
+        up = (np.arange(1, self.fade + 1, dtype=np.float32) / self.fade)[:, None]
+        self._fade_in = np.ascontiguousarray(np.broadcast_to(up, (self.fade, channels)))
+        self._fade_out = np.ascontiguousarray(1.0 - self._fade_in)
+        self._repeat = np.zeros((max_block, channels), dtype=np.float32)
+        self._mix = np.zeros((max_block, channels), dtype=np.float32)
+        self.position = 0
+        self.active = False
+        self.division = None
+        self._slice_end = 0
+        self._length = 0
+        self._releasing_from = None
+        self._pending_trigger = None
+        self._pending_release = None
+
+    @property
+    def current_bpm(self):
+        return self.tempo.current_bpm if self.tempo is not None else self.bpm
+
+    def trigger(self, division=16, at=None):
+        """Start repeating the last 1/``division`` note at frame ``at``.
+
+        Called from the MIDI or GUI thread; one reference assignment hands
+        the event to the audio thread.
+        """
+        if division not in REPEAT_DIVISIONS:
+            raise ValueError(f"Repeat division must be one of {REPEAT_DIVISIONS}")
+        length = slice_frames(self.current_bpm, division, self.sample_rate)
+        if length > self.max_slice:
+            raise ValueError(f"1/{division} at {self.current_bpm} BPM is longer than the repeat buffer")
+        self._pending_trigger = (self.position if at is None else at, division, length)
+
+    def release(self, at=None):
+        """Fade back to the live input from frame ``at``."""
+        self._pending_release = self.position if at is None else at
+
+    def next_grid_frame(self, division):
+        """First frame at or after ``position`` on the 1/``division`` grid, for quantised pads."""
+        length = slice_frames(self.current_bpm, division, self.sample_rate)
+        return -(-self.position // length) * length
+
+    def note_on(self, note, velocity=1.0, at=None):
+        """MIDI pads: ``NOTE_DIVISIONS`` notes trigger; velocity 0 releases."""
+        division = NOTE_DIVISIONS.get(note)
+        if division is None:
+            return False
+        if velocity <= 0:
+            self.release(at)
+        else:
+            self.trigger(division, at)
+        return True
+
+    def note_off(self, note, at=None):
+        if note in NOTE_DIVISIONS and self.division == NOTE_DIVISIONS[note]:
+            self.release(at)
+
+    def _view(self, frame, frames):
+        start = frame % self.capacity
+        return self._ring[start:start + frames]
+
+    def _write(self, block):
+        frames = len(block)
+        start = self.position % self.capacity
+        end = start + frames
+        self._ring[start:end] = block
+        # Mirror so that any window up to ``capacity`` long is contiguous
+        if end <= self.capacity:
+            self._ring[start + self.capacity:end + self.capacity] = block
+        else:
+            split = self.capacity - start
+            self._ring[start + self.capacity:] = block[:split]
+            self._ring[:end - self.capacity] = block[split:]
+
+    def _render(self, first, last, out):
+        # Repeat output for absolute frames [first, last) into out
+        length, slice_start = self._length, self._slice_end - self._length
+        done = 0
+        while first + done < last:
+            phase = (first + done - self._slice_end) % length
+            n = min(length - phase, last - first - done)
+            source = self._view(slice_start + phase, n)
+            dest = out[done:done + n]
+            faded = min(max(self.fade - phase, 0), n)
+            if faded:
+                # Fade in from the audio that followed the slice (the live
+                # input on the first pass), so the loop point is seamless
+                follow = self._view(self._slice_end + phase, faded)
+                np.multiply(source[:faded], self._fade_in[phase:phase + faded], out=dest[:faded])
+                np.multiply(follow, self._fade_out[phase:phase + faded], out=self._mix[:faded])
+                np.add(dest[:faded], self._mix[:faded], out=dest[:faded])
+            np.copyto(dest[faded:], source[faded:])
+            done += n
+
+    def _play(self, block, first, last):
+        # Output for [first, last) of the block that starts at self.position
+        if first >= last or not self.active:
+            return
+        offset = first - self.position
+        target = block[offset:offset + last - first]
+        if self._releasing_from is None:
+            self._render(first, last, target)
+            return
+        repeat = self._repeat[:last - first]
+        self._render(first, last, repeat)
+        progress = first - self._releasing_from
+        fading = min(max(self.fade - progress, 0), last - first)
+        if fading:
+            live = target[:fading]
+            np.multiply(live, self._fade_in[progress:progress + fading], out=live)
+            np.multiply(repeat[:fading], self._fade_out[progress:progress + fading], out=repeat[:fading])
+            np.add(live, repeat[:fading], out=live)
+        if progress + fading >= self.fade:
+            self.active = False
+            self._releasing_from = None
+
+    def process(self, audio, sample_rate=None, guard=None):
+        """Process a (frames, channels) float32 block in place.
+
+        Matches the native insert signature, so a ``BeatRepeat`` can sit in
+        a channel's ``InsertChain``.
+        """
+        frames = len(audio)
+        self._write(audio)
+        first, end = self.position, self.position + frames
+        cursor = first
+        # Hold limit: recapture before the slice is overwritten
+        if self.active and self._releasing_from is None and first - self._slice_end > self.hold_frames \
+                and self._pending_trigger is None:
+            length = slice_frames(self.current_bpm, self.division, self.sample_rate)
+            self._pending_trigger = (first, self.division, min(length, self.max_slice))
+        while True:
+            event, kind = end, None
+            trigger, release = self._pending_trigger, self._pending_release
+            if trigger is not None and trigger[0] < event:
+                event, kind = max(trigger[0], cursor), "trigger"
+            if release is not None and release < end and max(release, cursor) < event:
+                event, kind = max(release, cursor), "release"
+            self._play(audio, cursor, event)
+            cursor = event
+            if kind is None:
+                break
+            if kind == "trigger":
+                self._pending_trigger = None
+                _, self.division, self._length = trigger
+                self._slice_end = cursor
+                self.active = True
+                self._releasing_from = None
+            else:
+                self._pending_release = None
+                if self.active and self._releasing_from is None:
+                    self._releasing_from = cursor
+        self.position = end
+        return audio
@@ -1,31 +1,163 @@
 import numpy as np
 
+# Buses every router starts with: name -> level
+DEFAULT_BUSES = {'main': 1.0, 'reverb': 0.3, 'delay': 0.2, 'sidechain': 0.0}
+
+
 class BusRouter:
-    def __init__(self, num_buses=4):
-        self.buses = {
-            'main': {'level': 1.0, 'sources': []},
-            'reverb': {'level': 0.3, 'sources': []},
-            'delay': {'level': 0.2, 'sources': []},
-            'sidechain': {'level': 0.0, 'sources': []}
-        }
+    """Audio buses backed by preallocated accumulators.
+
+    Every bus owns a (block_size, channels) accumulator that sources are added
+    into in place, and an output buffer its level is applied into once per
+    block. All accumulators live in one array so ``clear_buses`` is a single
+    ``fill(0)``. Routed buses are summed into a separate scratch array, so the
+    accumulators only ever hold what was added with ``add_to_bus``. Buses can be added, removed and routed into each other at
+    any time; each change rebuilds the storage off the audio thread and
+    swaps it in whole.
+
+    Args:
+        num_buses (int): Unused; kept so positional callers still work
+        block_size (int): Frames per block
+        channels (int): Channels per frame
+        buses (dict): Initial buses as name -> level (default ``DEFAULT_BUSES``)
+    """
+
+    def __init__(self, num_buses=4, *, block_size=1024, channels=2, buses=None):
+        self.block_size = block_size
+        self.channels = channels
+        self.levels = {}
+        self.routes = {}
+        empty = np.zeros((0, block_size, channels), dtype=np.float32)
+        self._layout = ({}, empty, empty.copy(), empty.copy(), (), ())
+        self._silence = np.zeros((block_size, channels), dtype=np.float32)
+        for name, level in (DEFAULT_BUSES if buses is None else buses).items():
+            self.add_bus(name, level)
         self.tracks = []
         self._setup_multitrack()
-        
+
+    @property
+    def buses(self):
+        """Bus names with their level, accumulator and output buffers."""
+        index, sums, mixes, _, _, _ = self._layout
+        return {name: {'level': self.levels[name], 'sum': sums[i], 'mix': mixes[i]}
+                for name, i in index.items()}
+
+    def _rebuild(self):
+        old_index, old_sums, _, _, _, _ = self._layout
+        names = list(self.levels)
+        sums = np.zeros((len(names), self.block_size, self.channels), dtype=np.float32)
+        for i, name in enumerate(names):
+            if name in old_index:
+                sums[i] = old_sums[old_index[name]]
+        index = {name: i for i, name in enumerate(names)}
+        # Levels as float32 scalars: multiplying by a Python float allocates
+        gains = tuple(np.float32(self.levels[name]) for name in names)
+        order = tuple((index[name], gains[index[name]], index[self.routes[name]] if name in self.routes else None)
+                      for name in self._topological_order())
+        self._layout = (index, sums, np.zeros_like(sums), np.zeros_like(sums), order, gains)
+
+    def _topological_order(self):
+        order = []
+        state = {}
+
+        def visit(name):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Bus routing loops back into '{name}'")
+            state[name] = "visiting"
+            for source, destination in self.routes.items():
+                if destination == name:
+                    visit(source)
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.levels:
+            visit(name)
+        return order
+
+    def add_bus(self, name, level=1.0):
+        self.levels[name] = level
+        self._rebuild()
+
+    def remove_bus(self, name):
+        self.levels.pop(name, None)
+        self.routes.pop(name, None)
+        self.routes = {source: dest for source, dest in self.routes.items() if dest != name}
+        self._rebuild()
+
+    def set_level(self, name, level):
+        if name in self.levels:
+            self.levels[name] = level
+            self._rebuild()
+
+    def route(self, source, destination):
+        """Feed bus ``source``'s output into bus ``destination`` (None unroutes)."""
+        previous = self.routes.get(source)
+        if destination is None:
+            self.routes.pop(source, None)
+        else:
+            if source not in self.levels or destination not in self.levels:
+                raise KeyError(f"Unknown bus '{source if source not in self.levels else destination}'")
+            self.routes[source] = destination
+        try:
+            self._rebuild()
+        except ValueError:
+            if previous is None:
+                self.routes.pop(source, None)
+            else:
+                self.routes[source] = previous
+            raise
+
     def add_to_bus(self, bus_name, audio_data):
-        if bus_name in self.buses:
-            self.buses[bus_name]['sources'].append(audio_data)
-            
-    def mix_bus(self, bus_name):
-        if bus_name not in self.buses:
-            return np.zeros(1024)
-            
-        mixed = np.sum(self.buses[bus_name]['sources'], axis=0)
-        return mixed * self.buses[bus_name]['level']
-    
+        """Add a (frames,) or (frames, channels) block into a bus in place."""
+        index, sums, _, _, _, _ = self._layout
+        i = index.get(bus_name)
+        if i is None:
+            return
+        frames = min(len(audio_data), self.block_size)
+        target = sums[i, :frames]
+        if audio_data.ndim == 1:
+            for channel in range(self.channels):
+                np.add(target[:, channel], audio_data[:frames], out=target[:, channel])
+        else:
+            np.add(target, audio_data[:frames], out=target)
+
+    def process(self):
+        """Apply every bus level once and feed routed buses into their destinations.
+
+        Buses are mixed sources-first, so a bus routed into another arrives
+        before the destination is mixed. Each call starts again from the
+        accumulated sources, so calling it twice gives the same mixes.
+        """
+        _, sums, mixes, totals, order, _ = self._layout
+        np.copyto(totals, sums)
+        for i, level, destination in order:
+            np.multiply(totals[i], level, out=mixes[i])
+            if destination is not None:
+                np.add(totals[destination], mixes[i], out=totals[destination])
+
+    def mix_bus(self, bus_name, out=None):
+        """A bus's accumulated sources with its level applied.
+
+        Returns the bus's own output buffer (or ``out`` when given); unknown
+        buses read as silence.
+        """
+        index, sums, mixes, _, _, gains = self._layout
+        i = index.get(bus_name)
+        if i is None:
+            if out is None:
+                return self._silence
+            out.fill(0)
+            return out
+        if out is None:
+            out = mixes[i]
+        np.multiply(sums[i], gains[i], out=out)
+        return out
+
     def clear_buses(self):
-        for bus in self.buses.values():
-            bus['sources'].clear()
-            
+        self._layout[1].fill(0)
+
     def _setup_multitrack(self):
         for i in range(8):  # Example: 8 tracks
             track = {
@@ -0,0 +1,129 @@
+import numpy as np
+import logging
+from src.utils.dsp import BiquadBank, rbj_coefficients
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+EQ_BANDS = ("low", "mid", "high")
+# Per style: (low shelf Hz, Q), (mid peak Hz, Q), (high shelf Hz, Q)
+EQ_STYLES = {
+    "clean": ((100.0, 0.707), (1000.0, 0.707), (10000.0, 0.707)),
+    "british": ((80.0, 0.9), (1600.0, 1.4), (12000.0, 0.9)),
+    "american": ((120.0, 0.6), (1500.0, 0.9), (8000.0, 0.6)),
+    "vintage": ((60.0, 0.5), (700.0, 0.5), (10000.0, 0.5)),
+}
+_KINDS = ("lowshelf", "peak", "highshelf")
+
+
+class ChannelEQ:
+    """Low shelf / mid peak / high shelf for every mixer channel at once.
+
+    All channels run as one ``BiquadBank`` of three sections over
+    2 x ``num_channels`` rows (left and right of each channel), so a block
+    costs a single kernel call however many channels there are. Setters run
+    on the GUI thread and only recompute the coefficients of the channel
+    that changed; the callback picks the new set up at the start of its next
+    block. While every channel is flat the whole EQ is skipped, and silent
+    channels are left out of the filter pass once their tails have died.
+
+    Args:
+        num_channels (int): Mixer channels
+        sr (float): Sample rate in Hz
+        block_size (int): Frames per block
+        style (str): Initial ``EQ_STYLES`` entry for every channel
+
+    Attributes:
+        gains_db (np.ndarray): (channels, 3) low/mid/high gain in dB
+        styles (list): ``EQ_STYLES`` name per channel
+    """
+
+    def __init__(self, num_channels, sr, block_size, style="clean"):
+        if style not in EQ_STYLES:
+            raise ValueError(f"Unknown EQ style '{style}'")
+        self.num_channels = num_channels
+        self.sr = sr
+        self.gains_db = np.zeros((num_channels, len(EQ_BANDS)))
+        self.styles = [style] * num_channels
+        self.bank = BiquadBank(2 * num_channels, len(EQ_BANDS))
+        # Coefficients are staged here by the setters and copied into the
+        # bank by the callback, which never computes them itself
+        self._staged = self.bank.coeffs.copy()
+        self._dirty = False
+        self._was_active = False
+        self._active = np.zeros(num_channels, dtype=bool)
+        self._block = np.zeros((block_size, 2 * num_channels), dtype=np.float32)
+        # Each channel's left/right pair moves as one 64-bit word, which makes
+        # the (channels, frames, 2) <-> (frames, rows) transpose several times
+        # cheaper than copying single floats
+        self._block_pairs = self._block.view(np.int64)
+        self._inputs = None
+        self._input_pairs = None
+
+    @property
+    def active(self):
+        """True while any channel has a band boosted or cut."""
+        return bool(self._active.any())
+
+    def _update_channel(self, channel):
+        low, mid, high = EQ_STYLES[self.styles[channel]]
+        rows = slice(2 * channel, 2 * channel + 2)
+        for section, (kind, (freq, q), gain_db) in enumerate(zip(_KINDS, (low, mid, high), self.gains_db[channel])):
+            coefficients = rbj_coefficients(kind, freq, self.sr, q=q, gain_db=gain_db)
+            self._staged[section, :, rows] = coefficients[:, None]
+        self._active[channel] = bool(np.any(self.gains_db[channel]))
+        self._dirty = True
+
+    def set_gain(self, channel, band, gain_db):
+        """Set one band of a channel (0-based) in dB; a no-op if unchanged."""
+        index = EQ_BANDS.index(band)
+        if self.gains_db[channel, index] == gain_db:
+            return
+        self.gains_db[channel, index] = gain_db
+        self._update_channel(channel)
+
+    def set_style(self, channel, style):
+        """Switch a channel's band frequencies and widths to an ``EQ_STYLES`` entry."""
+        if style not in EQ_STYLES:
+            raise ValueError(f"Unknown EQ style '{style}'")
+        if self.styles[channel] == style:
+            return
+        self.styles[channel] = style
+        self._update_channel(channel)
+
+    def process(self, inputs, silent=None):
+        """Equalise a C-contiguous (channels, frames, 2) float32 block in place.
+
+        Args:
+            inputs (np.ndarray): The mixer's channel block
+            silent (np.ndarray): Optional (channels,) bool marking channels
+                with silent input, which are not filtered once their filter
+                state has decayed
+
+        Returns:
+            bool: False when every channel is flat and nothing was done
+        """
+        if self._dirty:
+            # Cleared first, so a setter that races this copy is picked up next block
+            self._dirty = False
+            np.copyto(self.bank.coeffs, self._staged)
+        active = self._active.any()
+        if not active:
+            self._was_active = False
+            return False
+        if not self._was_active:
+            self.bank.reset()
+            self._was_active = True
+        if inputs is not self._inputs:
+            # The engine passes the same mixer buffer every block
+            self._input_pairs = inputs.view(np.int64).reshape(inputs.shape[:2]).T
+            self._inputs = inputs
+        frames = inputs.shape[1]
+        np.copyto(self._block_pairs[:frames], self._input_pairs)
+        if silent is None:
+            self.bank.process(self._block[:frames])
+        else:
+            self.bank.process_rows(self._block[:frames], silent)
+        np.copyto(self._input_pairs, self._block_pairs[:frames])
+        return True
@@ -1,23 +1,40 @@
 import customtkinter as ctk
+from tkinter import filedialog
+from src.mixer.channel_eq import EQ_STYLES
+
+METER_POLL_MS = 33  # matches the engine's ~30 Hz meter publish rate
+METER_FLOOR_DB = -60.0
 
 class EffectUnit:
     def __init__(self):
         self.active_fx = {}
+        self.listeners = []
+
+    def subscribe(self, callback):
+        """Call ``callback(channel_id, effect_name, state)`` on every toggle."""
+        self.listeners.append(callback)
+
+    def register(self, channel_id, effect_name, state):
+        """Record an effect's default state unless it has been toggled already."""
+        return self.active_fx.setdefault((channel_id, effect_name), state)
 
     def toggle_effect(self, channel_id, effect_name, state):
         key = (channel_id, effect_name)
         self.active_fx[key] = state
         print(f"[Effects] {effect_name} on Channel {channel_id} set to {'ON' if state else 'OFF'}")
+        for callback in self.listeners:
+            callback(channel_id, effect_name, state)
 
     def is_active(self, channel_id, effect_name):
         return self.active_fx.get((channel_id, effect_name), False)
 
 class ChannelStrip(ctk.CTkFrame):
-    def __init__(self, master, channel_id, *args, **kwargs):
+    def __init__(self, master, channel_id, *args, engine=None, **kwargs):
         super().__init__(master, *args, **kwargs)
         self.channel_id = channel_id
+        self.engine = engine
         self.configure(border_width=2, corner_radius=8)
-        self.effect_unit = EffectUnit()
+        self._effect_unit = EffectUnit()
 
         # Channel Label
         self.label = ctk.CTkLabel(self, text=f"Channel {channel_id}", font=("Arial", 14, "bold"))
@@ -30,16 +47,19 @@ class ChannelStrip(ctk.CTkFrame):
 
         # EQ Section
         self._add_label("EQ - Low / Mid / High")
-        self.eq_low = ctk.CTkSlider(self, from_=-12, to=12)
-        self.eq_mid = ctk.CTkSlider(self, from_=-12, to=12)
-        self.eq_high = ctk.CTkSlider(self, from_=-12, to=12)
+        self.eq_low = ctk.CTkSlider(self, from_=-12, to=12, command=lambda value: self.set_eq("low", value))
+        self.eq_mid = ctk.CTkSlider(self, from_=-12, to=12, command=lambda value: self.set_eq("mid", value))
+        self.eq_high = ctk.CTkSlider(self, from_=-12, to=12, command=lambda value: self.set_eq("high", value))
         self.eq_low.pack()
         self.eq_mid.pack()
         self.eq_high.pack()
+        self.eq_style = ctk.CTkOptionMenu(self, values=list(EQ_STYLES), command=self.set_eq_style)
+        self.eq_style.pack(pady=2)
 
         # Compressor
         self._add_label("Compressor")
-        self.compressor = ctk.CTkSlider(self, from_=0, to=10)
+        self.compressor = ctk.CTkSlider(self, from_=0, to=10, command=self.set_compressor)
+        self.compressor.set(0)  # off, as the engine starts
         self.compressor.pack()
 
         # VST3 Slot (Placeholder)
@@ -55,11 +75,21 @@ class ChannelStrip(ctk.CTkFrame):
         self.saturation.pack()
         self.tape.pack()
 
+        # Stutter: beat-repeat insert, played from the grid pads and MIDI
+        self.stutter_var = ctk.BooleanVar()
+        self.stutter = ctk.CTkCheckBox(self, text="Stutter", variable=self.stutter_var, command=self.toggle_stutter)
+        self.stutter.pack()
+
         # Line-In
         self.line_in_var = ctk.BooleanVar()
         self.line_in = ctk.CTkCheckBox(self, text="Line-In", variable=self.line_in_var, command=self.route_line_in)
         self.line_in.pack()
 
+        # Freeze: render the inserts to disk and play the render
+        self.freeze_var = ctk.BooleanVar()
+        self.freeze = ctk.CTkCheckBox(self, text="Freeze", variable=self.freeze_var, command=self.toggle_freeze)
+        self.freeze.pack()
+
         # Loop Import
         self._add_label("Loop")
         self.loop_button = ctk.CTkButton(self, text="Import Loop")
@@ -74,30 +104,105 @@ class ChannelStrip(ctk.CTkFrame):
         self.pan = ctk.CTkSlider(self, from_=-1, to=1, command=self.set_pan)
         self.pan.pack()
 
+        # Level meter, polled from the engine's published meter snapshot
+        self._add_label("Level")
+        self.meter = ctk.CTkProgressBar(self)
+        self.meter.set(0)
+        self.meter.pack()
+        self.latency_label = ctk.CTkLabel(self, text="PDC: 0 smp")
+        self.latency_label.pack()
+        if self.engine is not None:
+            self.after(METER_POLL_MS, self.update_meter)
+
+    @property
+    def effect_unit(self):
+        """Toggle state of this channel's inserts.
+
+        The ``FXEngine`` the engine runs for the channel owns it; the
+        strip's own unit is only used while the channel has none.
+        """
+        fx = self.engine.channel_fx.get(self.channel_id) if self.engine is not None else None
+        return fx.effect_unit if fx is not None else self._effect_unit
+
+    def update_meter(self):
+        levels = self.engine.get_meters()
+        if levels is not None:
+            peak_db = float(levels["peak_db"][self.channel_id - 1].max())
+            self.meter.set(min(1.0, max(0.0, 1.0 - peak_db / METER_FLOOR_DB)))
+        latency = self.engine.get_channel_latency(self.channel_id)
+        self.latency_label.configure(text=f"PDC: {latency['compensation']} smp")
+        self.after(METER_POLL_MS, self.update_meter)
+
     def _add_label(self, text):
         lbl = ctk.CTkLabel(self, text=text)
         lbl.pack(pady=(8, 2))
 
     def route_line_in(self):
-        # Placeholder for routing external line-in
-        print(f"Routing external line-in to channel {self.channel_id}")
+        if self.engine is None:
+            print(f"Routing external line-in to channel {self.channel_id}")
+        elif self.line_in_var.get():
+            self.engine.route_line_in(self.channel_id)
+        else:
+            self.engine.unroute_line_in(self.channel_id)
+
+    def toggle_freeze(self):
+        if self.engine is None:
+            print(f"Freeze {'on' if self.freeze_var.get() else 'off'} for channel {self.channel_id}")
+        elif self.freeze_var.get():
+            self.engine.freeze_channel(self.channel_id)
+        else:
+            self.engine.unfreeze_channel(self.channel_id)
 
     def load_vst3_plugin(self):
-        # Placeholder for loading VST3 plugin
-        print(f"Loading VST3 plugin for channel {self.channel_id}")
+        # VST3 bundles are directories on Linux
+        path = filedialog.askdirectory(title=f"VST3 plugin for channel {self.channel_id}")
+        if not path:
+            return
+        if self.engine is None:
+            print(f"Loading VST3 plugin {path} for channel {self.channel_id}")
+        else:
+            self.engine.load_vst3_plugin(path, self.channel_id)
 
     def set_volume(self, value):
-        # Placeholder for setting volume
-        print(f"Setting volume for channel {self.channel_id} to {value}")
+        # Slider runs 0-100; the engine parameter store expects 0.0-1.0
+        if self.engine is not None:
+            self.engine.set_volume(self.channel_id, value / 100.0)
+        else:
+            print(f"Setting volume for channel {self.channel_id} to {value}")
 
     def set_pan(self, value):
-        # Placeholder for setting pan
-        print(f"Setting pan for channel {self.channel_id} to {value}")
+        if self.engine is not None:
+            self.engine.set_pan(self.channel_id, value)
+        else:
+            print(f"Setting pan for channel {self.channel_id} to {value}")
+
+    def set_eq(self, band, gain_db):
+        if self.engine is not None:
+            self.engine.set_eq(self.channel_id, band, gain_db)
+        else:
+            print(f"Setting EQ {band} for channel {self.channel_id} to {gain_db:+.1f} dB")
+
+    def set_eq_style(self, style):
+        if self.engine is not None:
+            self.engine.set_eq_style(self.channel_id, style)
+        else:
+            print(f"Setting EQ style for channel {self.channel_id} to {style}")
+
+    def set_compressor(self, amount):
+        if self.engine is not None:
+            self.engine.set_compressor(self.channel_id, amount)
+        else:
+            print(f"Setting compressor for channel {self.channel_id} to {amount:.1f}")
 
     def toggle_saturation(self):
-        state = self.sat_var.get()
-        self.effect_unit.toggle_effect(self.channel_id, "Saturation", state)
+        self._toggle_insert("Saturation", self.sat_var.get())
 
     def toggle_tape(self):
-        state = self.tape_var.get()
-        self.effect_unit.toggle_effect(self.channel_id, "Tape", state)
+        self._toggle_insert("Tape", self.tape_var.get())
+
+    def toggle_stutter(self):
+        self._toggle_insert("Stutter", self.stutter_var.get())
+
+    def _toggle_insert(self, effect_name, state):
+        if self.engine is None or not self.engine.toggle_channel_effect(self.channel_id, effect_name, state):
+            self.effect_unit.toggle_effect(self.channel_id, effect_name, state)
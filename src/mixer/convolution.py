@@ -0,0 +1,257 @@
+import numpy as np
+import logging
+from src.utils.dsp import RealFFT, spectral_mac
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+TAIL_PARTITION_BLOCKS = 8
+
+
+def _as_channels(ir, channels):
+    ir = np.asarray(ir, dtype=np.float64)
+    if ir.ndim == 1:
+        ir = ir[:, None]
+    if ir.shape[1] == 1 and channels > 1:
+        ir = np.repeat(ir, channels, axis=1)
+    if ir.shape[1] != channels:
+        raise ValueError(f"Impulse response has {ir.shape[1]} channels, expected 1 or {channels}")
+    return ir
+
+
+def partition_ir(ir, partition, channels=2):
+    """Split an impulse response into overlap-save filter spectra.
+
+    Args:
+        ir (np.ndarray): (frames,) or (frames, channels) impulse response
+        partition (int): Partition length in frames
+        channels (int): Channels the spectra are laid out for (a mono IR is shared)
+
+    Returns:
+        np.ndarray: (partitions, channels, partition + 1) complex64; partition
+        k holds ``ir[k * partition:(k + 1) * partition]`` zero-padded to
+        ``2 * partition``
+    """
+    ir = _as_channels(ir, channels)
+    count = max(1, -(-len(ir) // partition))
+    padded = np.zeros((count, channels, 2 * partition))
+    for k in range(count):
+        chunk = ir[k * partition:(k + 1) * partition]
+        padded[k, :, :len(chunk)] = chunk.T
+    return np.fft.rfft(padded, axis=-1).astype(np.complex64)
+
+
+class PartitionedConvolver:
+    """Uniformly partitioned overlap-save convolution with a frequency-domain delay line.
+
+    Input arrives ``partition`` frames at a time via ``write``; ``transform``
+    FFTs the newest frame into the delay line, and ``accumulate`` multiplies
+    any range of past spectra with the matching filter partitions. All
+    buffers are preallocated and the transforms write into them (``RealFFT``).
+
+    Args:
+        spectra (np.ndarray): Filter partitions from ``partition_ir`` in
+            reverse (delay-line) order, last partition first; a read-only
+            memory map is used as is
+    """
+
+    def __init__(self, spectra):
+        self._reversed = spectra if spectra.flags.c_contiguous else np.ascontiguousarray(spectra)
+        self.spectra = self._reversed[::-1]
+        self.count, self.channels, bins = spectra.shape
+        self.partition = bins - 1
+        size = 2 * self.partition
+        self.fft = RealFFT(size, self.channels)
+        # Two input buffers used in turn: the new frame of one becomes the
+        # overlap of the other (shifting within one array needs a temporary).
+        self._inputs = (np.zeros((self.channels, size)), np.zeros((self.channels, size)))
+        self.input = self._inputs[0]
+        self.output = np.zeros((self.channels, size))
+        # Every spectrum is written twice so any run of consecutive delay-line
+        # entries is one contiguous slice, whatever the write position.
+        self._fdl = np.zeros((2 * self.count, self.channels, bins), dtype=np.complex64)
+        self._acc = np.zeros((self.channels, bins), dtype=np.complex64)
+        self._spectrum = np.zeros((self.channels, bins), dtype=np.complex128)
+        self._newest = 0
+        # Compile for these layouts (the spectra may be a read-only map) now
+        spectral_mac(self._fdl[:1], self._reversed[:1], self._acc)
+        self._acc.fill(0)
+
+    def reset(self):
+        for buffer in self._inputs:
+            buffer.fill(0)
+        self._fdl.fill(0)
+        self._acc.fill(0)
+
+    def write(self, frames, offset=0):
+        """Copy (frames, channels) input into the newest frame at ``offset``."""
+        start = self.partition + offset
+        np.copyto(self.input[:, start:start + len(frames)], frames.T)
+
+    def transform(self):
+        """Push the completed input frame into the frequency-domain delay line."""
+        self.fft.forward(self.input, self._spectrum)
+        self._newest = (self._newest + 1) % self.count
+        np.copyto(self._fdl[self._newest], self._spectrum)
+        np.copyto(self._fdl[self._newest + self.count], self._spectrum)
+        # Overlap-save: the newest frame becomes the overlap of the next one
+        following = self._inputs[1] if self.input is self._inputs[0] else self._inputs[0]
+        np.copyto(following[:, :self.partition], self.input[:, self.partition:])
+        self.input = following
+
+    def accumulate(self, lo, hi, lag=0):
+        """Add partitions ``lo``..``hi - 1`` to the pending output spectrum.
+
+        With ``lag=1`` partition k is paired with the spectrum that will be
+        k frames old after the next ``transform``, so the long tail of the
+        filter can be summed ahead of time, spread over several blocks.
+        """
+        lo, hi = max(lo, lag), min(hi, self.count)
+        if hi <= lo:
+            return
+        n = hi - lo
+        end = self._newest + self.count - lo + lag + 1
+        spectral_mac(self._fdl[end - n:end], self._reversed[self.count - hi:self.count - lo], self._acc)
+
+    def finish(self):
+        """Inverse-FFT the accumulated spectrum and start the next one.
+
+        Returns:
+            np.ndarray: (channels, partition) output for the newest frame
+        """
+        np.copyto(self._spectrum, self._acc)
+        self._acc.fill(0)
+        self.fft.inverse(self._spectrum, self.output)
+        return self.output[:, self.partition:]
+
+
+class ConvolutionReverb:
+    """Zero-latency convolution reverb for multi-second impulse responses.
+
+    The head of the IR is convolved with partitions of one engine block, so
+    the wet signal starts in the same block as the input. The rest of the IR
+    uses partitions ``tail_partition`` frames long, which need far fewer
+    multiplies per sample; their result is only needed ``tail_partition``
+    frames later, and the products with past input are summed a slice per
+    block so no single block carries the whole tail.
+
+    Drop it into an aux bus (``AudioEngine.set_aux_chain``) as a 100% wet
+    send; it follows the pedalboard ``process`` signature.
+
+    Args:
+        ir (np.ndarray): (frames,) or (frames, channels) IR at ``sample_rate``
+        sample_rate (int): Engine sample rate
+        block_size (int): Frames per block; every block must be this long
+        channels (int): Channels processed
+        tail_partition (int): Tail partition length, a multiple of
+            ``block_size`` (default 8 blocks); 0 convolves the whole IR in
+            block-sized partitions
+        wet_level (float): Level of the reverb
+        dry_level (float): Level of the input passed through
+        spectra (tuple): Precomputed (head, tail) spectra from ``partition``
+            (e.g. memory-mapped from an ``IRCache``), used instead of
+            transforming ``ir``, which may then be None
+
+    Attributes:
+        latency_samples (int): Always 0
+        tail_gap_seconds (float): IR length; the output can stay quiet that long
+    """
+
+    latency_samples = 0
+
+    def __init__(self, ir, sample_rate, block_size, channels=2, tail_partition=None, wet_level=1.0,
+                 dry_level=0.0, spectra=None):
+        if tail_partition is None:
+            tail_partition = TAIL_PARTITION_BLOCKS * block_size
+        if tail_partition and tail_partition % block_size:
+            raise ValueError("tail_partition must be a multiple of block_size")
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.channels = channels
+        self.wet_level = wet_level
+        self.dry_level = dry_level
+        if spectra is None:
+            spectra = self.partition(ir, block_size, channels, tail_partition)
+        head, tail = spectra
+        if ir is not None:
+            self.length = len(ir)
+        else:
+            self.length = len(head) * block_size + (0 if tail is None else len(tail) * tail_partition)
+        self.tail_gap_seconds = self.length / sample_rate
+        self.head = PartitionedConvolver(head)
+        self.tail = PartitionedConvolver(tail) if tail is not None else None
+        self._blocks_per_tail = tail_partition // block_size if tail is not None else 0
+        # Tail output laid out block by block so each block reads one contiguous slab
+        self._tail_output = np.zeros((max(self._blocks_per_tail, 1), channels, block_size))
+        self._phase = 0
+        self.out = np.zeros((block_size, channels), dtype=np.float32)
+        self._wet = np.zeros((channels, block_size))
+        self._dry = np.zeros((block_size, channels), dtype=np.float32)
+
+    @staticmethod
+    def partition(ir, block_size, channels=2, tail_partition=None):
+        """The (head, tail) spectra ``ConvolutionReverb`` convolves with.
+
+        Each is laid out last partition first, the order the delay line
+        multiplies them in; ``tail`` is None when the IR fits in the head.
+
+        Args:
+            tail_partition (int): As for the constructor; 0 means uniform
+                block-sized partitions throughout
+        """
+        if tail_partition is None:
+            tail_partition = TAIL_PARTITION_BLOCKS * block_size
+        ir = _as_channels(ir, channels)
+        if not tail_partition or len(ir) <= tail_partition:
+            return partition_ir(ir, block_size, channels)[::-1].copy(), None
+        head = partition_ir(ir[:tail_partition], block_size, channels)
+        tail = partition_ir(ir[tail_partition:], tail_partition, channels)
+        return head[::-1].copy(), tail[::-1].copy()
+
+    def reset(self):
+        self.head.reset()
+        if self.tail is not None:
+            self.tail.reset()
+        self._tail_output.fill(0)
+        self._phase = 0
+
+    def process(self, audio, sample_rate=None, reset=False, out=None):
+        """Convolve one (block_size, channels) block.
+
+        Returns:
+            np.ndarray: Wet/dry mix, ``out`` or an internal buffer reused
+            every block
+        """
+        if reset:
+            self.reset()
+        if len(audio) != self.block_size:
+            raise ValueError(f"ConvolutionReverb expects {self.block_size}-frame blocks, got {len(audio)}")
+        out = self.out if out is None else out
+        head = self.head
+        head.write(audio)
+        head.transform()
+        head.accumulate(0, head.count)
+        np.copyto(self._wet, head.finish())
+
+        tail = self.tail
+        if tail is not None:
+            phase, blocks = self._phase, self._blocks_per_tail
+            np.add(self._wet, self._tail_output[phase], out=self._wet)
+            tail.write(audio, phase * self.block_size)
+            # Partitions 1.. only use input already transformed: sum a share now
+            share = -(-(tail.count - 1) // blocks)
+            tail.accumulate(1 + phase * share, 1 + (phase + 1) * share, lag=1)
+            if phase == blocks - 1:
+                tail.transform()
+                tail.accumulate(0, 1)
+                np.copyto(self._tail_output.transpose(1, 0, 2),
+                          tail.finish().reshape(self.channels, blocks, self.block_size))
+            self._phase = (phase + 1) % blocks
+
+        np.multiply(self._wet, self.wet_level, out=self._wet)
+        np.copyto(out.T, self._wet, casting="same_kind")
+        if self.dry_level:
+            np.multiply(audio, self.dry_level, out=self._dry, casting="same_kind")
+            np.add(out, self._dry, out=out)
+        return out
@@ -0,0 +1,228 @@
+import numpy as np
+import logging
+from src.audio.latency import DelayLine
+from src.utils.dsp import EnvelopeFollower, LookaheadGain, TruePeakDetector, compress
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+FLOOR_DB = -120.0
+_DB_TO_LN = float(np.log(10.0)) / 20.0
+
+
+def amount_settings(amount):
+    """Compressor settings for the channel strip's single 0-10 knob.
+
+    0 is off; 10 is a -24 dB threshold at 6:1. Makeup gain restores half
+    of the reduction a full-scale signal would get.
+
+    Returns:
+        dict: ``threshold_db``, ``ratio`` and ``makeup_db``
+    """
+    amount = min(max(float(amount), 0.0), 10.0)
+    threshold_db = -2.4 * amount
+    ratio = 1.0 + 0.5 * amount
+    makeup_db = 0.5 * (1.0 - 1.0 / ratio) * -threshold_db
+    return {"threshold_db": threshold_db, "ratio": ratio, "makeup_db": makeup_db}
+
+
+class ChannelCompressor:
+    """A soft-knee compressor on every mixer channel, all in one pass.
+
+    Each channel's stereo-linked peak level is taken in dB, smoothed by one
+    ``EnvelopeFollower`` over all channels (attack/release in the log
+    domain, state carried between blocks) and fed to a soft-knee gain
+    computer, in one kernel call for the whole mixer block. Settings are
+    per channel and can change between blocks. Channels that do not
+    compress are skipped, and so are silent ones once their gain reduction
+    has fully released, so a block costs in proportion to the channels
+    actually compressing.
+
+    Args:
+        num_channels (int): Mixer channels
+        sr (float): Sample rate in Hz
+        block_size (int): Frames per block
+
+    Attributes:
+        threshold_db, ratio, knee_db, makeup_db (np.ndarray): (channels,) settings
+        gain_reduction_db (np.ndarray): (channels,) reduction at the end of the last block
+    """
+
+    def __init__(self, num_channels, sr, block_size):
+        self.num_channels = num_channels
+        self.sr = sr
+        self.threshold_db = np.zeros(num_channels, dtype=np.float32)
+        self.ratio = np.ones(num_channels, dtype=np.float32)
+        self.knee_db = np.full(num_channels, 6.0, dtype=np.float32)
+        self.makeup_db = np.zeros(num_channels, dtype=np.float32)
+        self.gain_reduction_db = np.zeros(num_channels, dtype=np.float32)
+        self.follower = EnvelopeFollower(num_channels, sr, 10.0, 120.0, FLOOR_DB)
+        # Per channel: slope, knee start, knee width, knee scale, makeup (see dsp.compress)
+        self._settings = np.zeros((5, num_channels), dtype=np.float32)
+        self._active = np.zeros(num_channels, dtype=bool)
+        self._live = np.zeros(num_channels, dtype=bool)
+        self._was_active = False
+        for channel in range(num_channels):
+            self._update_channel(channel)
+        # Compile the kernel before the first audio block.
+        compress(np.zeros((num_channels, 1, 2), dtype=np.float32), self._live, self.follower, self._settings,
+                 self.gain_reduction_db)
+
+    @property
+    def active(self):
+        """True while any channel has a ratio above 1:1 or makeup gain."""
+        return bool(self._active.any())
+
+    def _update_channel(self, channel):
+        knee = max(float(self.knee_db[channel]), 1e-3)
+        slope = 1.0 - 1.0 / max(float(self.ratio[channel]), 1.0)
+        self._settings[:, channel] = (slope, self.threshold_db[channel] - knee / 2.0, knee, 1.0 / (2.0 * knee),
+                                      self.makeup_db[channel])
+        self._active[channel] = bool(slope > 0.0 or self.makeup_db[channel] != 0.0)
+        if not self._active[channel]:
+            self.gain_reduction_db[channel] = 0.0
+
+    def set_channel(self, channel, threshold_db=None, ratio=None, knee_db=None, attack_ms=None,
+                    release_ms=None, makeup_db=None):
+        """Change any of a channel's (0-based) settings; the rest are kept."""
+        for values, value in ((self.threshold_db, threshold_db), (self.ratio, ratio),
+                              (self.knee_db, knee_db), (self.makeup_db, makeup_db)):
+            if value is not None:
+                values[channel] = value
+        if attack_ms is not None or release_ms is not None:
+            attack_ms = attack_ms if attack_ms is not None else self.attack_ms(channel)
+            release_ms = release_ms if release_ms is not None else self.release_ms(channel)
+            self.follower.set_times(attack_ms, release_ms, rows=channel)
+        self._update_channel(channel)
+
+    def set_amount(self, channel, amount):
+        """Drive a channel from the strip's 0-10 knob (see ``amount_settings``)."""
+        self.set_channel(channel, **amount_settings(amount))
+
+    def attack_ms(self, channel):
+        return -1000.0 / (self.sr * np.log(self.follower.attack[channel]))
+
+    def release_ms(self, channel):
+        return 20000.0 * np.log10(np.e) / (self.follower.release[channel] * self.sr)
+
+    def process(self, inputs, silent=None):
+        """Compress a C-contiguous (channels, frames, 2) float32 block in place.
+
+        Args:
+            inputs (np.ndarray): The mixer's channel block
+            silent (np.ndarray): Optional (channels,) bool marking channels
+                with silent input; those with no gain reduction left are
+                skipped (their gain would only be makeup applied to silence)
+
+        Returns:
+            bool: False when no channel needed compressing and nothing was done
+        """
+        if not self._active.any():
+            self._was_active = False
+            self.gain_reduction_db.fill(0)
+            return False
+        if not self._was_active:
+            self.follower.reset()
+            self._was_active = True
+        live = self._live
+        if silent is None:
+            np.copyto(live, self._active)
+        else:
+            np.less_equal(self.gain_reduction_db, 0.0, out=live)
+            np.logical_and(live, silent, out=live)
+            np.logical_not(live, out=live)
+            np.logical_and(live, self._active, out=live)
+            if not np.count_nonzero(live):
+                return False
+        compress(inputs, live, self.follower, self._settings, self.gain_reduction_db)
+        return True
+
+
+class BrickwallLimiter:
+    """Lookahead true-peak limiter for the master bus.
+
+    A 4x oversampled true-peak detector gives each sample the gain it needs
+    to stay under ``ceiling_db``; ``LookaheadGain`` turns that into a smooth
+    gain (in dB) that is already down when the peak arrives, because the
+    audio is delayed by ``latency_samples``. A final clamp at the ceiling
+    catches rounding, so the output sample peak never exceeds it. Channels
+    are linked, so the stereo image does not shift. State carries over from
+    block to block.
+
+    Args:
+        sr (float): Sample rate in Hz
+        block_size (int): Frames per block
+        channels (int): Columns of the processed block
+        ceiling_db (float): Output ceiling in dBTP
+        lookahead_ms (float): Attack / lookahead time
+        release_ms (float): Release time constant
+
+    Attributes:
+        gain_reduction_db (float): Reduction at the end of the last block
+    """
+
+    def __init__(self, sr, block_size, channels=2, ceiling_db=-1.0, lookahead_ms=5.0, release_ms=80.0):
+        self.sr = sr
+        self.block_size = block_size
+        self.channels = channels
+        self.lookahead_ms = lookahead_ms
+        self.release_ms = release_ms
+        self.gain_reduction_db = 0.0
+        self.detector = TruePeakDetector(channels, block_size)
+        self.gain = LookaheadGain(1, max(1, int(round(lookahead_ms * sr / 1000.0))), sr, release_ms, block_size)
+        self._delay = DelayLine(self.latency_samples, block_size, channels)
+        self._delay.set_delay(self.latency_samples)
+        self._peaks = np.zeros((block_size, channels), dtype=np.float32)
+        self._level = np.zeros((block_size, 1), dtype=np.float32)
+        self._expanded = np.zeros((block_size, channels), dtype=np.float32)
+        self.set_ceiling(ceiling_db)
+
+    @property
+    def latency_samples(self):
+        """Delay of the output: the lookahead plus the true-peak detector's delay."""
+        return self.gain.window - 1 + self.detector.delay
+
+    def set_ceiling(self, ceiling_db):
+        self.ceiling_db = float(ceiling_db)
+        self._ceiling = np.float32(10.0 ** (self.ceiling_db / 20.0))
+
+    def set_release(self, release_ms):
+        self.release_ms = release_ms
+        self.gain.set_release(release_ms)
+
+    def reset(self):
+        self.detector.reset()
+        self.gain.reset()
+        self._delay.reset()
+        self.gain_reduction_db = 0.0
+
+    def process(self, block):
+        """Limit a C-contiguous (block_size, channels) float32 block in place and return it."""
+        frames = block.shape[0]
+        peaks = self._peaks[:frames]
+        level = self._level[:frames]
+        expanded = self._expanded[:frames]
+        self.detector.process_frames(block, peaks)
+        np.copyto(level[:, 0], peaks[:, 0])
+        for channel in range(1, self.channels):
+            np.maximum(level[:, 0], peaks[:, channel], out=level[:, 0])
+
+        # Gain each frame needs to stay under the ceiling, in dB (<= 0)
+        np.maximum(level, 10.0 ** (FLOOR_DB / 20.0), out=level)
+        np.log10(level, out=level)
+        np.multiply(level, -20.0, out=level)
+        np.add(level, self.ceiling_db, out=level)
+        np.minimum(level, 0.0, out=level)
+        self.gain.process(level)
+        self.gain_reduction_db = -float(level[-1, 0]) if frames else 0.0
+        np.multiply(level, _DB_TO_LN, out=level)
+        np.exp(level, out=level)
+
+        self._delay.process(block)
+        for channel in range(self.channels):
+            np.copyto(expanded[:, channel], level[:, 0])
+        np.multiply(block, expanded, out=block)
+        np.minimum(block, self._ceiling, out=block)
+        np.maximum(block, -self._ceiling, out=block)
+        return block
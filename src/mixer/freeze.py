@@ -0,0 +1,218 @@
+import os
+import copy
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
+import logging
+from src.audio.latency import plugin_latency
+from src.mixer.insert_chain import compile_chain, run_stage
+from src.mixer.saturation import OversampledInsert
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+FREEZE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "tuxtrax", "freeze")
+_SCALAR_TYPES = (bool, int, float, str)
+
+
+def plugin_parameters(plugin):
+    """Public scalar parameters of a plugin (pedalboard exposes them as properties)."""
+    parameters = {}
+    for name in dir(plugin):
+        if name.startswith("_") or name in ("is_effect", "is_instrument"):
+            continue
+        try:
+            value = getattr(plugin, name)
+        except Exception:
+            continue
+        if isinstance(value, _SCALAR_TYPES):
+            parameters[name] = value
+    return parameters
+
+
+def clone_plugin(plugin):
+    """Independent copy of a plugin with the same parameters.
+
+    Pedalboard plugins cannot be pickled, so they are rebuilt from their
+    parameters; our own processors are deep-copied.
+    """
+    if isinstance(plugin, OversampledInsert):
+        return OversampledInsert(clone_plugin(plugin.processor), plugin.factor, plugin.name, plugin.enabled)
+    if type(plugin).__module__.startswith("pedalboard"):
+        clone = type(plugin)()
+        for name, value in plugin_parameters(plugin).items():
+            setattr(clone, name, value)
+        return clone
+    return copy.deepcopy(plugin)
+
+
+def _state(plugin):
+    if isinstance(plugin, OversampledInsert):
+        return ("oversampled", plugin.name, plugin.enabled, plugin.factor, _state(plugin.processor))
+    return (type(plugin).__name__, tuple(sorted(plugin_parameters(plugin).items())))
+
+
+def frozen_plugins(fx):
+    """Enabled inserts of an ``FXEngine`` that a freeze prints.
+
+    Performance effects that only follow live triggers (marked ``live``,
+    such as the Stutter) keep running on the frozen track instead.
+    """
+    return [plugin for plugin in fx.chain.active_plugins() if not getattr(plugin, "live", False)]
+
+
+def insert_signature(fx):
+    """Hashable snapshot of every frozen insert's parameters in an ``FXEngine``."""
+    return tuple(_state(plugin) for plugin in frozen_plugins(fx))
+
+
+def source_digest(source, sample_rate):
+    """Content hash of a channel source."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{source.shape}:{source.dtype}:{sample_rate}".encode())
+    digest.update(np.ascontiguousarray(source).tobytes())
+    return digest.hexdigest()
+
+
+def freeze_key(digest, fx):
+    """Cache key for a source rendered through ``fx``'s inserts."""
+    return hashlib.blake2b(f"{digest}:{insert_signature(fx)!r}".encode(), digest_size=16).hexdigest()
+
+
+class ClipPlayer:
+    """Plays a preloaded (frames, 2) float32 clip block by block.
+
+    The clip may be a memory-mapped cache file; ``render`` only copies the
+    frames of the current block.
+    """
+
+    def __init__(self, audio, loop=True):
+        self.audio = audio
+        self.loop = loop
+        self.position = 0
+
+    def seek(self, position):
+        self.position = position % len(self.audio) if self.loop else min(position, len(self.audio))
+
+    def render(self, out):
+        """Copy the next ``len(out)`` frames into ``out``."""
+        frames = len(out)
+        length = len(self.audio)
+        written = 0
+        while written < frames:
+            if self.position >= length:
+                if not self.loop:
+                    out[written:].fill(0)
+                    return out
+                self.position = 0
+            count = min(frames - written, length - self.position)
+            np.copyto(out[written:written + count], self.audio[self.position:self.position + count])
+            self.position += count
+            written += count
+        return out
+
+
+class FrozenTrack:
+    """A channel's source rendered through its inserts and cached on disk.
+
+    Attributes:
+        key (str): ``freeze_key`` the render was made for
+        path (str): Cached float32 ``.npy`` file
+        audio (np.ndarray): The render, memory-mapped read-only
+    """
+
+    def __init__(self, key, path):
+        self.key = key
+        self.path = path
+        self.audio = np.load(path, mmap_mode="r")
+
+
+class TrackFreezer:
+    """Renders channel sources through their insert chains on a background worker.
+
+    Renders run block by block as fast as the CPU allows, on copies of the
+    plugins so the live chain is not disturbed. Results are cached as
+    float32 ``.npy`` files named after their ``freeze_key``, so freezing the
+    same source with the same settings again is instant.
+
+    Args:
+        sample_rate (int): Sample rate of the sources
+        block_size (int): Frames per render block
+        cache_dir (str): Directory for the cache files
+    """
+
+    def __init__(self, sample_rate, block_size=1024, cache_dir=None):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.cache_dir = cache_dir or FREEZE_CACHE_DIR
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="TrackFreeze")
+        self._lock = threading.Lock()
+
+    def cache_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def freeze(self, source, fx, digest=None):
+        """Start freezing ``source`` through ``fx``'s inserts.
+
+        The key is taken from the settings at the time of the call.
+
+        Returns:
+            Future: Resolves to a ``FrozenTrack``
+        """
+        digest = digest or source_digest(source, self.sample_rate)
+        key = freeze_key(digest, fx)
+        path = self.cache_path(key)
+        if os.path.exists(path):
+            future = Future()
+            future.set_result(FrozenTrack(key, path))
+            return future
+        plugins = [clone_plugin(plugin) for plugin in frozen_plugins(fx)]
+        return self._executor.submit(self._render, source, plugins, key, path)
+
+    def _render(self, source, plugins, key, path):
+        audio = np.ascontiguousarray(source, dtype=np.float32)
+        if audio.ndim == 1:
+            audio = np.repeat(audio[:, None], 2, axis=1)
+        latency = sum(plugin_latency(plugin) for plugin in plugins)
+        stages = compile_chain(plugins)
+        length = len(audio)
+        block_size = self.block_size
+        block = np.zeros((block_size, audio.shape[1]), dtype=np.float32)
+        processed = np.zeros_like(block)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        partial = f"{path}.{threading.get_ident()}.partial"
+        rendered = np.lib.format.open_memmap(partial, mode="w+", dtype=np.float32, shape=audio.shape)
+        # Run the source plus the chain latency, then drop the first
+        # ``latency`` frames so the render lines up with the dry source.
+        for start in range(0, length + latency, block_size):
+            block.fill(0)
+            chunk = audio[start:start + block_size]
+            block[:len(chunk)] = chunk
+            np.copyto(processed, block)
+            for stage, _ in stages:
+                run_stage(stage, processed, self.sample_rate)
+            out_start = start - latency
+            lo = max(out_start, 0)
+            hi = min(out_start + block_size, length)
+            if hi > lo:
+                rendered[lo:hi] = processed[lo - out_start:hi - out_start]
+        rendered.flush()
+        del rendered
+        os.replace(partial, path)
+        logger.info(f"Frozen track rendered to {path}")
+        return FrozenTrack(key, path)
+
+    def clear_cache(self):
+        """Delete every cached render."""
+        with self._lock:
+            if not os.path.isdir(self.cache_dir):
+                return
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".npy"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -1,40 +1,279 @@
-from pedalboard import Pedalboard, Compressor, Reverb, Gain, Chorus, Delay, Distortion
+from pedalboard import Pedalboard, Compressor, Reverb, Gain, Chorus, Distortion
+import numpy as np
 import logging
 from src.mixer.channel_strip import EffectUnit
+from src.mixer.analog_delay import AnalogDelay
+from src.mixer.beat_repeat import BeatRepeat
+from src.mixer.insert_chain import InsertChain, compile_chain, run_stage
+from src.audio.latency import DelayLine, plugin_latency
+from src.audio.silence import SILENCE_THRESHOLD_DB, TailGate, block_peak, effect_gap_seconds
+from src.mixer.saturation import OversampledInsert, TapeSaturator, TubeSaturator
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(asctime)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+# Toggle name of the beat-repeat insert at the end of every chain
+STUTTER = "Stutter"
+
+
+def _unique_names(effects):
+    # Toggles are keyed by name, so a second Gain becomes "Gain 2"
+    named, taken = [], set()
+    for name, plugin in effects:
+        unique, count = name, 1
+        while unique in taken:
+            count += 1
+            unique = f"{name} {count}"
+        taken.add(unique)
+        named.append((unique, plugin))
+    return named
+
+
 class FXEngine:
-    def __init__(self):
+    """Insert chain, non-linear stages and send effects for one signal path.
+
+    Which inserts run is decided by ``effect_unit`` for ``channel_id``
+    (Compressor, Gain, Saturation, Tape, Distortion, Stutter). The enabled
+    ones are compiled into a minimal chain (see ``InsertChain``) whenever a
+    toggle changes, so switched-off effects cost nothing.
+
+    The Stutter (a ``BeatRepeat``, off by default) ends the chain; pads and
+    MIDI notes drive it through ``stutter``. It keeps running on a frozen
+    track.
+
+    Args:
+        send_level (float): Level of the send effects mixed onto the inserts
+        oversampling (int): Oversampling factor for the non-linear stages
+        silence_threshold_db (float): Level below which blocks count as silent
+        sends (bool): Give this unit its own send effects. Off by default:
+            mixer channels share the engine's aux buses, and a reverb,
+            chorus and delay per channel would multiply their cost
+        channel_id (int): Channel whose toggles this unit follows
+        tempo: Object with a ``current_bpm`` attribute (e.g. ``SamplerEngine``)
+            the send delay and the Stutter sync to
+        effect_unit (EffectUnit): Toggle state, shareable between channels
+        sample_rate (int): Rate the Stutter sizes its repeats for
+
+    Attributes:
+        output_silent (bool): Silence flag of the last processed block
+        chain (InsertChain): Compiled inserts and non-linear stages
+        stutter (BeatRepeat): The Stutter insert, for ``trigger``/``note_on``
+    """
+
+    def __init__(self, send_level=0.3, oversampling=4, silence_threshold_db=SILENCE_THRESHOLD_DB, sends=False,
+                 channel_id=1, effect_unit=None, tempo=None, sample_rate=48000):
+        self.channel_id = channel_id
+        self.chain = None
+        self.send_level = send_level
+        self.silence_threshold_db = silence_threshold_db
+        self.output_silent = False
+        self._insert_out = None
+        self._send_out = None
+        self._dry_delay = None
+        self._gate = None
+        self._peak = np.zeros(1, dtype=np.float32)
         try:
             self.inserts = Pedalboard([
-                Compressor(threshold=-20, ratio=4),
-                Gain(gain_db=6),
-                Distortion(drive_db=20)
+                Compressor(threshold_db=-20, ratio=4),
+                Gain(gain_db=6)
             ])
-            
-            self.sends = Pedalboard([
+            # Non-linear stages alias at the base rate, so they run oversampled
+            # after the linear inserts. Saturation and Tape follow the channel
+            # strip switches.
+            self.stutter = BeatRepeat(sample_rate, tempo=tempo)
+            self.nonlinear = [
+                OversampledInsert(TubeSaturator(), oversampling, name="Saturation", enabled=False),
+                OversampledInsert(TapeSaturator(), oversampling, name="Tape", enabled=False),
+                OversampledInsert(Distortion(drive_db=20), oversampling, name="Distortion"),
+            ]
+
+            self.sends = [
                 Reverb(room_size=0.7, damping=0.5),
                 Chorus(),
-                Delay()
-            ])
-            self.effect_unit = EffectUnit()
+                AnalogDelay(tempo=tempo),
+            ] if sends else []
+            self.effect_unit = effect_unit or EffectUnit()
+            self.effect_unit.subscribe(self._on_toggle)
+            self._rebuild_chain()
         except Exception as e:
             logger.error(f"Error initializing FXEngine: {e}")
             raise
 
-    def process_audio(self, audio, sample_rate):
+    @property
+    def inserts(self):
+        return self._inserts
+
+    @inserts.setter
+    def inserts(self, board):
+        self._inserts = board
+        self._rebuild_chain()
+
+    @property
+    def sends(self):
+        return self._sends
+
+    @sends.setter
+    def sends(self, plugins):
+        # Serial send chain; pedalboard plugins next to each other share one stage
+        self._sends = list(plugins)
+        self._send_stages = compile_chain(self._sends)
+        self._dry_delay = None
+        self._gate = None
+
+    @property
+    def nonlinear(self):
+        return self._nonlinear
+
+    @nonlinear.setter
+    def nonlinear(self, stages):
+        self._nonlinear = stages
+        self._rebuild_chain()
+
+    def _rebuild_chain(self):
+        if not hasattr(self, "_nonlinear") or not hasattr(self, "effect_unit"):
+            return  # still constructing
+        effects = [(type(plugin).__name__, plugin) for plugin in self._inserts]
+        effects = _unique_names(effects + [(stage.name, stage) for stage in self._nonlinear])
+        effects.append((STUTTER, self.stutter))
+        for name, plugin in effects:
+            default = getattr(plugin, "enabled", plugin is not self.stutter)
+            state = self.effect_unit.register(self.channel_id, name, default)
+            if isinstance(plugin, OversampledInsert):
+                plugin.enabled = state
+        self.chain = InsertChain(effects)
+        self.chain.set_enabled(self._enabled_names(), fade=False)
+
+    def _enabled_names(self):
+        return [name for name, _ in self.chain.effects if self.effect_unit.is_active(self.channel_id, name)]
+
+    def _on_toggle(self, channel_id, effect_name, state):
+        if channel_id != self.channel_id or self.chain is None:
+            return
+        for name, plugin in self.chain.effects:
+            if name == effect_name and isinstance(plugin, OversampledInsert):
+                plugin.enabled = state
+        self.chain.set_enabled(self._enabled_names())
+
+    @property
+    def insert_latency_samples(self):
+        """Latency of the enabled inserts and non-linear stages alone."""
+        return self.chain.latency_samples
+
+    @property
+    def latency_samples(self):
+        """Latency of the whole unit: inserts plus the (compensated) send path."""
+        return self.insert_latency_samples + plugin_latency(self.sends)
+
+    @property
+    def bypassed(self):
+        """True while the tail gate is skipping the chain."""
+        return self._gate is not None and self._gate.bypassed
+
+    def update_latency(self):
+        """Re-read plugin latencies and tails; call after changing the chains."""
+        self._dry_delay = None
+        self._gate = None
+
+    def _tail_gate(self, sample_rate):
+        if self._gate is None or self._gate.sample_rate != sample_rate:
+            gap = effect_gap_seconds(self.inserts) + effect_gap_seconds(self.sends)
+            self._gate = TailGate(sample_rate, self.silence_threshold_db, gap, self.latency_samples)
+        return self._gate
+
+    def _scratch(self, shape, dtype):
+        # Sized on the first block and whenever the block shape changes,
+        # reused for every block after that.
+        if self._insert_out is None or self._insert_out.shape != shape or self._insert_out.dtype != dtype:
+            self._insert_out = np.zeros(shape, dtype=dtype)
+            self._send_out = np.zeros(shape, dtype=dtype)
+            self._dry_delay = None
+        if self._dry_delay is None:
+            # Delay the dry path by the send chain's latency so dry and wet
+            # stay aligned when they are summed.
+            send_latency = plugin_latency(self.sends)
+            channels = shape[1] if len(shape) > 1 else 1
+            self._dry_delay = DelayLine(send_latency, shape[0], channels, dtype)
+            self._dry_delay.set_delay(send_latency)
+        return self._insert_out, self._send_out
+
+    def process_block(self, audio, sample_rate, out, silent=None, guard=None, inserts=True):
+        """Run the insert and send chains over one block into ``out``.
+
+        Silent input is passed through the chain until every effect's tail
+        (reverb decay, delay repeats) has died away; after that the chain is
+        skipped and ``out`` is left untouched.
+
+        With ``inserts=False`` the input is taken to have been through the
+        inserts already (a frozen track) and only the sends (and the
+        Stutter, which a freeze does not print) run.
+
+        Args:
+            audio (np.ndarray): Input block
+            sample_rate (float): Sample rate in Hz
+            out (np.ndarray): Preallocated output buffer, mixed in place
+            silent (bool): Input silence flag from upstream; measured when None
+            guard (AllocationGuard): Optional allocation guard from the engine
+            inserts (bool): Run the insert chain and non-linear stages
+
+        Returns:
+            bool: True when the output is silent; if the chain was skipped,
+            ``out`` has not been written and must be treated as zeros
+        """
+        processed, send_effect = self._scratch(audio.shape, audio.dtype)
+        gate = self._tail_gate(sample_rate)
+        if silent is None:
+            silent = gate.is_silent(block_peak(audio, self._peak))
+        if gate.should_skip(silent):
+            self.output_silent = True
+            return True
+        frames = processed if processed.ndim > 1 else processed[:, None]
+        np.copyto(processed, audio)
+        if inserts:
+            self.chain.process(frames, sample_rate, guard)
+        elif STUTTER in self.chain.enabled:
+            run_stage(self.stutter, frames, sample_rate, guard)
+        if self._sends:
+            np.copyto(send_effect, processed)
+            wet = send_effect if send_effect.ndim > 1 else send_effect[:, None]
+            for stage, _ in self._send_stages:
+                run_stage(stage, wet, sample_rate, guard)
+            if self._dry_delay.delay:
+                self._dry_delay.process(frames)
+            np.multiply(send_effect, self.send_level, out=out)  # Dry/Wet mix
+            np.add(out, processed, out=out)
+        else:
+            np.copyto(out, processed)
+        self.output_silent = gate.update(silent, block_peak(out, self._peak), len(out))
+        return self.output_silent
+
+    def process_audio(self, audio, sample_rate, out=None, guard=None, silent=None):
+        """Run the insert and send chains over one block.
+
+        Args:
+            audio (np.ndarray): Input block
+            sample_rate (float): Sample rate in Hz
+            out (np.ndarray): Optional preallocated output buffer; when given,
+                the block is mixed in place without temporaries
+            guard (AllocationGuard): Optional allocation guard from the engine
+            silent (bool): Input silence flag from upstream; measured when None
+
+        Returns:
+            np.ndarray: Dry/wet mixed block (``out`` when provided); zeros
+            once a silent input's tails have finished (see ``process_block``)
+        """
         try:
-            processed = self.inserts(audio, sample_rate)
-            send_effect = self.sends(processed, sample_rate)
-            return processed + send_effect * 0.3  # Dry/Wet mix
+            if out is None:
+                out = np.empty_like(audio)
+            if self.process_block(audio, sample_rate, out, silent, guard) and self.bypassed:
+                out.fill(0)
+            return out
         except Exception as e:
             logger.error(f"Error processing audio: {e}")
             return audio
 
     def toggle_effect(self, channel_id, effect_name, state):
+        # The effect unit calls back into _on_toggle, which recompiles the chain
         self.effect_unit.toggle_effect(channel_id, effect_name, state)
 
     def is_effect_active(self, channel_id, effect_name):
@@ -0,0 +1,124 @@
+import os
+import hashlib
+import threading
+from math import gcd
+import numpy as np
+import logging
+from scipy.signal import resample_poly
+from src.mixer.convolution import TAIL_PARTITION_BLOCKS, ConvolutionReverb
+
+try:
+    import soundfile as sf
+except (ImportError, OSError):
+    sf = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+IR_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "tuxtrax", "ir")
+
+
+def file_digest(path):
+    """Content hash of a file, read in chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def resample_ir(ir, source_rate, target_rate):
+    """Polyphase-resample an impulse response (frames first) to ``target_rate``."""
+    if source_rate == target_rate:
+        return np.asarray(ir, dtype=np.float32)
+    common = gcd(int(source_rate), int(target_rate))
+    resampled = resample_poly(ir, int(target_rate) // common, int(source_rate) // common, axis=0)
+    return resampled.astype(np.float32)
+
+
+def load_ir(path, sample_rate):
+    """Decode an impulse response file and resample it to ``sample_rate``.
+
+    Returns:
+        np.ndarray: (frames, channels) float32
+    """
+    if sf is None:
+        raise RuntimeError("soundfile is required to load impulse responses")
+    ir, source_rate = sf.read(path, dtype="float32", always_2d=True)
+    return resample_ir(ir, source_rate, sample_rate)
+
+
+class IRCache:
+    """Impulse responses kept on disk already resampled and FFT-partitioned.
+
+    Preparing an IR (decode, resample, partition, FFT) takes hundreds of
+    milliseconds; with the cache, loading a reverb preset is a memory map of
+    the stored spectra. Entries are keyed by the IR file's content hash, the
+    engine sample rate and the partition scheme (block size, tail partition,
+    channels), so editing the file or changing any of those makes a new
+    entry. Pages are read from disk on first use.
+
+    Args:
+        cache_dir (str): Where spectra are stored (default ``~/.cache/tuxtrax/ir``)
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or IR_CACHE_DIR
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(digest, sample_rate, block_size, tail_partition, channels):
+        scheme = f"{digest}:{sample_rate}:{block_size}:{tail_partition}:{channels}"
+        return hashlib.blake2b(scheme.encode(), digest_size=16).hexdigest()
+
+    def paths(self, key):
+        return (os.path.join(self.cache_dir, f"{key}.head.npy"), os.path.join(self.cache_dir, f"{key}.tail.npy"))
+
+    def _store(self, path, spectra):
+        partial = f"{path}.{threading.get_ident()}.partial"
+        stored = np.lib.format.open_memmap(partial, mode="w+", dtype=spectra.dtype, shape=spectra.shape)
+        stored[:] = spectra
+        stored.flush()
+        del stored
+        os.replace(partial, path)
+
+    def spectra(self, path, sample_rate, block_size, channels=2, tail_partition=None):
+        """(head, tail) spectra of the IR file at ``path``, from the cache if possible.
+
+        Returns:
+            tuple: Read-only memory maps, as ``ConvolutionReverb.partition``
+        """
+        if tail_partition is None:
+            tail_partition = TAIL_PARTITION_BLOCKS * block_size
+        key = self.key(file_digest(path), sample_rate, block_size, tail_partition, channels)
+        head_path, tail_path = self.paths(key)
+        if not os.path.exists(head_path):
+            head, tail = ConvolutionReverb.partition(load_ir(path, sample_rate), block_size, channels,
+                                                     tail_partition)
+            with self._lock:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # The head is written last: its presence marks a complete entry
+                if tail is not None:
+                    self._store(tail_path, tail)
+                self._store(head_path, head)
+            logger.info(f"Impulse response {path} cached as {key}")
+        head = np.load(head_path, mmap_mode="r")
+        tail = np.load(tail_path, mmap_mode="r") if os.path.exists(tail_path) else None
+        return head, tail
+
+    def reverb(self, path, sample_rate, block_size, channels=2, tail_partition=None, **options):
+        """A ``ConvolutionReverb`` for the IR file at ``path`` (extra options are passed on)."""
+        if tail_partition is None:
+            tail_partition = TAIL_PARTITION_BLOCKS * block_size
+        spectra = self.spectra(path, sample_rate, block_size, channels, tail_partition)
+        return ConvolutionReverb(None, sample_rate, block_size, channels, tail_partition, spectra=spectra, **options)
+
+    def clear(self):
+        """Delete every cached IR."""
+        with self._lock:
+            if not os.path.isdir(self.cache_dir):
+                return
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".npy"):
+                    os.remove(os.path.join(self.cache_dir, name))
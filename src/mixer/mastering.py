@@ -0,0 +1,358 @@
+"""One-click mastering of a rendered mix, file to file.
+
+Two streaming passes over the file, so memory stays bounded however long
+the mix is. The analysis pass splits the file into chunks that worker
+processes read and measure independently (K-weighted loudness per 100 ms,
+sample and true peak, mid/side spectra, channel correlation); the small
+per-chunk results are merged into a ``MixAnalysis``. ``plan_master`` turns
+that into EQ, stereo width and gain settings for a loudness target, and
+``render_master`` streams the file through a ``MasteringChain`` (channel
+EQ, mid/side width, gain, lookahead true-peak limiter) to disk.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import logging
+from scipy.signal import freqz
+from src.audio.metering import LUFS_OFFSET, SILENCE_DB, k_weighting_coefficients
+from src.mixer.channel_eq import EQ_BANDS, EQ_STYLES, ChannelEQ
+from src.mixer.dynamics import BrickwallLimiter
+from src.utils.dsp import BiquadBank, TruePeakDetector, rbj_coefficients
+
+try:
+    import soundfile as sf
+except (ImportError, OSError):
+    sf = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+TARGET_LUFS = -14.0
+CEILING_DB = -1.0
+CHUNK_SECONDS = 30.0
+PREROLL_SECONDS = 0.5  # settles the K-weighting filters before a chunk starts
+FFT_SIZE = 4096
+# Long-term average spectrum of commercial masters, per octave, and how far
+# (fraction, clamp) the EQ moves a mix towards it
+TARGET_TILT_DB_PER_OCTAVE = -3.0
+EQ_STRENGTH = 0.5
+MAX_EQ_DB = 4.0
+# Side energy relative to mid that the width stage aims for, and its range
+TARGET_SIDE_DB = -10.0
+WIDTH_RANGE = (0.6, 1.4)
+MAX_GAIN_DB = 18.0
+
+
+def _step_frames(sr):
+    # BS.1770 gating blocks are 400 ms with 75% overlap: energy per 100 ms step
+    return max(1, int(round(sr / 10.0)))
+
+
+def _read_stereo(f, frames):
+    block = f.read(frames, dtype="float32", always_2d=True)
+    if block.shape[1] == 1:
+        block = np.repeat(block, 2, axis=1)
+    return np.ascontiguousarray(block[:, :2])
+
+
+def _analyse_span(path, start, frames):
+    """Measure ``frames`` frames of ``path`` from ``start`` (one worker's chunk).
+
+    The K-weighting filters and the true-peak interpolator are run over a
+    short pre-roll first, so a chunk measures exactly what a single pass
+    over the whole file would.
+    """
+    with sf.SoundFile(path) as f:
+        sr = f.samplerate
+        # Mono is read as two identical channels; its loudness counts one
+        measured = min(f.channels, 2)
+        step = _step_frames(sr)
+        read_frames = 16 * step
+        k_filter = BiquadBank(2, 2)
+        for section, coefficients in enumerate(k_weighting_coefficients(sr)):
+            k_filter.set_section(section, coefficients)
+        detector = TruePeakDetector(2, read_frames)
+        preroll = min(start, int(PREROLL_SECONDS * sr))
+        f.seek(start - preroll)
+        scratch = np.zeros(2, dtype=np.float32)
+        while preroll > 0:
+            block = _read_stereo(f, min(read_frames, preroll))
+            k_filter.process(block.copy())
+            detector.process(block, scratch)
+            preroll -= len(block)
+
+        result = {
+            "energies": [], "peak": np.zeros(2, dtype=np.float32), "true_peak": np.zeros(2, dtype=np.float32),
+            "mid_power": np.zeros(FFT_SIZE // 2 + 1), "side_power": np.zeros(FFT_SIZE // 2 + 1), "windows": 0,
+            "products": np.zeros(3),  # sum of L*L, R*R, L*R
+        }
+        window = np.hanning(FFT_SIZE).astype(np.float32)
+        remaining = frames
+        while remaining > 0:
+            block = _read_stereo(f, min(read_frames, remaining))
+            if not len(block):
+                break
+            remaining -= len(block)
+            np.maximum(result["peak"], np.abs(block).max(axis=0), out=result["peak"])
+            detector.process(block, result["true_peak"])
+            left, right = block[:, 0].astype(np.float64), block[:, 1].astype(np.float64)
+            result["products"] += (left @ left, right @ right, left @ right)
+
+            count = len(block) // FFT_SIZE
+            if count:
+                framed = block[:count * FFT_SIZE].reshape(count, FFT_SIZE, 2)
+                mid = (framed[:, :, 0] + framed[:, :, 1]) * (window / np.sqrt(2.0))
+                side = (framed[:, :, 0] - framed[:, :, 1]) * (window / np.sqrt(2.0))
+                result["mid_power"] += (np.abs(np.fft.rfft(mid, axis=1)) ** 2).sum(axis=0)
+                result["side_power"] += (np.abs(np.fft.rfft(side, axis=1)) ** 2).sum(axis=0)
+                result["windows"] += count
+
+            # Only whole steps count; chunks other than the last are whole steps long
+            weighted = k_filter.process(block.copy())
+            steps = len(weighted) // step
+            power = np.square(weighted[:steps * step, :measured], dtype=np.float64).sum(axis=1)
+            result["energies"].append(power.reshape(steps, step).mean(axis=1))
+        result["energies"] = np.concatenate(result["energies"]) if result["energies"] else np.zeros(0)
+    return result
+
+
+def _analyse_span_args(args):
+    return _analyse_span(*args)
+
+
+def integrated_loudness(step_energies):
+    """BS.1770 gated integrated loudness from channel-summed 100 ms mean squares.
+
+    Returns:
+        float: LUFS, or ``SILENCE_DB`` when nothing passes the gates
+    """
+    if len(step_energies) < 4:
+        return SILENCE_DB
+    blocks = np.lib.stride_tricks.sliding_window_view(step_energies, 4).mean(axis=-1)
+    with np.errstate(divide="ignore"):
+        loudness = LUFS_OFFSET + 10.0 * np.log10(blocks)
+        gated = blocks[loudness > -70.0]
+        if not len(gated):
+            return SILENCE_DB
+        relative_gate = LUFS_OFFSET + 10.0 * np.log10(gated.mean()) - 10.0
+        gated = gated[LUFS_OFFSET + 10.0 * np.log10(gated) > relative_gate]
+    return float(LUFS_OFFSET + 10.0 * np.log10(gated.mean()))
+
+
+class MixAnalysis:
+    """What ``analyse_mix`` measured over a whole file.
+
+    Attributes:
+        sr (int): Sample rate in Hz
+        frames (int): Length in frames
+        channels (int): Channels in the file (mono is measured as dual mono)
+        integrated_lufs (float): BS.1770 gated integrated loudness
+        peak_db, true_peak_db (np.ndarray): (2,) sample and 4x true peak in dBFS
+        correlation (float): Left/right correlation, -1 to 1
+        side_ratio_db (float): Side energy relative to mid
+        freqs (np.ndarray): Frequencies of the spectra
+        mid_power, side_power (np.ndarray): Mean power spectra of mid and side
+    """
+
+    def __init__(self, sr, frames, channels, spans):
+        self.sr = sr
+        self.frames = frames
+        self.channels = channels
+        self.integrated_lufs = integrated_loudness(np.concatenate([span["energies"] for span in spans]))
+        with np.errstate(divide="ignore"):
+            self.peak_db = np.maximum(20.0 * np.log10(np.max([span["peak"] for span in spans], axis=0)), SILENCE_DB)
+            self.true_peak_db = np.maximum(20.0 * np.log10(np.max([span["true_peak"] for span in spans], axis=0)),
+                                           SILENCE_DB)
+        left, right, cross = np.sum([span["products"] for span in spans], axis=0)
+        self.correlation = float(cross / np.sqrt(left * right)) if left > 0 and right > 0 else 1.0
+        # With mid/side scaled by 1/sqrt(2): mid + side energy = left + right energy
+        mid, side = (left + right + 2.0 * cross) / 2.0, (left + right - 2.0 * cross) / 2.0
+        self.side_ratio_db = float(10.0 * np.log10(max(side, 1e-12) / max(mid, 1e-12)))
+        windows = max(1, sum(span["windows"] for span in spans))
+        self.freqs = np.fft.rfftfreq(FFT_SIZE, 1.0 / sr)
+        self.mid_power = np.sum([span["mid_power"] for span in spans], axis=0) / windows
+        self.side_power = np.sum([span["side_power"] for span in spans], axis=0) / windows
+
+    def band_level_db(self, low_hz, high_hz):
+        """Mid + side power between two frequencies, in dB."""
+        band = (self.freqs >= low_hz) & (self.freqs < high_hz)
+        return float(10.0 * np.log10(max((self.mid_power[band] + self.side_power[band]).sum(), 1e-20)))
+
+
+def analyse_mix(path, chunk_seconds=CHUNK_SECONDS, workers=None):
+    """Measure a whole mix file in parallel chunks.
+
+    Args:
+        path (str): Audio file (mono or stereo; further channels are ignored)
+        chunk_seconds (float): Length each worker measures at a time
+        workers (int): Processes to use (default: every core)
+
+    Returns:
+        MixAnalysis: The merged measurements
+    """
+    if sf is None:
+        raise RuntimeError("soundfile is required for mastering")
+    info = sf.info(path)
+    step = _step_frames(info.samplerate)
+    chunk = max(1, int(round(chunk_seconds * 10.0))) * step
+    spans = [(path, start, min(chunk, info.frames - start)) for start in range(0, info.frames, chunk)]
+    workers = min(workers or os.cpu_count() or 1, len(spans))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_analyse_span_args, spans))
+    else:
+        results = [_analyse_span(*span) for span in spans]
+    analysis = MixAnalysis(info.samplerate, info.frames, info.channels, results)
+    logger.info(f"Analysed {path}: {analysis.integrated_lufs:.1f} LUFS, true peak "
+                f"{analysis.true_peak_db.max():.1f} dBTP, correlation {analysis.correlation:.2f} "
+                f"({len(spans)} chunks on {workers} workers)")
+    return analysis
+
+
+def _response_power(sections, freqs, sr):
+    # |H(f)|^2 of cascaded (b0, b1, b2, a1, a2) biquads
+    power = np.ones_like(freqs)
+    for b0, b1, b2, a1, a2 in sections:
+        _, response = freqz([b0, b1, b2], [1.0, a1, a2], worN=freqs, fs=sr)
+        power *= np.abs(response) ** 2
+    return power
+
+
+def _eq_sections(eq, style, sr):
+    kinds = ("lowshelf", "peak", "highshelf")
+    return [rbj_coefficients(kind, freq, sr, q=q, gain_db=eq[band])
+            for kind, (freq, q), band in zip(kinds, EQ_STYLES[style], EQ_BANDS)]
+
+
+def plan_master(analysis, target_lufs=TARGET_LUFS, ceiling_db=CEILING_DB, style="clean"):
+    """Mastering settings that move a mix towards the targets.
+
+    EQ: the octave around each band of an ``EQ_STYLES`` entry is compared
+    with ``TARGET_TILT_DB_PER_OCTAVE`` (after removing the overall level)
+    and ``EQ_STRENGTH`` of the difference is corrected. Width: the side
+    channel is scaled towards ``TARGET_SIDE_DB``, never widened when the
+    channels are out of phase. Gain: what reaches ``target_lufs``, with
+    the loudness change of the EQ and width predicted from the measured
+    spectra; the limiter catches the peaks.
+
+    Returns:
+        dict: "eq" (band -> dB), "style", "width", "gain_db", "ceiling_db"
+            and "target_lufs"
+    """
+    centres = np.array([freq for freq, _ in EQ_STYLES[style]])
+    levels = np.array([analysis.band_level_db(freq / np.sqrt(2.0), freq * np.sqrt(2.0)) for freq in centres])
+    target = TARGET_TILT_DB_PER_OCTAVE * np.log2(centres / centres[1])
+    deviation = levels - target
+    deviation -= deviation.mean()
+    gains = np.clip(-EQ_STRENGTH * deviation, -MAX_EQ_DB, MAX_EQ_DB)
+    eq = {band: float(round(gain, 1)) for band, gain in zip(EQ_BANDS, gains)}
+
+    width = 1.0
+    if analysis.channels > 1:
+        width = float(np.clip(10.0 ** ((TARGET_SIDE_DB - analysis.side_ratio_db) / 20.0), *WIDTH_RANGE))
+        if analysis.correlation < 0.0:
+            width = min(width, 1.0)
+
+    gain_db = 0.0
+    if analysis.integrated_lufs > SILENCE_DB:
+        freqs, sr = analysis.freqs, analysis.sr
+        weighting = _response_power(k_weighting_coefficients(sr), freqs, sr)
+        shaped = weighting * _response_power(_eq_sections(eq, style, sr), freqs, sr)
+        before = (weighting * (analysis.mid_power + analysis.side_power)).sum()
+        after = (shaped * (analysis.mid_power + width ** 2 * analysis.side_power)).sum()
+        predicted = analysis.integrated_lufs + 10.0 * np.log10(max(after, 1e-20) / max(before, 1e-20))
+        gain_db = float(np.clip(target_lufs - predicted, -MAX_GAIN_DB, MAX_GAIN_DB))
+    return {"eq": eq, "style": style, "width": width, "gain_db": gain_db, "ceiling_db": ceiling_db,
+            "target_lufs": target_lufs}
+
+
+class MasteringChain:
+    """EQ, mid/side width, gain and a true-peak limiter on (block_size, 2) blocks.
+
+    Args:
+        settings (dict): From ``plan_master``
+        sr (int): Sample rate in Hz
+        block_size (int): Frames per block
+
+    Attributes:
+        latency_samples (int): Delay of the output (the limiter's lookahead)
+    """
+
+    def __init__(self, settings, sr, block_size=4096):
+        self.block = np.zeros((block_size, 2), dtype=np.float32)
+        # The stereo block is the one channel of a ChannelEQ
+        self.eq = ChannelEQ(1, sr, block_size, style=settings["style"])
+        for band, gain_db in settings["eq"].items():
+            self.eq.set_gain(0, band, gain_db)
+        self.width = settings["width"]
+        self.gain = 10.0 ** (settings["gain_db"] / 20.0)
+        self.limiter = BrickwallLimiter(sr, block_size, ceiling_db=settings["ceiling_db"])
+        self.latency_samples = self.limiter.latency_samples
+        self._mid = np.zeros(block_size, dtype=np.float32)
+        self._side = np.zeros(block_size, dtype=np.float32)
+        self._eq_view = self.block.reshape(1, block_size, 2)
+
+    def process(self):
+        """Master ``block`` in place."""
+        block, mid, side = self.block, self._mid, self._side
+        self.eq.process(self._eq_view)
+        if self.width != 1.0:
+            np.add(block[:, 0], block[:, 1], out=mid)
+            np.subtract(block[:, 0], block[:, 1], out=side)
+            np.multiply(side, self.width, out=side)
+            np.add(mid, side, out=block[:, 0])
+            np.subtract(mid, side, out=block[:, 1])
+            np.multiply(block, 0.5, out=block)
+        np.multiply(block, self.gain, out=block)
+        self.limiter.process(block)
+        return block
+
+
+def render_master(path, out_path, settings, block_size=4096, subtype=None):
+    """Stream ``path`` through a ``MasteringChain`` into ``out_path``.
+
+    The limiter's lookahead is removed, so the output lines up with the
+    input and has the same length and channel count.
+
+    Args:
+        subtype (str): soundfile subtype of the output (default: the input's)
+    """
+    if sf is None:
+        raise RuntimeError("soundfile is required for mastering")
+    with sf.SoundFile(path) as source:
+        chain = MasteringChain(settings, source.samplerate, block_size)
+        block = chain.block
+        skip = chain.latency_samples
+        remaining = source.frames
+        channels = min(source.channels, 2)
+        with sf.SoundFile(out_path, "w", samplerate=source.samplerate, channels=channels,
+                          subtype=subtype or source.subtype) as out:
+            while remaining > 0:
+                read = source.read(block_size, dtype="float32", always_2d=True)
+                block[:len(read)] = read[:, :2] if channels == 2 else read[:, :1]
+                block[len(read):] = 0
+                chain.process()
+                start = min(skip, block_size)
+                skip -= start
+                count = min(block_size - start, remaining)
+                out.write(block[start:start + count, :channels])
+                remaining -= count
+    logger.info(f"Mastered {path} -> {out_path}: EQ {settings['eq']}, width {settings['width']:.2f}, "
+                f"gain {settings['gain_db']:+.1f} dB, ceiling {settings['ceiling_db']:.1f} dBTP")
+    return out_path
+
+
+def master_file(path, out_path, target_lufs=TARGET_LUFS, ceiling_db=CEILING_DB, style="clean", workers=None):
+    """Analyse, plan and render in one call (the "AI Mastering" button).
+
+    Returns:
+        dict: The applied ``plan_master`` settings, or None on error
+    """
+    try:
+        settings = plan_master(analyse_mix(path, workers=workers), target_lufs, ceiling_db, style)
+        render_master(path, out_path, settings)
+        return settings
+    except Exception as e:
+        logger.error(f"Error mastering {path}: {e}")
+        return None
@@ -0,0 +1,178 @@
+import numpy as np
+import logging
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+MASTER_BUS = 0
+
+
+class MatrixMixer:
+    """Vectorised channel mixer driven by a single gain matrix per block.
+
+    All channel outputs live in one ``inputs`` block of shape
+    (channels, frames, 2). Channel gain, constant-power pan, mute/solo and the
+    per-bus send levels are folded into a gain matrix of shape
+    (2, buses, channels), and every output bus is produced by one batched
+    matrix multiply (BLAS) per block. When the matrix changes between blocks
+    the old and new mixes are crossfaded across the block so gain moves
+    never step.
+
+    Sends are post-fader unless marked pre-fader, in which case they ignore
+    the channel's gain and pan (mute and solo still apply).
+
+    Attributes:
+        inputs (np.ndarray): Channel block, (channels, frames, 2) float32
+        outputs (np.ndarray): Bus block, (buses, frames, 2) float32; bus 0 is the master
+        sends (np.ndarray): Send level per (bus, channel); the master row is 1.0
+        pre_fader (np.ndarray): Per (bus, channel), tap the send before the fader
+        method (str): "matmul" (BLAS, default) or "einsum"
+    """
+
+    def __init__(self, num_channels, block_size, num_buses=1, method="matmul"):
+        if method not in ("matmul", "einsum"):
+            raise ValueError(f"Unknown mix method '{method}'")
+        self.num_channels = num_channels
+        self.block_size = block_size
+        self.num_buses = num_buses
+        self.method = method
+        self.inputs = np.zeros((num_channels, block_size, 2), dtype=np.float32)
+        self.outputs = np.zeros((num_buses, block_size, 2), dtype=np.float32)
+        self.sends = np.zeros((num_buses, num_channels), dtype=np.float32)
+        self.sends[MASTER_BUS] = 1.0
+        self.pre_fader = np.zeros((num_buses, num_channels), dtype=bool)
+
+        self.gain = np.ones(num_channels, dtype=np.float32)
+        self.pan = np.zeros(num_channels, dtype=np.float32)
+        self.mute = np.zeros(num_channels, dtype=bool)
+        self.solo = np.zeros(num_channels, dtype=bool)
+
+        # Preallocated views and scratch so process() never allocates.
+        self._inputs_planar = self.inputs.transpose(2, 0, 1)
+        self._outputs_planar = self.outputs.transpose(2, 0, 1)
+        self._previous_mix = np.zeros_like(self.outputs)
+        self._previous_planar = self._previous_mix.transpose(2, 0, 1)
+        self._matrix = np.zeros((2, num_buses, num_channels), dtype=np.float32)
+        self._previous_matrix = np.zeros_like(self._matrix)
+        self._channel_gains = np.zeros((2, num_channels), dtype=np.float32)
+        self._active = np.zeros(num_channels, dtype=np.float32)
+        self._theta = np.zeros(num_channels, dtype=np.float32)
+        self._changed = np.zeros((2, num_buses, num_channels), dtype=bool)
+        self._audible = np.zeros(num_channels, dtype=bool)
+        self._pre_gains = np.zeros(num_channels, dtype=np.float32)
+        self._pre_row = np.zeros(num_channels, dtype=np.float32)
+        self._centre = np.float32(np.sqrt(0.5))
+        # Row views, so the per-bus multiplies below are plain 1-D ufunc calls
+        # (broadcasting a row across a matrix makes numpy allocate buffers).
+        self._send_rows = [self.sends[bus] for bus in range(num_buses)]
+        self._pre_fader_rows = [self.pre_fader[bus] for bus in range(num_buses)]
+        self._matrix_rows = [[self._matrix[side, bus] for bus in range(num_buses)] for side in range(2)]
+        ramp = np.arange(1, block_size + 1, dtype=np.float32) / block_size
+        self._ramp = np.ascontiguousarray(np.broadcast_to(ramp[None, :, None], self.outputs.shape))
+        self._dirty = True
+        self.update_matrix()
+        np.copyto(self._previous_matrix, self._matrix)
+
+    def set_gain(self, channel, value):
+        self.gain[channel] = value
+        self._dirty = True
+
+    def set_pan(self, channel, value):
+        self.pan[channel] = value
+        self._dirty = True
+
+    def set_mute(self, channel, state):
+        self.mute[channel] = state
+        self._dirty = True
+
+    def set_solo(self, channel, state):
+        self.solo[channel] = state
+        self._dirty = True
+
+    def set_send(self, bus, channel, level, pre_fader=None):
+        self.sends[bus, channel] = level
+        if pre_fader is not None:
+            self.pre_fader[bus, channel] = pre_fader
+        self._dirty = True
+
+    def set_gains(self, gains, pans):
+        """Copy per-channel gains and pans in one go, e.g. from a ParameterStore."""
+        np.copyto(self.gain, gains)
+        np.copyto(self.pan, pans)
+        self._dirty = True
+
+    def update_matrix(self):
+        """Rebuild the (2, buses, channels) gain matrix from the channel settings."""
+        # Mute/solo: a channel is audible if it is not muted and, when any
+        # channel is soloed, it is one of the soloed ones.
+        np.logical_not(self.mute, out=self._audible)
+        if np.count_nonzero(self.solo):
+            np.logical_and(self._audible, self.solo, out=self._audible)
+        np.copyto(self._active, self._audible)
+        np.multiply(self._active, self.gain, out=self._active)
+
+        # Constant-power pan law: -3 dB at centre, cos/sin across the field.
+        np.add(self.pan, 1.0, out=self._theta)
+        np.multiply(self._theta, np.pi / 4, out=self._theta)
+        np.cos(self._theta, out=self._channel_gains[0])
+        np.sin(self._theta, out=self._channel_gains[1])
+        np.multiply(self._channel_gains[0], self._active, out=self._channel_gains[0])
+        np.multiply(self._channel_gains[1], self._active, out=self._channel_gains[1])
+
+        # Pre-fader taps: audible at the centre-pan level, before gain and pan.
+        np.multiply(self._audible, self._centre, out=self._pre_gains)
+        for side in range(2):
+            channel_gains = self._channel_gains[side]
+            matrix_rows = self._matrix_rows[side]
+            for bus in range(self.num_buses):
+                np.multiply(self._send_rows[bus], channel_gains, out=matrix_rows[bus])
+                if bus != MASTER_BUS:
+                    np.multiply(self._send_rows[bus], self._pre_gains, out=self._pre_row)
+                    np.copyto(matrix_rows[bus], self._pre_row, where=self._pre_fader_rows[bus])
+        self._dirty = False
+
+    def _mix(self, matrix, planar_out, out):
+        if self.method == "matmul":
+            np.matmul(matrix, self._inputs_planar, out=planar_out)
+        else:
+            np.einsum("cfs,sbc->bfs", self.inputs, matrix, out=out)
+
+    def process(self):
+        """Mix ``inputs`` into ``outputs`` for one block.
+
+        Returns:
+            np.ndarray: ``outputs`` (buses, frames, 2)
+        """
+        if self._dirty:
+            np.copyto(self._previous_matrix, self._matrix)
+            self.update_matrix()
+            np.not_equal(self._matrix, self._previous_matrix, out=self._changed)
+            # count_nonzero rather than .any(): reductions allocate.
+            ramping = np.count_nonzero(self._changed) > 0
+        else:
+            ramping = False
+
+        self._mix(self._matrix, self._outputs_planar, self.outputs)
+        if ramping:
+            # Crossfade from the old matrix to the new one over the block.
+            self._mix(self._previous_matrix, self._previous_planar, self._previous_mix)
+            np.subtract(self.outputs, self._previous_mix, out=self.outputs)
+            np.multiply(self.outputs, self._ramp, out=self.outputs)
+            np.add(self.outputs, self._previous_mix, out=self.outputs)
+        return self.outputs
+
+    def skip(self):
+        """Advance one block in which every input is silent, without mixing.
+
+        Pending gain changes are applied straight away: with nothing
+        playing there is nothing to crossfade.
+        """
+        if self._dirty:
+            self.update_matrix()
+            np.copyto(self._previous_matrix, self._matrix)
+        self.outputs.fill(0)
+        return self.outputs
+
+    def clear(self):
+        self.inputs.fill(0)
@@ -0,0 +1,208 @@
+import numpy as np
+import logging
+from src.audio.buffers import process_into
+from src.utils.dsp import BiquadBank, HalfBandStage, rbj_coefficients
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+OVERSAMPLING_FACTORS = (1, 2, 4, 8)
+# Even-phase taps per 2x stage: the first stage sees the full audio band and
+# needs the steepest filter; later stages only have to reject images far
+# above it.
+HALFBAND_TAPS = (32, 16, 12)
+
+
+def _stage_delay(index):
+    # Later stages get one sample of padding so each stage's latency is a
+    # whole number of base-rate samples (the cascade stays integer-aligned).
+    return 0 if index == 0 else 1
+
+
+def oversampling_latency(factor):
+    """Round-trip latency in base-rate samples added by ``factor`` oversampling."""
+    stages = factor.bit_length() - 1
+    return sum((HALFBAND_TAPS[i] - 1 + _stage_delay(i)) // 2 ** i for i in range(stages))
+
+
+class Oversampler:
+    """Cascaded polyphase half-band 2x stages for 2x, 4x or 8x oversampling.
+
+    All filter tables, states and intermediate buffers are allocated up
+    front for a fixed block size and channel count.
+
+    Attributes:
+        factor (int): Oversampling factor
+        latency_samples (int): Round-trip delay at the base rate
+    """
+
+    def __init__(self, factor, block_size, channels=2):
+        if factor not in OVERSAMPLING_FACTORS:
+            raise ValueError(f"Oversampling factor must be one of {OVERSAMPLING_FACTORS}")
+        self.factor = factor
+        self.block_size = block_size
+        self.stages = []
+        self._levels = [None]
+        frames = block_size
+        for index in range(factor.bit_length() - 1):
+            self.stages.append(HalfBandStage(frames, channels, HALFBAND_TAPS[index], _stage_delay(index)))
+            frames *= 2
+            self._levels.append(np.zeros((frames, channels), dtype=np.float32))
+        self.latency_samples = oversampling_latency(factor)
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+    def upsample(self, x):
+        """Interpolate ``x`` (block_size, channels); returns the high-rate buffer."""
+        current = x
+        for stage, level in zip(self.stages, self._levels[1:]):
+            current = stage.upsample(current, level)
+        return current
+
+    def downsample(self, out):
+        """Decimate the high-rate buffer back into ``out`` (block_size, channels)."""
+        if not self.stages:
+            return out
+        for index in range(len(self.stages) - 1, 0, -1):
+            self.stages[index].downsample(self._levels[index + 1], self._levels[index])
+        self.stages[0].downsample(self._levels[1], out)
+        return out
+
+
+class TubeSaturator:
+    """Asymmetric tanh tube stage: warm even harmonics from a biased curve.
+
+    Args:
+        drive_db (float): Input gain into the curve
+        bias (float): Operating-point offset; 0 gives a symmetric curve
+        output_db (float): Output gain
+    """
+
+    def __init__(self, drive_db=12.0, bias=0.15, output_db=0.0):
+        self.drive_db = drive_db
+        self.bias = bias
+        self.output_db = output_db
+        self._dc_block = None
+
+    def prepare(self, sample_rate, max_frames, channels):
+        # The biased curve leaves a signal-dependent DC offset; block it.
+        self._dc_block = BiquadBank(channels, 1)
+        self._dc_block.set_section(0, rbj_coefficients("highpass", 10.0, sample_rate, q=0.5))
+        drive = 10 ** (self.drive_db / 20.0)
+        self._drive = np.float32(drive)
+        self._bias = np.float32(self.bias)
+        self._offset = np.float32(np.tanh(drive * self.bias))
+        # Normalise so a full-scale input peaks near the output level.
+        self._makeup = np.float32(10 ** (self.output_db / 20.0) / np.tanh(drive))
+
+    def process(self, x):
+        """Shape ``x`` (frames, channels) in place at the oversampled rate."""
+        np.add(x, self._bias, out=x)
+        np.multiply(x, self._drive, out=x)
+        np.tanh(x, out=x)
+        np.subtract(x, self._offset, out=x)
+        np.multiply(x, self._makeup, out=x)
+        self._dc_block.process(x)
+        return x
+
+
+class TapeSaturator:
+    """Tape model: head bump, soft arctan saturation and high-frequency roll-off.
+
+    Args:
+        drive_db (float): Input gain into the curve
+        bump_db (float): Low-frequency head bump around ``bump_hz``
+        bump_hz (float): Head bump centre frequency
+        rolloff_hz (float): Corner of the high-frequency loss
+        output_db (float): Output gain
+    """
+
+    def __init__(self, drive_db=6.0, bump_db=2.0, bump_hz=80.0, rolloff_hz=15000.0, output_db=0.0):
+        self.drive_db = drive_db
+        self.bump_db = bump_db
+        self.bump_hz = bump_hz
+        self.rolloff_hz = rolloff_hz
+        self.output_db = output_db
+        self._filters = None
+
+    def prepare(self, sample_rate, max_frames, channels):
+        self._filters = BiquadBank(channels, 2)
+        self._filters.set_section(0, rbj_coefficients("peak", self.bump_hz, sample_rate, q=1.0,
+                                                      gain_db=self.bump_db))
+        self._filters.set_section(1, rbj_coefficients("lowpass", self.rolloff_hz, sample_rate))
+        drive = 10 ** (self.drive_db / 20.0)
+        self._drive = np.float32(drive)
+        self._makeup = np.float32(10 ** (self.output_db / 20.0) / np.arctan(drive))
+
+    def process(self, x):
+        """Shape ``x`` (frames, channels) in place at the oversampled rate."""
+        np.multiply(x, self._drive, out=x)
+        np.arctan(x, out=x)
+        np.multiply(x, self._makeup, out=x)
+        self._filters.process(x)
+        return x
+
+
+class OversampledInsert:
+    """Runs any insert at 2x/4x/8x the engine rate to keep aliasing out of band.
+
+    Wraps either one of our in-place processors (``prepare``/``process``,
+    e.g. ``TubeSaturator``) or a pedalboard plugin such as ``Distortion``.
+    Buffers are sized on the first block and whenever the block shape
+    changes, then reused.
+
+    Attributes:
+        processor: The wrapped insert
+        factor (int): Oversampling factor
+        enabled (bool): Bypass switch
+    """
+
+    def __init__(self, processor, factor=4, name=None, enabled=True):
+        if factor not in OVERSAMPLING_FACTORS:
+            raise ValueError(f"Oversampling factor must be one of {OVERSAMPLING_FACTORS}")
+        self.processor = processor
+        self.factor = factor
+        self.name = name or type(processor).__name__
+        self.enabled = enabled
+        self._oversampler = None
+        self._shape = None
+        self._sample_rate = None
+        self._plugin_out = None
+        self._native = hasattr(processor, "prepare")
+
+    @property
+    def latency_samples(self):
+        return oversampling_latency(self.factor) if self.enabled else 0
+
+    def prepare(self, sample_rate, shape):
+        frames, channels = shape
+        self._oversampler = Oversampler(self.factor, frames, channels)
+        self._plugin_out = np.zeros((frames * self.factor, channels), dtype=np.float32)
+        if self._native:
+            self.processor.prepare(sample_rate * self.factor, frames * self.factor, channels)
+        self._shape = shape
+        self._sample_rate = sample_rate
+
+    def process(self, audio, sample_rate, guard=None):
+        """Process a (frames, channels) float32 block in place."""
+        if not self.enabled:
+            return audio
+        return self.run(audio, sample_rate, guard)
+
+    def run(self, audio, sample_rate, guard=None):
+        """Like ``process`` but ignores ``enabled`` (for callers that own the bypass)."""
+        if self._shape != audio.shape or self._sample_rate != sample_rate:
+            self.prepare(sample_rate, audio.shape)
+        high = self._oversampler.upsample(audio)
+        if self._native:
+            self.processor.process(high)
+        else:
+            process_into(self.processor, high, sample_rate * self.factor, self._plugin_out, guard)
+            np.copyto(high, self._plugin_out)
+        if self.factor == 1:
+            np.copyto(audio, high)
+            return audio
+        return self._oversampler.downsample(audio)
@@ -1,34 +1,172 @@
-from pedalboard import Compressor, Gain
 import numpy as np
 import logging
+from src.audio.latency import DelayLine
+from src.utils.dsp import EnvelopeFollower, LinkwitzRileyCrossover
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+FLOOR_DB = -120.0
+
+
 class SidechainEngine:
-    def __init__(self):
-        self.threshold = -24
-        self.ratio = 4.0
-        self.attack = 10.0
-        self.release = 100.0
-        self.comp = Compressor(
-            threshold_db=self.threshold,
-            ratio=self.ratio,
-            attack_ms=self.attack,
-            release_ms=self.release
-        )
-        self.makeup_gain = Gain(gain_db=6)
-
-    def process(self, main_audio, trigger_audio, sr):
+    """Ducks a main signal by the level of a trigger signal (e.g. the kick).
+
+    The trigger's peak level runs through a stateful attack/release envelope
+    follower and a compressor gain computer (``threshold``/``ratio``); the
+    resulting gain is applied to the main signal. State carries over from
+    block to block, so the gain is continuous across block edges, and each
+    block costs O(frames). Attributes can be changed between blocks.
+
+    With ``lookahead_ms`` the main signal is delayed (the trigger is not),
+    so the gain is already down when a kick's transient arrives; report
+    ``latency_samples`` for delay compensation. With ``crossovers`` the main
+    signal is split into Linkwitz-Riley bands and only ``duck_bands`` are
+    ducked, e.g. ``crossovers=(120,)`` and ``duck_bands=(0,)`` ducks just
+    the sub-bass. The main signal may have any number of columns, so one
+    engine can duck many channels with a single gain computation.
+
+    Attributes:
+        threshold (float): Trigger level in dBFS above which ducking starts
+        ratio (float): Compression ratio applied above the threshold
+        attack (float): Attack time in milliseconds
+        release (float): Release time in milliseconds
+        makeup_db (float): Gain applied to the ducked signal
+        lookahead_ms (float): Delay of the main path
+        crossovers (tuple): Band split frequencies in Hz; empty for broadband
+        duck_bands (tuple): Bands (0 = lowest) the trigger ducks
+        gain_reduction_db (float): Reduction at the end of the last block
+    """
+
+    def __init__(self, threshold=-24.0, ratio=4.0, attack=10.0, release=100.0, makeup_db=0.0,
+                 lookahead_ms=0.0, crossovers=(), duck_bands=(0,), sr=48000):
+        self.threshold = threshold
+        self.ratio = ratio
+        self.attack = attack
+        self.release = release
+        self.makeup_db = makeup_db
+        self.lookahead_ms = lookahead_ms
+        self.crossovers = tuple(crossovers)
+        self.duck_bands = tuple(duck_bands)
+        self.sr = sr
+        self.gain_reduction_db = 0.0
+        self.follower = None
+        self._times = None
+        self._frames = 0
+        self._level = None
+        self._gain = None
+        self._trigger_abs = None
+        self._main_key = None
+        self._work = None
+        self._delay = None
+        self._crossover = None
+        self._bands = None
+
+    @property
+    def latency_samples(self):
+        """Delay the lookahead adds to the main signal."""
+        return int(round(self.lookahead_ms * self.sr / 1000.0))
+
+    def _prepare_main(self, shape, sr):
+        # Rebuilt only when the block shape or the lookahead/band settings change
+        key = (shape, sr, self.lookahead_ms, self.crossovers)
+        if key == self._main_key:
+            return
+        frames = shape[0]
+        columns = shape[1] if len(shape) > 1 else 1
+        self._work = np.zeros((frames, columns), dtype=np.float32)
+        latency = self.latency_samples
+        self._delay = None
+        if latency:
+            self._delay = DelayLine(latency, frames, columns)
+            self._delay.set_delay(latency)
+        self._crossover = None
+        if self.crossovers:
+            self._crossover = LinkwitzRileyCrossover(columns, sr, self.crossovers, frames)
+            self._bands = np.zeros((self._crossover.bands, frames, columns), dtype=np.float32)
+        self._main_key = key
+
+    def _prepare(self, frames, sr):
+        if self.follower is None or self.follower.sr != sr:
+            self.follower = EnvelopeFollower(1, sr, self.attack, self.release, FLOOR_DB)
+            self._times = (self.attack, self.release)
+        if frames > self._frames:
+            self._level = np.zeros((frames, 1), dtype=np.float32)
+            self._gain = np.zeros(frames, dtype=np.float32)
+            self._trigger_abs = None
+            self._frames = frames
+        if self._times != (self.attack, self.release):
+            self.follower.set_times(self.attack, self.release)
+            self._times = (self.attack, self.release)
+        return self._level[:frames], self._gain[:frames]
+
+    def gain(self, trigger_audio, sr):
+        """Linear gain per frame for one block of trigger audio.
+
+        Returns:
+            np.ndarray: (frames,) float32, valid until the next call
+        """
+        trigger = np.asarray(trigger_audio, dtype=np.float32)
+        frames = len(trigger)
+        level, gain = self._prepare(frames, sr)
+        # Peak of all trigger channels, in dB
+        if trigger.ndim > 1:
+            if self._trigger_abs is None or self._trigger_abs.shape[1] != trigger.shape[1]:
+                self._trigger_abs = np.zeros((self._frames, trigger.shape[1]), dtype=np.float32)
+            rectified = np.abs(trigger, out=self._trigger_abs[:frames])
+            np.max(rectified, axis=1, out=gain)
+        else:
+            np.abs(trigger, out=gain)
+        np.maximum(gain, 10.0 ** (FLOOR_DB / 20.0), out=gain)
+        np.log10(gain, out=level[:, 0])
+        np.multiply(level, 20.0, out=level)
+        envelope = self.follower.process(level)[:, 0]
+
+        # Gain computer: above the threshold only 1/ratio of the overshoot remains
+        np.subtract(envelope, self.threshold, out=gain)
+        np.maximum(gain, 0.0, out=gain)
+        np.multiply(gain, 1.0 - 1.0 / max(self.ratio, 1.0), out=gain)
+        self.gain_reduction_db = float(gain[-1]) if frames else 0.0
+        np.subtract(self.makeup_db, gain, out=gain)
+        np.multiply(gain, 1.0 / 20.0, out=gain)
+        np.power(10.0, gain, out=gain)
+        return gain
+
+    def process(self, main_audio, trigger_audio, sr, out=None):
+        """Duck one block of ``main_audio`` by ``trigger_audio``.
+
+        Args:
+            main_audio (np.ndarray): (frames,) or (frames, channels) block to duck
+            trigger_audio (np.ndarray): Trigger block with the same number of frames
+            sr (int): Sample rate in Hz
+            out (np.ndarray): Optional output buffer shaped like ``main_audio``
+
+        Returns:
+            np.ndarray: The ducked block
+        """
         try:
-            # Convert trigger audio to envelope
-            envelope = np.abs(trigger_audio)
-            envelope = np.convolve(envelope, np.ones(1024)/1024, mode='same')
-            
-            # Apply compression based on envelope
-            compressed = self.comp(main_audio, sr)
-            return self.makeup_gain(compressed * envelope, sr)
+            self.sr = sr
+            gain = self.gain(trigger_audio, sr)[:, None]
+            main = np.asarray(main_audio, dtype=np.float32)
+            self._prepare_main(main.shape, sr)
+            work = self._work
+            np.copyto(work, main if main.ndim > 1 else main[:, None])
+            if self._delay is not None:
+                self._delay.process(work)
+            if self._crossover is None:
+                np.multiply(work, gain, out=work)
+            else:
+                bands = self._crossover.split(work, self._bands)
+                work.fill(0)
+                for band in range(len(bands)):
+                    if band in self.duck_bands:
+                        np.multiply(bands[band], gain, out=bands[band])
+                    np.add(work, bands[band], out=work)
+            if out is None:
+                out = np.empty_like(main)
+            np.copyto(out if out.ndim > 1 else out[:, None], work)
+            return out
         except Exception as e:
             logger.error(f"Error in sidechain processing: {e}")
             return main_audio
@@ -9,7 +9,8 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 
 class MidiWorker(QObject):
-    note_on = pyqtSignal(int, int)  # (note, velocity)
+    note_on = pyqtSignal(int, float)  # (note, 0.0-1.0 velocity)
+    note_off = pyqtSignal(int)  # note
     cc_changed = pyqtSignal(int, float)  # (cc_number, 0.0-1.0)
 
     def __init__(self):
@@ -24,6 +25,8 @@ class MidiWorker(QObject):
                     for msg in port.iter_pending():
                         if msg.type == 'note_on':
                             self.note_on.emit(msg.note, msg.velocity/127)
+                        elif msg.type == 'note_off':
+                            self.note_off.emit(msg.note)
                         elif msg.type == 'control_change':
                             self.cc_changed.emit(msg.control, msg.value/127)
         except Exception as e:
@@ -32,15 +35,54 @@ class MidiWorker(QObject):
 class MidiMapper:
     def __init__(self):
         self.mapping = {}  # {midi_note: sample_path}
+        self.cc_mapping = {}  # {cc_number: (parameter_store, param_id)}
+        self.stutter = None  # BeatRepeat played from its NOTE_DIVISIONS pads
         self.worker = MidiWorker()
         self.thread = QThread()
         self.worker.moveToThread(self.thread)
-        self.worker.note_on.connect(self.trigger_sample)
+        self.worker.note_on.connect(self.handle_note_on)
+        self.worker.note_off.connect(self.handle_note_off)
+        self.worker.cc_changed.connect(self.handle_cc)
         self.swing_settings = {'global': 0.0, 'channels': {}}
         
+    # The maps are read from the MIDI thread; edits build a new dict and
+    # swap it in whole instead of changing the one being read.
     def map_note_to_sample(self, note, sample_path):
-        self.mapping[note] = sample_path
-        
+        self.mapping = {**self.mapping, note: sample_path}
+
+    def load_mapping(self, mapping):
+        """Replace the whole note map at once (e.g. loading a kit)."""
+        self.mapping = dict(mapping)
+
+    def map_cc_to_parameter(self, cc_number, parameter_store, param_id):
+        """Map a MIDI CC to an engine parameter (MIDI learn)."""
+        self.cc_mapping = {**self.cc_mapping, cc_number: (parameter_store, param_id)}
+
+    def map_stutter(self, stutter):
+        """Play a ``BeatRepeat`` (e.g. an ``FXEngine``'s Stutter) from its pad notes.
+
+        Its ``NOTE_DIVISIONS`` notes go to the stutter instead of the sample
+        map; None unmaps it.
+        """
+        self.stutter = stutter
+
+    def handle_note_on(self, note, velocity):
+        stutter = self.stutter
+        if stutter is not None and stutter.note_on(note, velocity):
+            return
+        self.trigger_sample(note, velocity)
+
+    def handle_note_off(self, note):
+        stutter = self.stutter
+        if stutter is not None:
+            stutter.note_off(note)
+
+    def handle_cc(self, cc_number, value):
+        target = self.cc_mapping.get(cc_number)
+        if target is not None:
+            store, param_id = target
+            store.set_normalized(param_id, value)
+
     def start_listening_thread(self):
         self.thread.started.connect(self.worker.run)
         self.thread.start()
@@ -51,10 +93,11 @@ class MidiMapper:
         self.thread.wait()
             
     def trigger_sample(self, note, velocity):
-        if note in self.mapping:
+        sample_path = self.mapping.get(note)
+        if sample_path is not None:
             try:
                 # Add sample triggering logic
-                print(f"Triggering sample: {self.mapping[note]} with velocity {velocity}")
+                print(f"Triggering sample: {sample_path} with velocity {velocity}")
             except Exception as e:
                 logger.error(f"Error triggering sample for note {note}: {e}")
 
@@ -0,0 +1,1073 @@
+import numpy as np
+import logging
+from scipy.signal import lfilter
+
+# numba is pulled in by librosa; when it is missing the kernels below fall
+# back to scipy/numpy versions that give the same results but allocate.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+_DB_TO_LN = float(np.log(10.0)) / 20.0
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def _biquad_kernel(x, coeffs, z1, z2):
+    # x: (frames, rows) filtered in place; coeffs: (sections, 5, rows) as
+    # b0, b1, b2, a1, a2; z1/z2: (sections, rows) transposed direct form II
+    # state. Rows are the inner loop so the compiler can vectorise across
+    # channels instead of waiting on each sample's feedback.
+    frames, rows = x.shape
+    for s in range(coeffs.shape[0]):
+        b0 = coeffs[s, 0]
+        b1 = coeffs[s, 1]
+        b2 = coeffs[s, 2]
+        a1 = coeffs[s, 3]
+        a2 = coeffs[s, 4]
+        s1 = z1[s]
+        s2 = z2[s]
+        for i in range(frames):
+            xi = x[i]
+            for r in range(rows):
+                v = xi[r]
+                y = b0[r] * v + s1[r]
+                s1[r] = b1[r] * v - a1[r] * y + s2[r]
+                s2[r] = b2[r] * v - a2[r] * y
+                xi[r] = y
+
+
+def _biquad_fallback(x, coeffs, z1, z2):
+    for s in range(coeffs.shape[0]):
+        for r in range(x.shape[1]):
+            b = coeffs[s, 0:3, r]
+            a = (1.0, coeffs[s, 3, r], coeffs[s, 4, r])
+            zi = np.array([z1[s, r], z2[s, r]])
+            x[:, r], zf = lfilter(b, a, x[:, r], zi=zi)
+            z1[s, r], z2[s, r] = zf
+
+
+def _biquad_rows_kernel(x, coeffs, z1, z2, skip, settled, index):
+    # As _biquad_kernel, but rows of a group (channel) marked in skip whose
+    # state has decayed below settled are left alone, their state cleared.
+    # index: (rows,) int64 scratch for the rows that do run. Returns how many.
+    frames, rows = x.shape
+    sections = coeffs.shape[0]
+    group = rows // skip.shape[0]
+    n = 0
+    for r in range(rows):
+        if skip[r // group]:
+            quiet = True
+            for s in range(sections):
+                if abs(z1[s, r]) > settled or abs(z2[s, r]) > settled:
+                    quiet = False
+            if quiet:
+                for s in range(sections):
+                    z1[s, r] = 0.0
+                    z2[s, r] = 0.0
+                continue
+        index[n] = r
+        n += 1
+    for s in range(sections):
+        b0 = coeffs[s, 0]
+        b1 = coeffs[s, 1]
+        b2 = coeffs[s, 2]
+        a1 = coeffs[s, 3]
+        a2 = coeffs[s, 4]
+        s1 = z1[s]
+        s2 = z2[s]
+        for i in range(frames):
+            xi = x[i]
+            for k in range(n):
+                r = index[k]
+                v = xi[r]
+                y = b0[r] * v + s1[r]
+                s1[r] = b1[r] * v - a1[r] * y + s2[r]
+                s2[r] = b2[r] * v - a2[r] * y
+                xi[r] = y
+    return n
+
+
+def _biquad_rows_fallback(x, coeffs, z1, z2, skip, settled, index):
+    group = x.shape[1] // len(skip)
+    quiet = np.repeat(skip, group) & (np.abs(z1).max(axis=0) <= settled) & (np.abs(z2).max(axis=0) <= settled)
+    z1[:, quiet] = 0.0
+    z2[:, quiet] = 0.0
+    rows = np.flatnonzero(~quiet)
+    block, sub1, sub2 = x[:, rows], z1[:, rows], z2[:, rows]
+    _biquad_fallback(block, coeffs[:, :, rows], sub1, sub2)
+    x[:, rows], z1[:, rows], z2[:, rows] = block, sub1, sub2
+    return len(rows)
+
+
+def _true_peak_kernel(x, taps, ext, acc, peak):
+    # x: (frames, rows); taps: (phases, length) polyphase interpolator;
+    # ext: (length - 1 + max_frames, rows) with the previous input in its
+    # first length - 1 rows; acc: (rows,) scratch; peak: (rows,) running max.
+    frames, rows = x.shape
+    phases, length = taps.shape
+    hist = length - 1
+    for i in range(frames):
+        src = x[i]
+        dst = ext[hist + i]
+        for r in range(rows):
+            dst[r] = src[r]
+    for i in range(frames):
+        for p in range(phases):
+            for r in range(rows):
+                acc[r] = 0.0
+            for k in range(length):
+                c = taps[p, k]
+                row = ext[hist + i - k]
+                for r in range(rows):
+                    acc[r] += c * row[r]
+            for r in range(rows):
+                v = abs(acc[r])
+                if v > peak[r]:
+                    peak[r] = v
+    for j in range(hist):
+        src = ext[frames + j]
+        dst = ext[j]
+        for r in range(rows):
+            dst[r] = src[r]
+
+
+def _true_peak_fallback(x, taps, ext, acc, peak):
+    frames = x.shape[0]
+    hist = taps.shape[1] - 1
+    ext[hist:hist + frames] = x
+    windows = np.lib.stride_tricks.sliding_window_view(ext[:hist + frames], taps.shape[1], axis=0)
+    for p in range(taps.shape[0]):
+        values = np.abs(windows @ taps[p, ::-1])
+        np.maximum(peak, values.max(axis=0), out=peak)
+    ext[:hist] = ext[frames:frames + hist].copy()
+
+
+def _true_peak_frames_kernel(x, taps, ext, acc, out):
+    # As _true_peak_kernel, but out: (frames, rows) gets a level per frame:
+    # the larger of sample i - length // 2 and the interpolated points that
+    # follow it, so frame i covers [i - length // 2, i - length // 2 + 1).
+    # Indexed element-wise: per-tap row views cost more than the sums here.
+    frames, rows = x.shape
+    phases, length = taps.shape
+    hist = length - 1
+    delay = length // 2
+    for i in range(frames):
+        for r in range(rows):
+            ext[hist + i, r] = x[i, r]
+    for r in range(rows):
+        for i in range(frames):
+            top = abs(ext[hist + i - delay, r])
+            for p in range(phases):
+                total = 0.0
+                for k in range(length):
+                    total += taps[p, k] * ext[hist + i - k, r]
+                v = abs(total)
+                if v > top:
+                    top = v
+            out[i, r] = top
+    for j in range(hist):
+        for r in range(rows):
+            ext[j, r] = ext[frames + j, r]
+
+
+def _true_peak_frames_fallback(x, taps, ext, acc, out):
+    frames = x.shape[0]
+    hist = taps.shape[1] - 1
+    delay = taps.shape[1] // 2
+    ext[hist:hist + frames] = x
+    windows = np.lib.stride_tricks.sliding_window_view(ext[:hist + frames], taps.shape[1], axis=0)
+    np.abs(ext[hist - delay:hist - delay + frames], out=out)
+    for p in range(taps.shape[0]):
+        np.maximum(out, np.abs(windows @ taps[p, ::-1]), out=out)
+    ext[:hist] = ext[frames:frames + hist].copy()
+
+
+def _lookahead_kernel(gain, window, release, req_ext, rel_ext, held, queue):
+    # gain: (frames, rows) required gain in dB (<= 0), replaced by the
+    # applied gain: the minimum over the last window + 1 frames, rising by
+    # at most release[r] dB per frame, then averaged over the last window
+    # frames. req_ext: (window + max_frames, rows) and rel_ext:
+    # (window - 1 + max_frames, rows) hold the previous required/released
+    # gains in their first rows; held: (rows,) last released gain; queue:
+    # (window + 1 + max_frames,) scratch for the monotonic minimum queue.
+    frames, rows = gain.shape
+    span = window + 1
+    req_hist = span - 1
+    rel_hist = window - 1
+    for i in range(frames):
+        for r in range(rows):
+            req_ext[req_hist + i, r] = gain[i, r]
+    for r in range(rows):
+        head = 0
+        tail = 0
+        g = held[r]
+        total = 0.0
+        for j in range(rel_hist):
+            total += rel_ext[j, r]
+        for t in range(req_hist + frames):
+            v = req_ext[t, r]
+            while tail > head and req_ext[queue[tail - 1], r] >= v:
+                tail -= 1
+            queue[tail] = t
+            tail += 1
+            if t < req_hist:
+                continue
+            while queue[head] <= t - span:
+                head += 1
+            i = t - req_hist
+            g = min(req_ext[queue[head], r], g + release[r])
+            rel_ext[rel_hist + i, r] = g
+            total += g
+            gain[i, r] = total / window
+            total -= rel_ext[i, r]
+        held[r] = g
+    for j in range(req_hist):
+        for r in range(rows):
+            req_ext[j, r] = req_ext[frames + j, r]
+    for j in range(rel_hist):
+        for r in range(rows):
+            rel_ext[j, r] = rel_ext[frames + j, r]
+
+
+def _lookahead_fallback(gain, window, release, req_ext, rel_ext, held, queue):
+    # Sliding minimum and mean over history windows; the release in closed
+    # form as a running minimum, like the envelope follower's peak hold
+    frames = gain.shape[0]
+    req_hist, rel_hist = window, window - 1
+    req_ext[req_hist:req_hist + frames] = gain
+    windows = np.lib.stride_tricks.sliding_window_view(req_ext[:req_hist + frames], window + 1, axis=0)
+    minimum = windows.min(axis=-1)
+    ramp = np.arange(1, frames + 1)[:, None] * release[None, :]
+    released = np.minimum.accumulate(np.vstack([held[None, :], minimum - ramp]), axis=0)[1:] + ramp
+    held[:] = released[-1]
+    rel_ext[rel_hist:rel_hist + frames] = released
+    boxes = np.lib.stride_tricks.sliding_window_view(rel_ext[:rel_hist + frames], window, axis=0)
+    gain[:] = boxes.mean(axis=-1)
+    req_ext[:req_hist] = req_ext[frames:frames + req_hist].copy()
+    rel_ext[:rel_hist] = rel_ext[frames:frames + rel_hist].copy()
+
+
+def _fft_rows_kernel(z, rev, twiddle):
+    # In-place iterative radix-2 FFT of every row of z: (rows, m) complex128,
+    # m a power of two; rev: bit-reversed indices; twiddle: exp(-2 pi i k / m)
+    # for k < m / 2, conjugated for the (unscaled) inverse.
+    rows, m = z.shape
+    for r in range(rows):
+        for i in range(m):
+            j = rev[i]
+            if j > i:
+                t = z[r, i]
+                z[r, i] = z[r, j]
+                z[r, j] = t
+        size = 2
+        while size <= m:
+            half = size // 2
+            step = m // size
+            for start in range(0, m, size):
+                for k in range(half):
+                    w = twiddle[k * step]
+                    a = z[r, start + k]
+                    b = z[r, start + k + half] * w
+                    z[r, start + k] = a + b
+                    z[r, start + k + half] = a - b
+            size *= 2
+
+
+def _rfft_kernel(x, out, work, rev, twiddle, post):
+    # x: (rows, n) float64 -> out: (rows, n // 2 + 1) complex128. The even and
+    # odd samples are packed into one n / 2-point complex FFT and separated
+    # afterwards; post: exp(-2 pi i k / n) for k <= n / 2.
+    rows, m = work.shape
+    for r in range(rows):
+        for i in range(m):
+            work[r, i] = complex(x[r, 2 * i], x[r, 2 * i + 1])
+    _fft_rows(work, rev, twiddle)
+    for r in range(rows):
+        for k in range(m + 1):
+            a = work[r, k % m]
+            b = work[r, (m - k) % m].conjugate()
+            out[r, k] = 0.5 * (a + b) - 0.5j * (a - b) * post[k]
+
+
+def _irfft_kernel(spectrum, out, work, rev, twiddle, post):
+    # Inverse of _rfft_kernel: spectrum (rows, n // 2 + 1) -> out (rows, n);
+    # twiddle and post are conjugated by the caller
+    rows, m = work.shape
+    for r in range(rows):
+        for k in range(m):
+            a = spectrum[r, k]
+            b = spectrum[r, m - k].conjugate()
+            work[r, k] = 0.5 * (a + b) + 0.5j * (a - b) * post[k]
+    _fft_rows(work, rev, twiddle)
+    scale = 1.0 / m
+    for r in range(rows):
+        for i in range(m):
+            out[r, 2 * i] = work[r, i].real * scale
+            out[r, 2 * i + 1] = work[r, i].imag * scale
+
+
+def _rfft_fallback(x, out, work, rev, twiddle, post):
+    out[:] = np.fft.rfft(x, axis=-1)
+
+
+def _irfft_fallback(spectrum, out, work, rev, twiddle, post):
+    out[:] = np.fft.irfft(spectrum, n=out.shape[-1], axis=-1)
+
+
+def _spectral_mac_kernel(a, b, acc):
+    # acc (channels, bins) += sum over k of a[k] * b[k], a/b: (k, channels, bins)
+    count, channels, bins = a.shape
+    for k in range(count):
+        for c in range(channels):
+            for i in range(bins):
+                acc[c, i] += a[k, c, i] * b[k, c, i]
+
+
+def _spectral_mac_fallback(a, b, acc):
+    acc += (a * b).sum(axis=0)
+
+
+def _accumulate_power_kernel(x, peak, sum_squares):
+    # Running per-row absolute peak and sum of squares of x (frames, rows).
+    frames, rows = x.shape
+    for i in range(frames):
+        xi = x[i]
+        for r in range(rows):
+            v = xi[r]
+            a = abs(v)
+            if a > peak[r]:
+                peak[r] = a
+            sum_squares[r] += v * v
+
+
+def _accumulate_power_fallback(x, peak, sum_squares):
+    np.maximum(peak, np.abs(x).max(axis=0), out=peak)
+    sum_squares += np.square(x, dtype=np.float64).sum(axis=0)
+
+
+def _to_db_kernel(values, gain, scale, offset, floor, out):
+    # out[i] = scale * log10(gain * sum(values[i])) + offset, never below floor
+    for i in range(values.shape[0]):
+        total = 0.0
+        for k in range(values.shape[1]):
+            total += values[i, k]
+        total *= gain
+        db = scale * np.log10(total) + offset if total > 0.0 else floor
+        out[i] = db if db > floor else floor
+
+
+def _to_db_fallback(values, gain, scale, offset, floor, out):
+    total = values.sum(axis=1) * gain
+    with np.errstate(divide="ignore", invalid="ignore"):
+        db = scale * np.log10(total) + offset
+    out[:] = np.where(total > 0.0, np.maximum(db, floor), floor)
+
+
+def _halfband_up_kernel(x, taps, ext, out, delay):
+    # 2x interpolation. x: (frames, rows); out: (2 * frames, rows); taps:
+    # (2M,) even-phase coefficients of the half-band filter (times 2);
+    # ext: (2M - 1 + delay + max_frames, rows) with the previous input first.
+    # The odd phase of a half-band filter is a single centre tap, i.e. a pure
+    # delay. ``delay`` adds whole input samples in front of the filter.
+    # Rows are few here (stereo), so the tap loop is the inner one and
+    # accumulates in a float32 scalar the compiler can vectorise.
+    frames, rows = x.shape
+    n_taps = taps.shape[0]
+    hist = n_taps - 1 + delay
+    centre = n_taps // 2 - 1 + delay
+    for i in range(frames):
+        for r in range(rows):
+            ext[hist + i, r] = x[i, r]
+    for r in range(rows):
+        for i in range(frames):
+            newest = hist + i - delay
+            acc = np.float32(0.0)
+            for k in range(n_taps):
+                acc += taps[k] * ext[newest - k, r]
+            out[2 * i, r] = acc
+            out[2 * i + 1, r] = ext[hist + i - centre, r]
+    for j in range(hist):
+        for r in range(rows):
+            ext[j, r] = ext[frames + j, r]
+
+
+def _halfband_down_kernel(u, taps, ext_even, ext_odd, out):
+    # 2x decimation. u: (2 * frames, rows); out: (frames, rows). Even input
+    # samples go through the even-phase taps, odd ones through the 0.5
+    # centre tap, M samples back.
+    frames, rows = out.shape
+    n_taps = taps.shape[0]
+    hist = n_taps - 1
+    centre = n_taps // 2
+    for i in range(frames):
+        for r in range(rows):
+            ext_even[hist + i, r] = u[2 * i, r]
+            ext_odd[hist + i, r] = u[2 * i + 1, r]
+    for r in range(rows):
+        for i in range(frames):
+            newest = hist + i
+            acc = np.float32(0.5) * ext_odd[newest - centre, r]
+            for k in range(n_taps):
+                acc += taps[k] * ext_even[newest - k, r]
+            out[i, r] = acc
+    for j in range(hist):
+        for r in range(rows):
+            ext_even[j, r] = ext_even[frames + j, r]
+            ext_odd[j, r] = ext_odd[frames + j, r]
+
+
+def _row_peaks_kernel(x, out):
+    # out[i] = max(|x[i, :]|) for a (rows, samples) array
+    for i in range(x.shape[0]):
+        peak = np.float32(0.0)
+        row = x[i]
+        for j in range(row.shape[0]):
+            v = abs(row[j])
+            if v > peak:
+                peak = v
+        out[i] = peak
+
+
+def _row_peaks_fallback(x, out):
+    np.max(np.abs(x), axis=1, out=out)
+
+
+def _envelope_kernel(level, attack, release, held, smooth):
+    # level: (frames, rows) dB, replaced by the envelope; attack: (rows,)
+    # one-pole coefficient; release: (rows,) dB fall per sample; held/smooth:
+    # (rows,) state. Decoupled peak detector: an instant-attack peak hold
+    # that falls at the release rate, then attack smoothing.
+    frames, rows = level.shape
+    for i in range(frames):
+        li = level[i]
+        for r in range(rows):
+            h = held[r] - release[r]
+            v = li[r]
+            if v > h:
+                h = v
+            held[r] = h
+            a = attack[r]
+            y = a * smooth[r] + (1.0 - a) * h
+            smooth[r] = y
+            li[r] = y
+
+
+def _envelope_fallback(level, attack, release, held, smooth):
+    # The peak hold in closed form: held[n] = max_k(level[k] + k * r) - n * r,
+    # a running maximum; the attack smoothing is a one-pole lfilter per row.
+    frames, rows = level.shape
+    ramp = np.arange(frames)[:, None] * release[None, :]
+    peaks = level + ramp
+    peaks[0] = np.maximum(peaks[0], held - release)
+    np.maximum.accumulate(peaks, axis=0, out=peaks)
+    peaks -= ramp
+    held[:] = peaks[-1]
+    for r in range(rows):
+        a = attack[r]
+        level[:, r], _ = lfilter([1.0 - a], [1.0, -a], peaks[:, r], zi=[a * smooth[r]])
+        smooth[r] = level[-1, r]
+
+
+def _compress_kernel(x, live, attack, release, held, smooth, settings, floor_db, reduction_db):
+    # x: (channels, frames, 2) compressed in place, channels not marked in
+    # live are skipped; attack/release/held/smooth: (channels,) envelope
+    # follower as in _envelope_kernel; settings: (5, channels) slope, knee
+    # start, knee width, knee scale and makeup dB; reduction_db: (channels,)
+    # gain reduction at the last frame.
+    channels, frames = x.shape[0], x.shape[1]
+    floor = 10.0 ** (floor_db / 20.0)
+    for c in range(channels):
+        if not live[c]:
+            continue
+        slope = settings[0, c]
+        start = settings[1, c]
+        width = settings[2, c]
+        scale = settings[3, c]
+        makeup = settings[4, c]
+        a = attack[c]
+        fall = release[c]
+        h = held[c]
+        y = smooth[c]
+        reduction = 0.0
+        for i in range(frames):
+            left = abs(x[c, i, 0])
+            right = abs(x[c, i, 1])
+            peak = max(max(left, right), floor)
+            h -= fall
+            level = 20.0 * np.log10(peak)
+            if level > h:
+                h = level
+            y = a * y + (1.0 - a) * h
+            over = y - start
+            knee = min(max(over, 0.0), width)
+            reduction = (max(over - width, 0.0) + knee * knee * scale) * slope
+            gain = np.exp((makeup - reduction) * _DB_TO_LN)
+            x[c, i, 0] *= gain
+            x[c, i, 1] *= gain
+        held[c] = h
+        smooth[c] = y
+        reduction_db[c] = reduction
+
+
+def _compress_fallback(x, live, attack, release, held, smooth, settings, floor_db, reduction_db):
+    for c in np.flatnonzero(live):
+        peak = np.maximum(np.abs(x[c]).max(axis=1), 10.0 ** (floor_db / 20.0))
+        level = (20.0 * np.log10(peak))[:, None]
+        _envelope_fallback(level, attack[c:c + 1], release[c:c + 1], held[c:c + 1], smooth[c:c + 1])
+        slope, start, width, scale, makeup = settings[:, c]
+        over = level[:, 0] - start
+        knee = np.clip(over, 0.0, width)
+        reduction = (np.maximum(over - width, 0.0) + knee * knee * scale) * slope
+        x[c] *= np.exp((makeup - reduction) * _DB_TO_LN)[:, None].astype(x.dtype)
+        reduction_db[c] = reduction[-1]
+
+
+def _fir_history(ext, x, hist):
+    frames = x.shape[0]
+    ext[hist:hist + frames] = x
+    windows = np.lib.stride_tricks.sliding_window_view(ext[:hist + frames], hist + 1, axis=0)
+    return frames, windows
+
+
+def _halfband_up_fallback(x, taps, ext, out, delay):
+    hist = taps.shape[0] - 1 + delay
+    centre = taps.shape[0] // 2 - 1 + delay
+    frames, windows = _fir_history(ext, x, hist)
+    out[0::2] = windows[:frames, ..., :taps.shape[0]] @ taps[::-1]
+    out[1::2] = ext[hist - centre:hist - centre + frames]
+    ext[:hist] = ext[frames:frames + hist].copy()
+
+
+def _halfband_down_fallback(u, taps, ext_even, ext_odd, out):
+    hist = taps.shape[0] - 1
+    centre = taps.shape[0] // 2
+    frames, windows = _fir_history(ext_even, u[0::2], hist)
+    ext_odd[hist:hist + frames] = u[1::2]
+    out[:] = windows @ taps[::-1] + 0.5 * ext_odd[hist - centre:hist - centre + frames]
+    ext_even[:hist] = ext_even[frames:frames + hist].copy()
+    ext_odd[:hist] = ext_odd[frames:frames + hist].copy()
+
+
+if njit is not None:
+    _biquad = njit(cache=True)(_biquad_kernel)
+    _biquad_rows = njit(cache=True)(_biquad_rows_kernel)
+    _compress = njit(cache=True)(_compress_kernel)
+    _true_peak = njit(cache=True)(_true_peak_kernel)
+    _lookahead = njit(cache=True)(_lookahead_kernel)
+    _fft_rows = njit(cache=True, fastmath=True)(_fft_rows_kernel)
+    _rfft = njit(cache=True, fastmath=True)(_rfft_kernel)
+    _irfft = njit(cache=True, fastmath=True)(_irfft_kernel)
+    _spectral_mac = njit(cache=True, fastmath=True)(_spectral_mac_kernel)
+    _accumulate_power = njit(cache=True)(_accumulate_power_kernel)
+    _to_db = njit(cache=True)(_to_db_kernel)
+    _row_peaks = njit(cache=True)(_row_peaks_kernel)
+    _envelope = njit(cache=True)(_envelope_kernel)
+    # fastmath lets the tap sums be reordered and vectorised.
+    _halfband_up = njit(cache=True, fastmath=True)(_halfband_up_kernel)
+    _halfband_down = njit(cache=True, fastmath=True)(_halfband_down_kernel)
+    _true_peak_frames = njit(cache=True, fastmath=True)(_true_peak_frames_kernel)
+else:
+    _biquad = _biquad_fallback
+    _biquad_rows = _biquad_rows_fallback
+    _compress = _compress_fallback
+    _true_peak = _true_peak_fallback
+    _true_peak_frames = _true_peak_frames_fallback
+    _lookahead = _lookahead_fallback
+    _rfft = _rfft_fallback
+    _irfft = _irfft_fallback
+    _spectral_mac = _spectral_mac_fallback
+    _accumulate_power = _accumulate_power_fallback
+    _to_db = _to_db_fallback
+    _row_peaks = _row_peaks_fallback
+    _envelope = _envelope_fallback
+    _halfband_up = _halfband_up_fallback
+    _halfband_down = _halfband_down_fallback
+
+
+def rbj_coefficients(kind, freq, sr, q=0.7071, gain_db=0.0):
+    """Biquad coefficients from the RBJ audio EQ cookbook.
+
+    Args:
+        kind (str): "lowpass", "highpass", "allpass", "peak", "lowshelf" or "highshelf"
+        freq (float): Corner or centre frequency in Hz
+        sr (float): Sample rate in Hz
+        q (float): Quality factor
+        gain_db (float): Gain for peak and shelf filters
+
+    Returns:
+        np.ndarray: (b0, b1, b2, a1, a2) normalised so a0 == 1
+    """
+    A = 10.0 ** (gain_db / 40.0)
+    w0 = 2.0 * np.pi * freq / sr
+    cos_w0 = np.cos(w0)
+    alpha = np.sin(w0) / (2.0 * q)
+    if kind == "lowpass":
+        b = ((1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2)
+        a = (1 + alpha, -2 * cos_w0, 1 - alpha)
+    elif kind == "highpass":
+        b = ((1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2)
+        a = (1 + alpha, -2 * cos_w0, 1 - alpha)
+    elif kind == "allpass":
+        b = (1 - alpha, -2 * cos_w0, 1 + alpha)
+        a = (1 + alpha, -2 * cos_w0, 1 - alpha)
+    elif kind == "peak":
+        b = (1 + alpha * A, -2 * cos_w0, 1 - alpha * A)
+        a = (1 + alpha / A, -2 * cos_w0, 1 - alpha / A)
+    elif kind == "lowshelf":
+        sq = 2 * np.sqrt(A) * alpha
+        b = (A * ((A + 1) - (A - 1) * cos_w0 + sq), 2 * A * ((A - 1) - (A + 1) * cos_w0),
+             A * ((A + 1) - (A - 1) * cos_w0 - sq))
+        a = ((A + 1) + (A - 1) * cos_w0 + sq, -2 * ((A - 1) + (A + 1) * cos_w0),
+             (A + 1) + (A - 1) * cos_w0 - sq)
+    elif kind == "highshelf":
+        sq = 2 * np.sqrt(A) * alpha
+        b = (A * ((A + 1) + (A - 1) * cos_w0 + sq), -2 * A * ((A - 1) + (A + 1) * cos_w0),
+             A * ((A + 1) + (A - 1) * cos_w0 - sq))
+        a = ((A + 1) - (A - 1) * cos_w0 + sq, 2 * ((A - 1) - (A + 1) * cos_w0),
+             (A + 1) - (A - 1) * cos_w0 - sq)
+    else:
+        raise ValueError(f"Unknown biquad type '{kind}'")
+    return np.array([b[0], b[1], b[2], a[1], a[2]], dtype=np.float64) / a[0]
+
+
+class BiquadBank:
+    """Cascaded biquads for many rows (channels) at once, with carried state.
+
+    Every row has its own coefficients per section, so a single call filters
+    all channels of the mixer. Coefficients are only touched when a caller
+    changes them; ``process`` just runs the filters.
+
+    Attributes:
+        coeffs (np.ndarray): (sections, 5, rows) b0, b1, b2, a1, a2 per row
+    """
+
+    def __init__(self, rows, sections):
+        self.rows = rows
+        self.sections = sections
+        self.coeffs = np.zeros((sections, 5, rows), dtype=np.float64)
+        self.coeffs[:, 0] = 1.0  # identity until configured
+        self._z1 = np.zeros((sections, rows), dtype=np.float64)
+        self._z2 = np.zeros((sections, rows), dtype=np.float64)
+        self._index = np.zeros(rows, dtype=np.int64)
+        # Compile the kernel now rather than in the first audio callback.
+        warmup = np.zeros((1, rows), dtype=np.float32)
+        _biquad(warmup, self.coeffs, self._z1, self._z2)
+        _biquad_rows(warmup, self.coeffs, self._z1, self._z2, np.zeros(1, dtype=bool), 1e-5, self._index)
+
+    def set_section(self, section, coefficients, rows=slice(None)):
+        """Set (b0, b1, b2, a1, a2) for one section, for all or some rows."""
+        self.coeffs[section, :, rows] = np.asarray(coefficients, dtype=np.float64).reshape(5, -1)
+
+    def reset(self):
+        self._z1.fill(0)
+        self._z2.fill(0)
+
+    def process(self, x):
+        """Filter ``x`` in place; ``x`` is a C-contiguous float32 (frames, rows) array."""
+        _biquad(x, self.coeffs, self._z1, self._z2)
+        return x
+
+    def process_rows(self, x, skip, settled=1e-5):
+        """Filter ``x`` like ``process``, leaving out silent groups of rows.
+
+        Args:
+            x (np.ndarray): C-contiguous float32 (frames, rows) block
+            skip (np.ndarray): (groups,) bool, e.g. one per stereo channel;
+                rows of a marked group are not filtered once their filter
+                state has decayed below ``settled``, so tails still ring out
+            settled (float): State magnitude treated as silent
+
+        Returns:
+            int: Rows that were filtered
+        """
+        return _biquad_rows(x, self.coeffs, self._z1, self._z2, skip, settled, self._index)
+
+
+class LinkwitzRileyCrossover:
+    """4th-order Linkwitz-Riley band split for many rows (channels) at once.
+
+    Each crossover is a pair of cascaded Butterworth low/high-passes run as
+    one ``BiquadBank`` over the rows and their copy. Lower bands also pass
+    through the all-pass response of every crossover above them, so the
+    bands sum back to a flat (all-pass) response.
+
+    Args:
+        rows (int): Channels split per call
+        sr (float): Sample rate in Hz
+        frequencies (sequence): Ascending crossover frequencies in Hz
+        max_frames (int): Largest block ``split`` accepts
+    """
+
+    def __init__(self, rows, sr, frequencies, max_frames):
+        self.rows = rows
+        self.frequencies = tuple(sorted(frequencies))
+        self.bands = len(self.frequencies) + 1
+        self._splits = []
+        self._allpasses = []
+        for k, freq in enumerate(self.frequencies):
+            split = BiquadBank(2 * rows, 2)
+            for section in range(2):
+                split.set_section(section, rbj_coefficients("lowpass", freq, sr), slice(0, rows))
+                split.set_section(section, rbj_coefficients("highpass", freq, sr), slice(rows, 2 * rows))
+            self._splits.append(split)
+            later = self.frequencies[k + 1:]
+            allpass = BiquadBank(rows, len(later)) if later else None
+            for section, above in enumerate(later):
+                allpass.set_section(section, rbj_coefficients("allpass", above, sr))
+            self._allpasses.append(allpass)
+        self._pair = np.zeros((max_frames, 2 * rows), dtype=np.float32)
+        self._rest = np.zeros((max_frames, rows), dtype=np.float32)
+
+    def reset(self):
+        for bank in self._splits + [bank for bank in self._allpasses if bank is not None]:
+            bank.reset()
+
+    def split(self, x, out):
+        """Split ``x`` (frames, rows) into ``out`` (bands, frames, rows), lowest band first."""
+        frames = len(x)
+        pair = self._pair[:frames]
+        rest = self._rest[:frames]
+        np.copyto(rest, x)
+        for k, split in enumerate(self._splits):
+            np.copyto(pair[:, :self.rows], rest)
+            np.copyto(pair[:, self.rows:], rest)
+            split.process(pair)
+            np.copyto(out[k], pair[:, :self.rows])
+            np.copyto(rest, pair[:, self.rows:])
+            if self._allpasses[k] is not None:
+                self._allpasses[k].process(out[k])
+        np.copyto(out[self.bands - 1], rest)
+        return out
+
+
+def true_peak_taps(phases=4, taps_per_phase=12):
+    """Polyphase interpolation filter for true-peak detection (ITU-R BS.1770 style).
+
+    Returns:
+        np.ndarray: (phases, taps_per_phase) filter, each phase with unity DC gain
+    """
+    length = phases * taps_per_phase
+    n = np.arange(length) - (length - 1) / 2.0
+    h = np.sinc(n / phases) * np.kaiser(length, 8.0)
+    taps = h.reshape(taps_per_phase, phases).T.copy()
+    taps /= taps.sum(axis=1, keepdims=True)
+    return taps
+
+
+class EnvelopeFollower:
+    """Attack/release level detector in dB for many rows, with carried state.
+
+    Levels go in as dB and come out as the smoothed envelope, so the output
+    of one block continues exactly where the previous block left off. The
+    release is a constant fall in dB per second (an exponential decay of
+    the linear level), the attack a one-pole smoother on top. Times can
+    differ per row.
+
+    Args:
+        rows (int): Independent detectors (channels)
+        sr (float): Sample rate in Hz
+        attack_ms (float): Attack time constant
+        release_ms (float): Release time constant
+        floor_db (float): Level the detector starts from and falls to
+    """
+
+    def __init__(self, rows, sr, attack_ms=10.0, release_ms=100.0, floor_db=-120.0):
+        self.rows = rows
+        self.sr = sr
+        self.floor_db = floor_db
+        self.attack = np.zeros(rows, dtype=np.float64)
+        self.release = np.zeros(rows, dtype=np.float64)
+        self._held = np.zeros(rows, dtype=np.float64)
+        self._smooth = np.zeros(rows, dtype=np.float64)
+        self.set_times(attack_ms, release_ms)
+        self.reset()
+        _envelope(np.full((1, rows), floor_db, dtype=np.float32), self.attack, self.release,
+                  self._held.copy(), self._smooth.copy())
+
+    def set_times(self, attack_ms, release_ms, rows=slice(None)):
+        """Set attack and release (milliseconds) for all or some rows."""
+        attack_s = np.maximum(np.asarray(attack_ms, dtype=np.float64), 1e-3) / 1000.0
+        release_s = np.maximum(np.asarray(release_ms, dtype=np.float64), 1e-3) / 1000.0
+        self.attack[rows] = np.exp(-1.0 / (attack_s * self.sr))
+        self.release[rows] = 20.0 * np.log10(np.e) / (release_s * self.sr)
+
+    def reset(self):
+        self._held.fill(self.floor_db)
+        self._smooth.fill(self.floor_db)
+
+    @property
+    def level_db(self):
+        """Current envelope per row."""
+        return self._smooth
+
+    def process(self, level_db):
+        """Replace a C-contiguous float32 (frames, rows) block of dB levels with the envelope."""
+        _envelope(level_db, self.attack, self.release, self._held, self._smooth)
+        return level_db
+
+
+def _check_frames(frames, max_frames):
+    # The kernels write a block after the carried history in buffers sized
+    # for max_frames; a longer block would run past their end.
+    if frames > max_frames:
+        raise ValueError(f"Block of {frames} frames is longer than max_frames ({max_frames})")
+
+
+class TruePeakDetector:
+    """Oversampled (4x) peak detector for many rows with carried history.
+
+    Attributes:
+        delay (int): Frames by which ``process_frames`` levels trail the input
+    """
+
+    def __init__(self, rows, max_frames, phases=4, taps_per_phase=12):
+        self.taps = true_peak_taps(phases, taps_per_phase).astype(np.float32)
+        self.delay = taps_per_phase // 2
+        self.max_frames = max_frames
+        self._ext = np.zeros((taps_per_phase - 1 + max_frames, rows), dtype=np.float32)
+        self._acc = np.zeros(rows, dtype=np.float32)
+        _true_peak(np.zeros((1, rows), dtype=np.float32), self.taps, self._ext, self._acc,
+                   np.zeros(rows, dtype=np.float32))
+        _true_peak_frames(np.zeros((1, rows), dtype=np.float32), self.taps, self._ext, self._acc,
+                          np.zeros((1, rows), dtype=np.float32))
+        self.reset()
+
+    def reset(self):
+        self._ext.fill(0)
+
+    def process(self, x, peak):
+        """Update ``peak`` (rows,) with the inter-sample peak of ``x`` (frames, rows)."""
+        _check_frames(len(x), self.max_frames)
+        _true_peak(x, self.taps, self._ext, self._acc, peak)
+        return peak
+
+    def process_frames(self, x, out):
+        """Per-frame true peak of ``x`` (frames, rows) into ``out`` (frames, rows).
+
+        Frame i of ``out`` is the peak of input sample ``i - delay`` and the
+        inter-sample points between it and the next sample. Use either this
+        or ``process`` on one detector, not both.
+        """
+        _check_frames(len(x), self.max_frames)
+        _true_peak_frames(x, self.taps, self._ext, self._acc, out)
+        return out
+
+
+class RealFFT:
+    """Real FFT of a fixed length over many rows, into preallocated arrays.
+
+    numpy's FFT returns a new array every call (and only takes ``out`` from
+    NumPy 2.0), which the audio callback cannot afford. Power-of-two lengths
+    run an allocation-free radix-2 kernel; other lengths, or a missing
+    numba, fall back to numpy and copy.
+
+    Args:
+        n (int): Transform length (even)
+        rows (int): Rows transformed per call
+    """
+
+    def __init__(self, n, rows):
+        if n < 4 or n % 2:
+            raise ValueError(f"RealFFT length must be even and at least 4, got {n}")
+        self.n = n
+        self.rows = rows
+        m = n // 2
+        bits = m.bit_length() - 1
+        self.native = njit is not None and m == 1 << bits
+        self._rfft = _rfft if self.native else _rfft_fallback
+        self._irfft = _irfft if self.native else _irfft_fallback
+        self._rev = np.array([int(format(i, f"0{bits}b")[::-1], 2) if bits else 0 for i in range(m)],
+                             dtype=np.int64)
+        self._twiddle = np.exp(-2j * np.pi * np.arange(max(m // 2, 1)) / m)
+        self._post = np.exp(-2j * np.pi * np.arange(m + 1) / n)
+        self._twiddle_inverse = self._twiddle.conj()
+        self._post_inverse = self._post.conj()
+        self._work = np.zeros((rows, m), dtype=np.complex128)
+        x = np.zeros((rows, n))
+        spectrum = np.zeros((rows, m + 1), dtype=np.complex128)
+        self.forward(x, spectrum)
+        self.inverse(spectrum, x)
+
+    def forward(self, x, out):
+        """Spectrum of ``x`` (rows, n) float64 into ``out`` (rows, n // 2 + 1) complex128."""
+        self._rfft(x, out, self._work, self._rev, self._twiddle, self._post)
+        return out
+
+    def inverse(self, spectrum, out):
+        """Signal of ``spectrum`` (rows, n // 2 + 1) complex128 into ``out`` (rows, n) float64."""
+        self._irfft(spectrum, out, self._work, self._rev, self._twiddle_inverse, self._post_inverse)
+        return out
+
+
+def spectral_mac(a, b, acc):
+    """Add the sum of the products of ``a`` and ``b`` (k, channels, bins) to ``acc`` (channels, bins)."""
+    _spectral_mac(a, b, acc)
+    return acc
+
+
+class LookaheadGain:
+    """Brickwall gain smoothing for a lookahead limiter, many rows at once.
+
+    Takes the gain (dB, <= 0) each frame needs and returns a smooth gain
+    that is never above it ``window`` frames later: a sliding minimum over
+    ``window + 1`` frames, a release that rises at most ``release_ms`` per
+    8.7 dB, and a ``window``-frame moving average, which turns every step
+    into a ramp that is complete by the time the delayed peak arrives.
+    Delay the audio by ``window - 1`` frames (plus any detector delay) to
+    line it up. History carries over between blocks.
+
+    Args:
+        rows (int): Independent gain paths (channels)
+        window (int): Lookahead in frames
+        sr (float): Sample rate in Hz
+        release_ms (float): Release time constant
+        max_frames (int): Largest block ``process`` accepts
+    """
+
+    def __init__(self, rows, window, sr, release_ms=80.0, max_frames=4096):
+        self.rows = rows
+        self.window = max(1, int(window))
+        self.sr = sr
+        self.max_frames = max_frames
+        self.release = np.zeros(rows, dtype=np.float64)
+        self._req_ext = np.zeros((self.window + max_frames, rows), dtype=np.float32)
+        self._rel_ext = np.zeros((self.window - 1 + max_frames, rows), dtype=np.float64)
+        self._held = np.zeros(rows, dtype=np.float64)
+        self._queue = np.zeros(self.window + 1 + max_frames, dtype=np.int64)
+        self.set_release(release_ms)
+        _lookahead(np.zeros((1, rows), dtype=np.float32), self.window, self.release, self._req_ext.copy(),
+                   self._rel_ext.copy(), self._held.copy(), self._queue)
+
+    def set_release(self, release_ms, rows=slice(None)):
+        release_s = np.maximum(np.asarray(release_ms, dtype=np.float64), 1e-3) / 1000.0
+        self.release[rows] = 20.0 * np.log10(np.e) / (release_s * self.sr)
+
+    def reset(self):
+        self._req_ext.fill(0)
+        self._rel_ext.fill(0)
+        self._held.fill(0)
+
+    def process(self, gain_db):
+        """Replace a C-contiguous float32 (frames, rows) block of required gains with the smoothed gain."""
+        _check_frames(len(gain_db), self.max_frames)
+        _lookahead(gain_db, self.window, self.release, self._req_ext, self._rel_ext, self._held, self._queue)
+        return gain_db
+
+
+def accumulate_power(x, peak, sum_squares):
+    """Fold a (frames, rows) block into running per-row peak and sum of squares.
+
+    Args:
+        x (np.ndarray): C-contiguous float32 (frames, rows) block
+        peak (np.ndarray): (rows,) float32 running absolute peak, updated in place
+        sum_squares (np.ndarray): (rows,) float64 running sum of squares, updated in place
+    """
+    _accumulate_power(x, peak, sum_squares)
+
+
+def to_db(values, gain, scale, offset, floor, out):
+    """Convert levels or powers to decibels without allocating.
+
+    Each row of ``values`` (n, k) is summed, multiplied by ``gain`` and
+    written to ``out`` (n,) as ``scale * log10(total) + offset``, clamped to
+    ``floor``. Use ``scale=20`` for amplitudes and ``scale=10`` for powers.
+    """
+    _to_db(values, gain, scale, offset, floor, out)
+    return out
+
+
+def row_peaks(x, out):
+    """Absolute peak of every row of a C-contiguous (rows, samples) array, into ``out``."""
+    _row_peaks(x, out)
+    return out
+
+
+def compress(x, live, follower, settings, reduction_db):
+    """Soft-knee compress a (channels, frames, 2) float32 block in place, channel by channel.
+
+    Each channel's stereo-linked peak runs through its row of ``follower``
+    and a soft-knee gain computer; channels not marked in ``live`` are
+    skipped entirely, follower state included.
+
+    Args:
+        x (np.ndarray): C-contiguous (channels, frames, 2) block
+        live (np.ndarray): (channels,) bool, the channels to process
+        follower (EnvelopeFollower): One row per channel
+        settings (np.ndarray): (5, channels) float32 slope (1 - 1/ratio),
+            knee start dB, knee width dB, 1 / (2 * knee width) and makeup dB
+        reduction_db (np.ndarray): (channels,) gain reduction at the last
+            frame, written for live channels
+    """
+    _compress(x, live, follower.attack, follower.release, follower._held, follower._smooth, settings,
+              follower.floor_db, reduction_db)
+    return x
+
+
+def halfband_taps(num_taps=32, beta=8.0):
+    """Even-phase coefficients of a Kaiser-windowed half-band lowpass.
+
+    The full filter has ``2 * num_taps - 1`` taps: a 0.5 centre tap, zeros
+    at every other position and the ``num_taps`` coefficients returned here,
+    which sum to 0.5 so each polyphase branch has unity DC gain.
+    """
+    if num_taps % 2:
+        raise ValueError("num_taps must be even")
+    length = 2 * num_taps - 1
+    centre = num_taps - 1
+    k = np.arange(length)
+    h = 0.5 * np.sinc((k - centre) / 2.0) * np.kaiser(length, beta)
+    taps = h[0::2].copy()
+    taps *= 0.5 / taps.sum()
+    return taps
+
+
+class HalfBandStage:
+    """One 2x up/down stage with carried filter state for (frames, rows) audio.
+
+    Args:
+        max_frames (int): Largest block at the lower rate
+        rows (int): Channels
+        num_taps (int): Even-phase taps (see ``halfband_taps``)
+        delay (int): Extra input delay in lower-rate samples, e.g. to round
+            a cascade's latency to whole base-rate samples
+
+    Attributes:
+        latency (int): Round-trip (up + down) delay in samples at the lower rate
+    """
+
+    def __init__(self, max_frames, rows, num_taps=32, delay=0):
+        self.taps = halfband_taps(num_taps).astype(np.float32)
+        self._up_taps = self.taps * np.float32(2.0)
+        self.delay = delay
+        self.max_frames = max_frames
+        hist = num_taps - 1
+        self._up_ext = np.zeros((hist + delay + max_frames, rows), dtype=np.float32)
+        self._down_even = np.zeros((hist + max_frames, rows), dtype=np.float32)
+        self._down_odd = np.zeros((hist + max_frames, rows), dtype=np.float32)
+        self.latency = hist + delay
+        # Compile before the first audio block.
+        scratch = np.zeros((2, rows), dtype=np.float32)
+        _halfband_up(scratch[:1], self._up_taps, self._up_ext, scratch, delay)
+        _halfband_down(scratch, self.taps, self._down_even, self._down_odd, scratch[:1])
+        self.reset()
+
+    def reset(self):
+        self._up_ext.fill(0)
+        self._down_even.fill(0)
+        self._down_odd.fill(0)
+
+    def upsample(self, x, out):
+        """Interpolate ``x`` (frames, rows) into ``out`` (2 * frames, rows)."""
+        _check_frames(len(x), self.max_frames)
+        _halfband_up(x, self._up_taps, self._up_ext, out, self.delay)
+        return out
+
+    def downsample(self, u, out):
+        """Decimate ``u`` (2 * frames, rows) into ``out`` (frames, rows)."""
+        _check_frames(len(u) // 2, self.max_frames)
+        _halfband_down(u, self.taps, self._down_even, self._down_odd, out)
+        return out
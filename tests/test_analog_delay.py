@@ -0,0 +1,74 @@
+import types
+import numpy as np
+from src.audio.buffers import AllocationGuard
+from src.mixer.analog_delay import AnalogDelay, delay_seconds_for
+from src.mixer.fx_rack import FXEngine
+
+
+def _run(delay, audio, block, sr=48000, before_block=None):
+    out = audio.copy()
+    for index, start in enumerate(range(0, len(out), block)):
+        if before_block is not None:
+            before_block(index)
+        delay.process(out[start:start + block], sr)
+    return out
+
+
+def _steady(**options):
+    return AnalogDelay(wow_depth_ms=0, flutter_depth_ms=0, mix=1.0, **options)
+
+
+def test_repeats_land_on_the_tempo_grid():
+    sr = 48000
+    impulse = np.zeros((sr, 2), dtype=np.float32)
+    impulse[100] = 1.0
+    out = _run(_steady(bpm=120, division=8, feedback=0.0), impulse, 512)
+    assert np.argmax(out[:, 0]) == 100 + 12000 and abs(out[12100, 0] - 1.0) < 1e-6
+    out = _run(_steady(bpm=100, division=16, feel="dotted", feedback=0.0), impulse, 512)
+    assert np.argmax(out[:, 1]) == 100 + round(delay_seconds_for(100, 16, "dotted") * sr)
+
+
+def test_block_size_does_not_change_the_result_even_below_the_delay_time():
+    sr = 48000
+    audio = np.random.default_rng(0).standard_normal((sr // 2, 2)).astype(np.float32) * 0.3
+    # A 1/64 triplet at 120 BPM is 1000 frames: shorter than a 2048 block
+    outputs = [_run(AnalogDelay(bpm=120, division=64, feel="triplet", feedback=0.6), audio, block)
+               for block in (64, 2048)]
+    np.testing.assert_allclose(outputs[0], outputs[1], atol=1e-5)
+
+
+def test_tempo_changes_glide_without_clicks():
+    sr = 48000
+    t = np.arange(2 * sr) / sr
+    tone = np.repeat((0.5 * np.sin(2 * np.pi * 330 * t)).astype(np.float32)[:, None], 2, axis=1)
+    sampler = types.SimpleNamespace(current_bpm=120)
+    delay = AnalogDelay(tempo=sampler, division=8, feedback=0.4, mix=1.0, glide_ms=100)
+
+    def jump(index):
+        if index == 100:
+            sampler.current_bpm = 90  # 250 ms -> 333 ms
+
+    out = _run(delay, tone, 256, before_block=jump)
+    # A hard switch would jump between unrelated phases of the tone
+    assert np.max(np.abs(np.diff(out[sr // 2:, 0]))) < 0.1
+    assert abs(delay._delay - sr / 3) < 1.0
+    assert delay.delay_seconds == delay_seconds_for(90)
+
+
+def test_steady_state_blocks_do_not_allocate_and_the_send_uses_it():
+    delay = AnalogDelay()
+    audio = np.random.default_rng(1).standard_normal((512, 2)).astype(np.float32)
+    guard = AllocationGuard(warmup_blocks=2)
+    try:
+        for _ in range(16):
+            guard.begin()
+            delay.process(audio, 48000)
+            guard.end()
+    finally:
+        guard.stop()
+    assert guard.violations == []
+
+    sampler = types.SimpleNamespace(current_bpm=140)
+    fx = FXEngine(sends=True, tempo=sampler)
+    assert isinstance(fx.sends[-1], AnalogDelay) and fx.sends[-1].tempo is sampler
+    assert len(fx._send_stages) == 2  # reverb + chorus merged, then the delay
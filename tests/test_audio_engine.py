@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+import soundfile as sf
+from src.audio.engine import AudioEngine
+from src.audio.backends import NullBackend, create_backend
+
+
+def test_null_backend_renders_mix(tmp_path):
+    out_file = tmp_path / "render.wav"
+    engine = AudioEngine(sr=48000, buffer_size=256, backend="null", output_path=str(out_file))
+    tone = np.full((256, 2), 0.25, dtype=np.float32)
+    engine.add_audio(tone)
+    engine.backend.run_blocks(4)
+    engine.stop()
+
+    rendered, sr = sf.read(str(out_file), dtype="float32")
+    assert sr == 48000
+    assert rendered.shape == (1024, 2)
+    assert np.allclose(rendered[:256], 0.25)
+    assert np.allclose(rendered[256:], 0.0)
+
+
+def test_null_backend_threaded_run_collects_stats():
+    calls = []
+    backend = NullBackend(lambda out, inp: calls.append(len(out)), buffer_size=128,
+                          realtime=False, max_blocks=50)
+    backend.start()
+    backend.wait(timeout=5)
+    stats = backend.stats()
+    assert stats["blocks"] == 50
+    assert calls == [128] * 50
+    assert stats["max_us"] >= stats["mean_us"] > 0
+
+
+def test_unknown_backend_raises():
+    with pytest.raises(ValueError):
+        create_backend("jack", lambda out, inp: None)
+
+
+def test_debug_allocations_steady_state_callback_allocates_nothing():
+    engine = AudioEngine(sr=48000, buffer_size=512, backend="null", debug_allocations=True)
+    engine.backend.run_blocks(64)
+    guard = engine.allocation_guard
+    assert guard.blocks == 64
+    assert guard.violations == []
+
+
+def test_master_volume_is_smoothed_across_blocks():
+    engine = AudioEngine(sr=48000, buffer_size=480, backend="null")
+    engine.set_master_volume(0.0)
+    engine.add_audio(np.ones((480, 2), dtype=np.float32))
+    out = engine.backend.run_blocks(1)
+    # The first block fades from unity towards silence instead of stepping
+    assert out[0, 0] > out[-1, 0] > 0.0
+    assert np.all(np.diff(out[:, 0]) <= 0)
+
+
+def test_channel_audio_is_panned_and_muted_through_the_mixer():
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=4, backend="null")
+    engine.set_volume(1, 1.0)
+    engine.set_pan(1, -1.0)
+    engine.set_mute(2, True)
+    for _ in range(64):  # let parameter smoothing settle
+        engine.backend.run_blocks(1)
+    engine.add_audio(np.ones(256, dtype=np.float32), channel_id=1)
+    engine.add_audio(np.ones(256, dtype=np.float32), channel_id=2)
+    out = engine.backend.run_blocks(1)
+    np.testing.assert_allclose(out[:, 0], 1.0, atol=1e-4)
+    np.testing.assert_allclose(out[:, 1], 0.0, atol=1e-4)
+
+
+def test_line_in_is_monitored_in_the_same_block():
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=4, backend="null", input_channels=2,
+                         debug_allocations=True)
+    engine.set_volume(2, 1.0)
+    engine.set_pan(2, -1.0)
+    engine.route_line_in(2, input_channel=1)
+    engine.backend.indata[:, 1] = 0.5
+    for _ in range(64):
+        out = engine.backend.run_blocks(1)
+    np.testing.assert_allclose(out[:, 0], 0.5, atol=1e-4)
+    np.testing.assert_allclose(out[:, 1], 0.0, atol=1e-4)
+    assert engine.allocation_guard.violations == []
+
+    engine.unroute_line_in(2)
+    out = engine.backend.run_blocks(1)
+    np.testing.assert_allclose(out, 0.0, atol=1e-4)
+
+
+def test_capture_is_opt_in():
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=2, backend="null")
+    assert engine.backend.indata is None
+    engine.route_line_in(1)
+    assert engine.line_in_routes == {}
+
+
+def test_loopback_latency_is_one_period_on_the_null_backend():
+    engine = AudioEngine(sr=48000, buffer_size=128, num_channels=2, backend="null", input_channels=2,
+                         realtime=False, loopback=True)
+    engine.start()
+    try:
+        result = engine.measure_loopback_latency(input_channel=0, timeout=1.0)
+    finally:
+        engine.stop()
+    assert result["samples"] == 128
+    assert result["ms"] == pytest.approx(128 / 48000 * 1000)
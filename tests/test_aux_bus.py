@@ -0,0 +1,96 @@
+import numpy as np
+from pedalboard import Pedalboard
+from src.audio.engine import AudioEngine
+from src.mixer.fx_rack import FXEngine
+
+
+class CountingEffect:
+    """Pass-through 'effect' that counts how often it runs."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def process(self, audio, sample_rate, reset=False):
+        self.calls += 1
+        return audio.copy()
+
+
+def _engine(num_channels=32):
+    effect = CountingEffect()
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=num_channels, backend="null",
+                         input_channels=0, metering=False, aux_buses={"verb": effect})
+    for channel_id in range(1, num_channels + 1):
+        engine.set_volume(channel_id, 0.0)  # only the returns are heard
+    for _ in range(64):
+        engine.backend.run_blocks(1)
+    return engine, effect
+
+
+def test_one_shared_effect_serves_every_channel():
+    engine, effect = _engine()
+    for channel_id in range(1, 33):
+        engine.set_send(channel_id, "verb", 0.5, pre_fader=True)
+    effect.calls = 0
+    for channel_id in range(1, 33):
+        engine.add_audio(np.full(256, 0.01, dtype=np.float32), channel_id=channel_id)
+    out = engine.backend.run_blocks(1)
+    assert effect.calls == 1
+    # 32 channels x 0.01 x 0.5 send at the centre-pan level
+    np.testing.assert_allclose(out[-1], 32 * 0.01 * 0.5 * np.sqrt(0.5), rtol=1e-4)
+
+
+def test_pre_and_post_fader_taps():
+    engine, effect = _engine(num_channels=2)
+    engine.set_send(1, "verb", 1.0)  # post-fader, fader at zero
+    engine.set_send(2, "verb", 1.0, pre_fader=True)
+    for _ in range(2):
+        engine.add_audio(np.full(256, 0.1, dtype=np.float32), channel_id=1)
+        out = engine.backend.run_blocks(1)
+    assert np.abs(out).max() < 1e-6
+    for _ in range(2):
+        engine.add_audio(np.full(256, 0.1, dtype=np.float32), channel_id=2)
+        out = engine.backend.run_blocks(1)
+    np.testing.assert_allclose(out[-1], 0.1 * np.sqrt(0.5), rtol=1e-4)
+
+
+def test_silent_aux_is_skipped_and_return_level_applies():
+    engine, effect = _engine(num_channels=2)
+    effect.calls = 0
+    engine.backend.run_blocks(4)
+    assert effect.calls == 0
+    engine.set_send(1, "verb", 1.0, pre_fader=True)
+    before = engine.config.current
+    engine.set_aux_return("verb", 0.5)
+    # Published as a new snapshot; the one a block may be using is untouched
+    assert before.aux_buses[0][1].return_level == 1.0
+    assert engine.config.current.aux_buses[0][1].return_level == 0.5
+    engine.add_audio(np.full(256, 0.2, dtype=np.float32), channel_id=1)
+    out = engine.backend.run_blocks(1)
+    np.testing.assert_allclose(out[-1], 0.2 * np.sqrt(0.5) * 0.5, rtol=1e-4)
+
+
+def test_fx_engine_without_own_sends_is_inserts_only():
+    fx = FXEngine(sends=False)
+    fx.inserts = Pedalboard([])
+    audio = np.full((256, 2), 0.25, dtype=np.float32)
+    out = np.zeros_like(audio)
+    fx.nonlinear = []
+    fx.process_block(audio, 48000, out)
+    np.testing.assert_array_equal(out, audio)
+
+
+def test_default_delay_bus_follows_the_engine_tempo():
+    class Tempo:
+        current_bpm = 100.0
+
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=2, backend="null", metering=False, tempo=Tempo())
+    engine.set_volume(1, 0.0)
+    engine.set_send(1, "delay", 1.0, pre_fader=True)
+    engine.backend.run_blocks(4)
+    impulse = np.zeros(256, dtype=np.float32)
+    impulse[0] = 1.0
+    engine.add_audio(impulse, channel_id=1)
+    out = np.concatenate([engine.backend.run_blocks(1).copy() for _ in range(64)])
+    # First repeat one 1/8 note at 100 BPM (0.3 s) later, give or take the wow
+    echo = int(np.argmax(np.abs(out).max(axis=1)))
+    assert abs(echo - int(0.3 * 48000)) < 64
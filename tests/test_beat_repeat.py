@@ -0,0 +1,102 @@
+import types
+import numpy as np
+from src.audio.buffers import AllocationGuard
+from pedalboard import Pedalboard
+from src.mixer.beat_repeat import BeatRepeat, slice_frames
+from src.mixer.freeze import insert_signature
+from src.mixer.fx_rack import STUTTER, FXEngine
+
+
+def _run(repeat, audio, block, events=()):
+    # events: (block index, callable) run before that block is processed
+    out = audio.copy()
+    for index, start in enumerate(range(0, len(out), block)):
+        for at_block, event in events:
+            if at_block == index:
+                event()
+        repeat.process(out[start:start + block])
+    return out
+
+
+def test_trigger_is_sample_accurate_and_loops_the_captured_slice():
+    sr = 48000
+    ramp = np.repeat(np.arange(sr, dtype=np.float32)[:, None], 2, axis=1)
+    length = slice_frames(120, 16, sr)
+    outputs = []
+    for block in (128, 500):
+        repeat = BeatRepeat(sr, bpm=120, max_block=512)
+        out = _run(repeat, ramp, block, [(0, lambda: repeat.trigger(16, at=10007))])
+        outputs.append(out)
+        np.testing.assert_array_equal(out[:10007], ramp[:10007])
+        frames = np.arange(10007 + repeat.fade, 40000)
+        expected = 10007 - length + (frames - 10007) % length
+        # Past each loop point's fade, the output is the slice, sample for sample
+        steady = (frames - 10007) % length >= repeat.fade
+        np.testing.assert_array_equal(out[frames[steady], 0], expected[steady])
+    np.testing.assert_allclose(outputs[0], outputs[1])
+
+
+def test_loop_points_and_release_do_not_click():
+    sr = 48000
+    t = np.arange(sr) / sr
+    tone = np.repeat((0.5 * np.sin(2 * np.pi * 441.3 * t)).astype(np.float32)[:, None], 2, axis=1)
+    repeat = BeatRepeat(sr, bpm=133, max_block=256)
+    out = _run(repeat, tone, 256, [(10, lambda: repeat.trigger(32)),
+                                   (100, lambda: repeat.release(at=repeat.position + 100))])
+    # Hard cuts between unrelated phases would jump by up to 1.0
+    assert np.max(np.abs(np.diff(out[:, 0]))) < 0.1
+    assert not repeat.active
+    np.testing.assert_array_equal(out[-sr // 4:], tone[-sr // 4:])
+
+
+def test_steady_state_blocks_do_not_allocate():
+    block = 256
+    repeat = BeatRepeat(48000, max_block=block)
+    audio = np.random.default_rng(0).standard_normal((block, 2)).astype(np.float32)
+    guard = AllocationGuard(warmup_blocks=4)
+    try:
+        for index in range(64):
+            if index % 16 == 8:
+                repeat.trigger(64, at=repeat.position + 31)
+            if index % 16 == 12:
+                repeat.release(at=repeat.position + 7)
+            guard.begin()
+            repeat.process(audio)
+            guard.end()
+    finally:
+        guard.stop()
+    assert guard.violations == []
+
+
+def test_midi_notes_pick_divisions_at_the_sampler_tempo():
+    sampler = types.SimpleNamespace(current_bpm=90)
+    repeat = BeatRepeat(48000, tempo=sampler, max_block=128)
+    assert repeat.note_on(38)  # D1 -> 1/16
+    assert not repeat.note_on(60)
+    repeat.process(np.zeros((128, 2), dtype=np.float32))
+    assert repeat.active and repeat.division == 16
+    assert repeat._length == slice_frames(90, 16, 48000)
+    repeat.note_off(38)
+    for _ in range(4):
+        repeat.process(np.zeros((128, 2), dtype=np.float32))
+    assert not repeat.active
+
+
+def test_fx_engine_stutter_is_a_toggleable_insert_left_out_of_freezes():
+    sampler = types.SimpleNamespace(current_bpm=150)
+    fx = FXEngine(tempo=sampler)
+    fx.inserts = Pedalboard([])
+    fx.nonlinear = []
+    assert fx.stutter.current_bpm == 150 and STUTTER not in fx.chain.enabled
+    fx.toggle_effect(1, STUTTER, True)
+    assert fx.chain.active_plugins() == [fx.stutter] and insert_signature(fx) == ()
+
+    ramp = np.repeat(np.arange(16384, dtype=np.float32)[:, None], 2, axis=1)
+    out = np.zeros((256, 2), dtype=np.float32)
+    for start in range(0, len(ramp), 256):
+        if start == 8192:
+            assert fx.stutter.note_on(38, 1.0)  # the 1/16 pad
+        fx.process_block(ramp[start:start + 256], 48000, out, inserts=start < 12288)
+    # Still repeating after the track switched to its frozen (inserts off) path
+    length = slice_frames(150, 16, 48000)
+    assert fx.stutter.active and out[-1, 0] == 8192 - length + (16383 - 8192) % length
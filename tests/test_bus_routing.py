@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from src.audio.buffers import AllocationGuard
+from src.mixer.bus_routing import DEFAULT_BUSES, BusRouter
+
+
+def test_sources_accumulate_in_place_and_level_applies_once():
+    router = BusRouter(block_size=256)
+    assert set(router.buses) == set(DEFAULT_BUSES)
+    router.add_to_bus("reverb", np.full((256, 2), 1.0, dtype=np.float32))
+    router.add_to_bus("reverb", np.full(256, 0.5, dtype=np.float32))  # mono feeds both sides
+    router.add_to_bus("missing", np.ones((256, 2), dtype=np.float32))
+    mix = router.mix_bus("reverb")
+    np.testing.assert_allclose(mix, 1.5 * 0.3)
+    assert router.mix_bus("missing").shape == (256, 2) and not router.mix_bus("missing").any()
+    router.clear_buses()
+    assert not router.mix_bus("reverb").any()
+
+
+def test_buses_are_dynamic_and_routed_in_order():
+    router = BusRouter(block_size=64, buses={"drums": 0.5, "group": 1.0, "master": 1.0})
+    router.add_bus("fx", 2.0)
+    router.route("drums", "group")
+    router.route("fx", "group")
+    router.route("group", "master")
+    with pytest.raises(ValueError):
+        router.route("master", "drums")
+    assert router.routes["group"] == "master" and "master" not in router.routes
+    router.add_to_bus("drums", np.ones((64, 2), dtype=np.float32))
+    router.add_to_bus("fx", np.ones((64, 2), dtype=np.float32))
+    router.process()
+    np.testing.assert_allclose(router.buses["master"]["mix"], 0.5 + 2.0)
+    router.process()  # routed buses are not counted twice
+    np.testing.assert_allclose(router.buses["master"]["mix"], 0.5 + 2.0)
+    np.testing.assert_allclose(router.buses["group"]["sum"], 0.0)
+    router.remove_bus("group")
+    assert "group" not in router.buses and router.routes == {}
+
+
+def test_num_buses_stays_the_first_positional_argument():
+    router = BusRouter(4)
+    assert router.block_size == 1024 and set(router.buses) == set(DEFAULT_BUSES)
+    with pytest.raises(TypeError):
+        BusRouter(4, 256)
+
+
+def test_bus_mixing_allocates_nothing():
+    router = BusRouter(block_size=512)
+    sources = [np.ones((512, 2), dtype=np.float32) for _ in range(16)]
+    guard = AllocationGuard(warmup_blocks=1)
+    for _ in range(4):
+        guard.begin()
+        for source in sources:
+            router.add_to_bus("main", source)
+        router.process()
+        router.mix_bus("delay")
+        router.clear_buses()
+        guard.end()
+    assert guard.violations == []
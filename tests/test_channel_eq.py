@@ -0,0 +1,76 @@
+import numpy as np
+from src.audio.buffers import AllocationGuard
+from src.audio.engine import AudioEngine
+from src.mixer.channel_eq import EQ_STYLES, ChannelEQ
+
+
+def _level_db(eq, freq, channels, sr=48000, block=512, seconds=0.5):
+    t = np.arange(int(sr * seconds)) / sr
+    tone = np.sin(2 * np.pi * freq * t).astype(np.float32)
+    out = []
+    for start in range(0, len(t) - block + 1, block):
+        inputs = np.repeat(tone[None, start:start + block, None], 2, axis=2).repeat(channels, axis=0)
+        eq.process(inputs)
+        out.append(inputs[:, :, 0])
+    tail = np.concatenate(out, axis=1)[:, -sr // 10:]
+    return 20 * np.log10(np.sqrt(2 * np.mean(tail ** 2, axis=1)))
+
+
+def test_bands_shape_each_channel_independently():
+    eq = ChannelEQ(4, 48000, 512)
+    eq.set_gain(0, "low", 12.0)
+    eq.set_gain(1, "mid", -6.0)
+    eq.set_style(2, "british")
+    eq.set_gain(2, "high", 9.0)
+    low = _level_db(eq, 30.0, 4)
+    assert abs(low[0] - 12.0) < 0.5 and abs(low[1]) < 0.3 and abs(low[3]) < 1e-3
+    mid = _level_db(ChannelEQ(2, 48000, 512), 1000.0, 2)
+    assert np.all(np.abs(mid) < 1e-3)  # flat: skipped entirely
+    eq_mid = ChannelEQ(2, 48000, 512)
+    eq_mid.set_gain(1, "mid", -6.0)
+    assert abs(_level_db(eq_mid, EQ_STYLES["clean"][1][0], 2)[1] + 6.0) < 0.1
+    high = _level_db(eq, 20000.0, 4)
+    assert abs(high[2] - 9.0) < 0.5
+
+
+def test_coefficients_are_only_recomputed_for_changes():
+    eq = ChannelEQ(3, 48000, 256)
+    inputs = np.zeros((3, 256, 2), dtype=np.float32)
+    assert not eq.process(inputs) and not eq.active
+    eq.set_gain(1, "low", 3.0)
+    before = eq._staged.copy()
+    eq.set_gain(1, "low", 3.0)  # unchanged
+    eq.process(inputs)
+    assert not eq._dirty
+    eq.set_gain(2, "high", -3.0)
+    changed = np.any(eq._staged != before, axis=(0, 1))
+    np.testing.assert_array_equal(changed, [False, False, False, False, True, True])
+    eq.set_gain(1, "low", 0.0)
+    eq.set_gain(2, "high", 0.0)
+    assert not eq.active
+
+
+def test_processing_does_not_allocate_and_the_engine_drives_it():
+    eq = ChannelEQ(64, 48000, 512)
+    for channel in range(64):
+        eq.set_gain(channel, "mid", 3.0)
+    inputs = np.random.default_rng(0).standard_normal((64, 512, 2)).astype(np.float32)
+    guard = AllocationGuard(warmup_blocks=2)
+    try:
+        for _ in range(8):
+            guard.begin()
+            eq.process(inputs)
+            guard.end()
+    finally:
+        guard.stop()
+    assert guard.violations == []
+
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=2, backend="null", input_channels=0,
+                         metering=False)
+    engine.set_eq(2, "low", 6.0)
+    engine.set_eq_style(2, "vintage")
+    assert engine.channel_eq.gains_db[1, 0] == 6.0 and engine.channel_eq.styles[1] == "vintage"
+    engine.add_audio(np.ones((256, 2), dtype=np.float32), channel_id=2)
+    buffer = np.zeros((256, 2), dtype=np.float32)
+    engine._process_block(buffer)
+    assert not engine.channel_eq._dirty
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from src.audio.buffers import AllocationGuard
+from src.audio.engine import AudioEngine
+from src.mixer.convolution import ConvolutionReverb
+
+
+def _ir(frames, channels=2):
+    rng = np.random.default_rng(0)
+    decay = np.exp(-np.arange(frames) / (frames / 4))
+    return (rng.standard_normal((frames, channels)) * decay[:, None] * 0.1).astype(np.float32)
+
+
+def _run(reverb, audio, block):
+    return np.concatenate([reverb.process(audio[i:i + block]).copy() for i in range(0, len(audio), block)])
+
+
+@pytest.mark.parametrize("tail_partition", [0, None, 1024])
+def test_matches_direct_convolution_without_latency(tail_partition):
+    block = 256
+    ir = _ir(12000)
+    audio = np.random.default_rng(1).standard_normal((block * 80, 2)).astype(np.float32)
+    reverb = ConvolutionReverb(ir, 48000, block, tail_partition=tail_partition)
+    assert reverb.latency_samples == 0
+    expected = np.stack([np.convolve(audio[:, c], ir[:, c])[:len(audio)] for c in range(2)], axis=1)
+    np.testing.assert_allclose(_run(reverb, audio, block), expected, atol=1e-4)
+
+
+def test_steady_state_blocks_do_not_allocate_buffers():
+    block = 512
+    reverb = ConvolutionReverb(_ir(48000, 1), 48000, block)
+    audio = np.random.default_rng(2).standard_normal((block, 2)).astype(np.float32)
+    guard = AllocationGuard(warmup_blocks=16)
+    try:
+        for _ in range(48):
+            guard.begin()
+            reverb.process(audio)
+            guard.end()
+    finally:
+        guard.stop()
+    assert guard.violations == []
+
+
+def test_engine_aux_bus_runs_the_convolution_reverb():
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=1, backend="null", input_channels=0,
+                         metering=False)
+    ir = np.zeros(2000, dtype=np.float32)
+    ir[0] = 0.5
+    reverb = engine.set_convolution_reverb(ir)
+    assert engine.config.current.aux_buses[0][1].chain is reverb
+    assert engine.set_convolution_reverb(np.zeros((10, 3))) is None
+
+
+def test_engine_with_a_convolution_aux_bus_does_not_allocate():
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=2, backend="null", input_channels=0,
+                         metering=False, debug_allocations=True)
+    assert engine.set_convolution_reverb(_ir(9000)) is not None
+    engine.set_volume(1, 1.0)
+    noise = np.random.default_rng(3).standard_normal((256, 2)).astype(np.float32)
+    for _ in range(48):  # past the tail partition boundary several times
+        engine.add_audio(noise, channel_id=1)
+        engine.backend.run_blocks(1)
+    assert engine.allocation_guard.violations == []
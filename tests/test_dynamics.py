@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+from src.audio.buffers import AllocationGuard
+from src.audio.engine import AudioEngine
+from src.mixer.dynamics import BrickwallLimiter, ChannelCompressor
+from src.utils import dsp
+
+
+def _tone_channels(channels, peaks, sr=48000, frames=48128):
+    t = np.arange(frames) / sr
+    tone = np.sin(2 * np.pi * 997.0 * t).astype(np.float32)
+    return np.stack([np.repeat((peak * tone)[:, None], 2, axis=1) for peak in peaks])[:channels]
+
+
+def test_lookahead_and_true_peak_kernels_match_their_fallbacks():
+    rng = np.random.default_rng(0)
+    window, rows, frames = 16, 3, 100
+    required = np.minimum(rng.standard_normal((frames, rows)) * 6, 0).astype(np.float32)
+    release = np.array([0.1, 0.5, 2.0])
+    outputs = []
+    for kernel in (dsp._lookahead_kernel, dsp._lookahead_fallback):
+        state = (np.zeros((window + frames, rows), dtype=np.float32), np.zeros((window - 1 + frames, rows)),
+                 np.zeros(rows), np.zeros(window + 1 + frames, dtype=np.int64))
+        blocks = []
+        for _ in range(3):  # history carries across blocks
+            gain = required.copy()
+            kernel(gain, window, release, *state)
+            blocks.append(gain)
+        outputs.append(np.concatenate(blocks))
+    np.testing.assert_allclose(outputs[0], outputs[1], atol=1e-5)
+    # Never above what the frame window - 1 earlier needed
+    needed = np.concatenate([required] * 3)
+    assert np.all(outputs[0][window - 1:] <= needed[:len(needed) - window + 1] + 1e-4)
+
+    x = rng.standard_normal((64, 2)).astype(np.float32)
+    taps = dsp.true_peak_taps().astype(np.float32)
+    levels = []
+    for kernel in (dsp._true_peak_frames_kernel, dsp._true_peak_frames_fallback):
+        ext, acc, out = np.zeros((75, 2), dtype=np.float32), np.zeros(2, dtype=np.float32), np.zeros_like(x)
+        kernel(x, taps, ext, acc, out)
+        kernel(x, taps, ext, acc, out)
+        levels.append(out)
+    np.testing.assert_allclose(levels[0], levels[1], atol=1e-5)
+
+
+def test_kernels_refuse_blocks_longer_than_max_frames():
+    block = np.zeros((128, 2), dtype=np.float32)
+    detector = dsp.TruePeakDetector(2, 64)
+    stage = dsp.HalfBandStage(64, 2)
+    for call in (lambda: detector.process(block, np.zeros(2, dtype=np.float32)),
+                 lambda: detector.process_frames(block, np.zeros_like(block)),
+                 lambda: dsp.LookaheadGain(2, 16, 48000, max_frames=64).process(block),
+                 lambda: stage.upsample(block, np.zeros((256, 2), dtype=np.float32)),
+                 lambda: stage.downsample(np.zeros((256, 2), dtype=np.float32), block)):
+        with pytest.raises(ValueError):
+            call()
+    # Blocks up to max_frames are fine
+    detector.process(block[:64], np.zeros(2, dtype=np.float32))
+
+def test_limiter_holds_the_true_peak_ceiling_and_passes_quiet_audio():
+    sr, block = 48000, 512
+    rng = np.random.default_rng(1)
+    audio = (rng.standard_normal((block * 120, 2)) * 0.3).astype(np.float32)
+    audio[30000:30040] *= 10.0  # a burst 20 dB over
+    limiter = BrickwallLimiter(sr, block, ceiling_db=-1.0)
+    out = audio.copy()
+    for start in range(0, len(out), block):
+        limiter.process(out[start:start + block])
+    ceiling = 10.0 ** (-1.0 / 20.0)
+    assert np.abs(out).max() <= ceiling
+    detector = dsp.TruePeakDetector(2, len(out))
+    assert detector.process(out, np.zeros(2, dtype=np.float32)).max() <= ceiling * 10.0 ** (0.1 / 20.0)
+
+    quiet = (audio * 0.1).astype(np.float32)
+    limiter.reset()
+    out = quiet.copy()
+    for start in range(0, len(out), block):
+        limiter.process(out[start:start + block])
+    latency = limiter.latency_samples
+    assert latency == limiter.gain.window - 1 + detector.delay
+    np.testing.assert_array_equal(out[latency:], quiet[:-latency])
+
+
+def test_compressor_applies_each_channels_ratio_above_threshold():
+    compressor = ChannelCompressor(3, 48000, 512)
+    compressor.set_channel(1, threshold_db=-20.0, ratio=4.0, knee_db=0.0, attack_ms=1.0, release_ms=50.0)
+    compressor.set_channel(2, threshold_db=-20.0, ratio=2.0, knee_db=0.0, makeup_db=3.0)
+    inputs = _tone_channels(3, (0.5, 0.5, 0.5))  # -6 dBFS peaks, 14 dB over
+    out = []
+    for start in range(0, inputs.shape[1], 512):
+        block = np.ascontiguousarray(inputs[:, start:start + 512])
+        compressor.process(block)
+        out.append(block)
+    peaks_db = 20 * np.log10(np.abs(np.concatenate(out, axis=1)[:, -4800:]).max(axis=(1, 2)))
+    np.testing.assert_allclose(peaks_db, [-6.02, -6.02 - 14 * 0.75, -6.02 - 14 * 0.5 + 3.0], atol=0.1)
+    np.testing.assert_allclose(compressor.gain_reduction_db, [0.0, 10.5, 7.0], atol=0.1)
+    compressor.set_channel(1, ratio=1.0)
+    compressor.set_channel(2, ratio=1.0, makeup_db=0.0)
+    assert not compressor.active and not compressor.process(inputs[:, :512].copy())
+
+
+def test_processing_does_not_allocate_and_the_engine_drives_it():
+    compressor = ChannelCompressor(64, 48000, 512)
+    for channel in range(64):
+        compressor.set_amount(channel, 5)
+    limiter = BrickwallLimiter(48000, 512)
+    rng = np.random.default_rng(2)
+    inputs = rng.standard_normal((64, 512, 2)).astype(np.float32)
+    master = rng.standard_normal((512, 2)).astype(np.float32)
+    guard = AllocationGuard(warmup_blocks=2)
+    try:
+        for _ in range(8):
+            guard.begin()
+            compressor.process(inputs)
+            limiter.process(master)
+            guard.end()
+    finally:
+        guard.stop()
+    assert guard.violations == []
+
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=2, backend="null", input_channels=0,
+                         metering=False)
+    engine.set_compressor(2, 10)
+    assert engine.channel_dynamics.ratio[1] == 6.0 and engine.channel_dynamics.active
+    latency = engine.output_latency
+    engine.set_master_limiter(True, ceiling_db=-3.0)
+    assert engine.output_latency == latency + engine.master_limiter.latency_samples
+    buffer = np.zeros((256, 2), dtype=np.float32)
+    for _ in range(8):
+        engine.add_audio(np.full((256, 2), 2.0, dtype=np.float32))
+        engine._process_block(buffer)
+    assert np.abs(buffer).max() <= 10.0 ** (-3.0 / 20.0) and buffer.max() > 0.5
+    engine.set_master_limiter(False)
+    assert engine.output_latency == latency
@@ -0,0 +1,106 @@
+import time
+import numpy as np
+from src.audio.buffers import process_into
+from src.audio.engine import AudioEngine
+from src.mixer.freeze import ClipPlayer, TrackFreezer, freeze_key, source_digest
+from src.mixer.fx_rack import FXEngine
+
+
+def _source(sr=48000, seconds=0.5):
+    t = np.arange(int(sr * seconds)) / sr
+    mono = 0.5 * np.sin(2 * np.pi * 220 * t) * np.exp(-t * 3)
+    return np.repeat(mono[:, None], 2, axis=1).astype(np.float32)
+
+
+def test_freeze_matches_live_inserts_without_latency(tmp_path):
+    sr, block = 48000, 512
+    source = _source(sr)
+    fx = FXEngine()
+    latency = fx.insert_latency_samples
+    assert latency > 0  # the oversampled distortion
+
+    track = TrackFreezer(sr, block_size=block, cache_dir=str(tmp_path)).freeze(source, fx).result(timeout=30)
+    assert track.audio.dtype == np.float32 and track.audio.shape == source.shape
+
+    live = FXEngine()
+    chunks = []
+    processed = np.zeros((block, 2), dtype=np.float32)
+    for start in range(0, len(source), block):
+        chunk = np.zeros((block, 2), dtype=np.float32)
+        chunk[:len(source[start:start + block])] = source[start:start + block]
+        process_into(live.inserts, chunk, sr, processed)
+        for stage in live.nonlinear:
+            stage.process(processed, sr)
+        chunks.append(processed.copy())
+    live_out = np.concatenate(chunks)[:len(source)]
+    # The render is the live chain's output moved earlier by its latency
+    assert np.allclose(track.audio[:-latency], live_out[latency:], atol=1e-5)
+
+
+def test_cache_is_reused_and_keyed_on_insert_parameters(tmp_path):
+    sr = 48000
+    source = _source(sr, 0.1)
+    fx = FXEngine()
+    freezer = TrackFreezer(sr, cache_dir=str(tmp_path))
+    first = freezer.freeze(source, fx).result(timeout=30)
+    again = freezer.freeze(source, fx)
+    assert again.done() and again.result().path == first.path
+
+    digest = source_digest(source, sr)
+    fx.inserts[1].gain_db = 0.0
+    assert freeze_key(digest, fx) != first.key
+    fx.inserts[1].gain_db = 6.0
+    fx.toggle_effect(1, "Tape", True)
+    assert freeze_key(digest, fx) != first.key
+
+
+def test_clip_player_loops_and_pads():
+    clip = np.arange(10, dtype=np.float32)[:, None].repeat(2, axis=1)
+    out = np.zeros((4, 2), dtype=np.float32)
+    player = ClipPlayer(clip)
+    for _ in range(3):
+        player.render(out)
+    assert out[:, 0].tolist() == [8, 9, 0, 1]
+    once = ClipPlayer(clip, loop=False)
+    for _ in range(3):
+        once.render(out)
+    assert out[:, 0].tolist() == [8, 9, 0, 0]
+
+
+def test_engine_freeze_and_automatic_unfreeze(tmp_path):
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=2, backend="null", input_channels=0,
+                         freeze_cache_dir=str(tmp_path))
+    fx = FXEngine()
+    engine.set_channel_source(1, _source(48000, 0.2))
+    engine.set_channel_fx(1, fx)
+    live_latency = engine.get_channel_latency(1)["plugin"]
+    assert live_latency == fx.latency_samples
+
+    engine.freeze_channel(1).result(timeout=30)
+    assert 1 in engine.frozen_tracks
+    assert engine.get_channel_latency(1)["plugin"] == live_latency - fx.insert_latency_samples
+    engine.backend.run_blocks(4)
+    assert engine.check_frozen_tracks() == []
+
+    fx.inserts[0].threshold_db = -30.0
+    assert engine.check_frozen_tracks() == [1]
+    assert 1 not in engine.frozen_tracks
+    assert engine.get_channel_latency(1)["plugin"] == live_latency
+
+    engine.freeze_channel(1).result(timeout=30)
+    engine.set_channel_source(1, _source(48000, 0.3))
+    assert 1 not in engine.frozen_tracks
+
+    # The watcher runs into a source being removed under it: no KeyError
+    engine.freeze_channel(1).result(timeout=30)
+    engine._source_digests.pop(1)
+    assert engine.check_frozen_tracks() == [1]
+    deadline = time.monotonic() + 5.0
+    while engine._freeze_watch is not None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert engine._freeze_watch is None  # exited with nothing frozen
+    engine.set_channel_source(1, _source(48000, 0.3))
+    engine.freeze_channel(1).result(timeout=30)
+    assert engine._freeze_watch.is_alive()
+    engine.unfreeze_channel(1)
+    engine.stop()
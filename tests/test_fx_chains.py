@@ -0,0 +1,87 @@
+import numpy as np
+from pedalboard import Gain, Pedalboard
+from src.audio.engine import AudioEngine
+from src.mixer.channel_strip import EffectUnit
+from src.mixer.fx_rack import FXEngine
+from src.mixer.insert_chain import InsertChain
+
+
+class CountingStage:
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+
+    def process(self, audio, sample_rate, guard=None):
+        self.calls += 1
+        return audio
+
+
+def test_chains_follow_effect_unit_and_are_cached_per_enabled_set():
+    unit = EffectUnit()
+    first, second = FXEngine(channel_id=1, effect_unit=unit), FXEngine(channel_id=2, effect_unit=unit)
+    assert first.chain.enabled == {"Compressor", "Gain", "Distortion"}
+    default_stages = first.chain._state.stages
+    assert len(default_stages) == 2  # Compressor+Gain merged into one board, then Distortion
+
+    unit.toggle_effect(1, "Saturation", True)
+    assert "Saturation" in first.chain.enabled and "Saturation" not in second.chain.enabled
+    assert first.is_effect_active(1, "Saturation") and first.nonlinear[0].enabled
+    unit.toggle_effect(1, "Saturation", False)
+    assert first.chain._state.stages is default_stages
+
+    unit.toggle_effect(2, "Distortion", False)
+    assert second.insert_latency_samples == 0 and first.insert_latency_samples > 0
+
+
+def test_disabled_effects_are_not_run():
+    fx = FXEngine(sends=False)
+    fx.inserts = Pedalboard([])
+    counter = CountingStage("Counter")
+    fx.nonlinear = [counter]
+    audio = np.full((256, 2), 0.25, dtype=np.float32)
+    out = np.zeros_like(audio)
+    fx.process_block(audio, 48000, out)
+    assert counter.calls == 1
+
+    fx.toggle_effect(1, "Counter", False)
+    for _ in range(4):
+        fx.process_block(audio, 48000, out)
+    assert counter.calls == 2  # only the crossfade block
+    np.testing.assert_array_equal(out, audio)
+
+
+def test_toggling_crossfades_over_one_block():
+    gain = Gain(gain_db=-20.0)
+    chain = InsertChain([("Gain", gain)])
+    block = np.full((512, 2), 0.5, dtype=np.float32)
+    wet = 0.5 * 10 ** (-20 / 20)
+
+    chain.set_enabled(["Gain"])
+    faded = chain.process(block.copy(), 48000)
+    steps = np.diff(faded[:, 0])
+    assert np.all(steps < 0) and np.max(np.abs(steps)) < 0.01
+    assert abs(faded[0, 0] - 0.5) < 0.01 and abs(faded[-1, 0] - wet) < 1e-5
+    np.testing.assert_allclose(chain.process(block.copy(), 48000), wet, rtol=1e-5)
+
+    chain.set_enabled([])
+    faded = chain.process(block.copy(), 48000)
+    assert np.all(np.diff(faded[:, 0]) > 0) and abs(faded[-1, 0] - 0.5) < 1e-6
+    np.testing.assert_array_equal(chain.process(block.copy(), 48000), block)
+
+
+def test_engine_toggles_channel_inserts():
+    engine = AudioEngine(sr=48000, buffer_size=128, num_channels=2, backend="null", metering=False)
+    assert not engine.toggle_channel_effect(1, "Tape", True)
+    fx = FXEngine(sends=False)
+    engine.set_channel_fx(1, fx)
+    assert engine.toggle_channel_effect(1, "Distortion", False)
+    assert fx.insert_latency_samples == 0 and "Distortion" not in fx.chain.enabled
+
+
+def test_inserts_of_the_same_type_toggle_separately():
+    fx = FXEngine()
+    fx.inserts = Pedalboard([Gain(gain_db=-6.0), Gain(gain_db=-12.0)])
+    assert [name for name, _ in fx.chain.effects][:2] == ["Gain", "Gain 2"]
+    fx.toggle_effect(1, "Gain 2", False)
+    assert fx.chain.active_plugins()[0] is fx.inserts[0]
+    assert fx.inserts[1] not in fx.chain.active_plugins()
@@ -0,0 +1,56 @@
+import os
+import numpy as np
+import soundfile as sf
+from src.audio.engine import AudioEngine
+from src.mixer.convolution import ConvolutionReverb
+from src.mixer.ir_cache import IRCache, load_ir
+
+
+def _write_ir(path, sr=44100, seconds=0.5):
+    rng = np.random.default_rng(0)
+    frames = int(sr * seconds)
+    ir = rng.standard_normal((frames, 2)) * np.exp(-np.arange(frames) / (frames / 5))[:, None] * 0.2
+    sf.write(path, ir.astype(np.float32), sr, subtype="FLOAT")
+    return path
+
+
+def test_cached_spectra_are_memory_mapped_and_match_a_fresh_build(tmp_path):
+    path = _write_ir(str(tmp_path / "hall.wav"))
+    cache = IRCache(str(tmp_path / "cache"))
+    first = cache.reverb(path, 48000, 256)
+    head, tail = cache.spectra(path, 48000, 256)
+    assert isinstance(head, np.memmap) and isinstance(tail, np.memmap)
+    assert len(os.listdir(tmp_path / "cache")) == 2
+
+    fresh = ConvolutionReverb(load_ir(path, 48000), 48000, 256)
+    audio = np.random.default_rng(1).standard_normal((256, 2)).astype(np.float32)
+    for _ in range(20):
+        np.testing.assert_allclose(first.process(audio), fresh.process(audio), atol=1e-5)
+
+
+def test_entries_are_keyed_on_content_rate_and_partitioning(tmp_path):
+    path = _write_ir(str(tmp_path / "room.wav"), seconds=0.03)
+    cache = IRCache(str(tmp_path / "cache"))
+
+    def entries():
+        return sorted(name for name in os.listdir(tmp_path / "cache") if name.endswith(".head.npy"))
+
+    cache.spectra(path, 48000, 256)
+    cache.spectra(path, 48000, 256)
+    assert len(os.listdir(tmp_path / "cache")) == 1  # short IR: head only
+    cache.spectra(path, 44100, 256)
+    cache.spectra(path, 48000, 128)
+    _write_ir(path, seconds=0.02)
+    cache.spectra(path, 48000, 256)
+    assert len(entries()) == 4
+    cache.clear()
+    assert os.listdir(tmp_path / "cache") == []
+
+
+def test_engine_loads_reverb_files_through_the_cache(tmp_path):
+    path = _write_ir(str(tmp_path / "plate.wav"), seconds=0.2)
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=1, backend="null", input_channels=0,
+                         metering=False, ir_cache_dir=str(tmp_path / "cache"))
+    reverb = engine.set_convolution_reverb(path)
+    assert isinstance(reverb.head._reversed, np.memmap)
+    assert engine.config.current.aux_buses[0][1].chain is reverb
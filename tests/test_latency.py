@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from src.audio.engine import AudioEngine
+from src.audio.latency import DelayLine, LatencyGraph, MultiDelayLine, plugin_latency
+
+
+class _Plugin:
+    def __init__(self, latency):
+        self.reported_latency_samples = latency
+
+
+def test_plugin_latency_sums_chains():
+    assert plugin_latency(None) == 0
+    assert plugin_latency(_Plugin(64)) == 64
+    assert plugin_latency([_Plugin(64), _Plugin(32)]) == 96
+    from pedalboard import Gain, Pedalboard
+    assert plugin_latency(Pedalboard([Gain()])) == 0
+
+
+def test_graph_aligns_parallel_paths():
+    graph = LatencyGraph()
+    graph.add_node("ch1", 0)
+    graph.add_node("ch2", 256)
+    graph.add_node("reverb", 100)
+    graph.add_edge("ch1", "master")
+    graph.add_edge("ch2", "master")
+    graph.add_edge("ch1", "reverb")
+    graph.add_edge("reverb", "master")
+    output, delays = graph.compensate()
+    assert output["master"] == 256
+    assert delays[("ch1", "master")] == 256
+    assert delays[("ch2", "master")] == 0
+    assert delays[("reverb", "master")] == 156
+    assert delays[("ch1", "reverb")] == 0
+
+
+def test_graph_rejects_feedback_loops():
+    graph = LatencyGraph()
+    graph.add_edge("a", "b")
+    graph.add_edge("b", "a")
+    with pytest.raises(ValueError):
+        graph.compensate()
+
+
+def test_delay_lines_match_shifted_signal():
+    rng = np.random.default_rng(0)
+    signal = rng.standard_normal((3, 64 * 10, 2)).astype(np.float32)
+    delays = [0, 5, 130]
+    multi = MultiDelayLine(3, 200, 64)
+    multi.set_delays(delays)
+    single = DelayLine(200, 64)
+    single.set_delay(130)
+    out = np.empty_like(signal)
+    single_out = np.empty_like(signal[2])
+    for start in range(0, signal.shape[1], 64):
+        block = signal[:, start:start + 64].copy()
+        out[:, start:start + 64] = multi.process(block)
+        single_out[start:start + 64] = single.process(signal[2, start:start + 64].copy())
+    for line, delay in enumerate(delays):
+        expected = np.concatenate([np.zeros((delay, 2), np.float32), signal[line, :signal.shape[1] - delay]])
+        np.testing.assert_array_equal(out[line], expected)
+    np.testing.assert_array_equal(single_out, out[2])
+
+
+def test_engine_compensates_channel_latency():
+    engine = AudioEngine(sr=48000, buffer_size=128, num_channels=2, backend="null", debug_allocations=True)
+    engine.set_channel_latency(2, 40)
+    assert engine.get_channel_latency(1) == {"plugin": 0, "compensation": 40, "total": 40}
+    assert engine.get_channel_latency(2) == {"plugin": 40, "compensation": 0, "total": 40}
+    assert engine.output_latency == 40
+
+    engine.set_volume(1, 1.0)
+    for _ in range(64):
+        engine.backend.run_blocks(1)
+    impulse = np.zeros(128, dtype=np.float32)
+    impulse[0] = 1.0
+    engine.add_audio(impulse, channel_id=1)
+    out = engine.backend.run_blocks(1)
+    assert np.argmax(np.abs(out[:, 0])) == 40
+    assert engine.allocation_guard.violations == []
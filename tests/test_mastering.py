@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from src.mixer import mastering
+from src.mixer.mastering import analyse_mix, master_file, plan_master, render_master
+
+sf = pytest.importorskip("soundfile")
+SR = 48000
+
+
+def _write(path, audio, subtype="FLOAT"):
+    sf.write(str(path), audio, SR, subtype=subtype)
+    return str(path)
+
+
+def test_chunked_analysis_matches_one_pass_and_bs1770(tmp_path):
+    t = np.arange(SR * 12) / SR
+    tone = (0.1 * np.sin(2 * np.pi * 997.0 * t)).astype(np.float32)
+    path = _write(tmp_path / "tone.wav", np.stack([tone, tone], axis=1))
+    analysis = analyse_mix(path, workers=1)
+    # A -20 dBFS 997 Hz sine in both channels reads -20 LUFS
+    assert abs(analysis.integrated_lufs + 20.0) < 0.05
+    np.testing.assert_allclose(analysis.true_peak_db, -20.0, atol=0.05)
+    assert analysis.correlation > 0.999 and analysis.side_ratio_db < -100
+    # The same sine in a mono file is 3 dB quieter: one channel, not two
+    mono = analyse_mix(_write(tmp_path / "mono_tone.wav", tone), workers=1)
+    assert abs(mono.integrated_lufs + 23.0) < 0.05
+
+    rng = np.random.default_rng(0)
+    noise = rng.standard_normal((SR * 9, 2)).astype(np.float32) * np.linspace(0.05, 0.5, SR * 9)[:, None]
+    path = _write(tmp_path / "noise.wav", noise)
+    whole = analyse_mix(path, workers=1)
+    for chunked in (analyse_mix(path, chunk_seconds=1.3, workers=1), analyse_mix(path, chunk_seconds=2.0, workers=2)):
+        assert abs(chunked.integrated_lufs - whole.integrated_lufs) < 1e-6
+        np.testing.assert_allclose(chunked.true_peak_db, whole.true_peak_db, atol=1e-5)
+        assert abs(chunked.correlation - whole.correlation) < 1e-9
+
+
+def test_plan_corrects_tilt_width_and_loudness(tmp_path):
+    rng = np.random.default_rng(1)
+    white = (rng.standard_normal((SR * 4, 2)) * 0.05).astype(np.float32)
+    settings = plan_master(analyse_mix(_write(tmp_path / "white.wav", white), workers=1))
+    # White noise is far brighter than the target tilt
+    assert settings["eq"]["low"] > 0 > settings["eq"]["high"]
+    assert settings["width"] < 1.0  # uncorrelated channels: side as loud as mid
+    assert settings["gain_db"] > 0
+
+    mono = np.repeat(white[:, :1], 2, axis=1)
+    settings = plan_master(analyse_mix(_write(tmp_path / "mono.wav", mono), workers=1))
+    assert settings["width"] == mastering.WIDTH_RANGE[1]
+    flipped = np.stack([white[:, 0], -white[:, 0] + 0.1 * white[:, 1]], axis=1)
+    assert plan_master(analyse_mix(_write(tmp_path / "flip.wav", flipped), workers=1))["width"] <= 1.0
+
+
+def test_render_hits_the_target_under_the_ceiling_and_stays_aligned(tmp_path):
+    rng = np.random.default_rng(2)
+    frames = SR * 6 + 123
+    mix = (rng.standard_normal((frames, 2)) * 0.05).astype(np.float32)
+    mix[SR:SR + 20] *= 15.0  # a transient the gain would push over the ceiling
+    source = _write(tmp_path / "mix.wav", mix)
+    settings = master_file(source, str(tmp_path / "master.wav"), target_lufs=-14.0, workers=1)
+    mastered = analyse_mix(str(tmp_path / "master.wav"), workers=1)
+    assert abs(mastered.integrated_lufs + 14.0) < 0.5
+    assert mastered.true_peak_db.max() <= -1.0 + 0.1 and mastered.peak_db.max() <= -1.0
+    assert mastered.frames == frames and settings["gain_db"] > 0
+
+    flat = {"eq": {"low": 0.0, "mid": 0.0, "high": 0.0}, "style": "clean", "width": 1.0, "gain_db": 0.0,
+            "ceiling_db": 0.0, "target_lufs": -14.0}
+    render_master(source, str(tmp_path / "flat.wav"), flat, block_size=1024)
+    out, _ = sf.read(str(tmp_path / "flat.wav"), dtype="float32")
+    # Sample-aligned and untouched away from the limited transient
+    untouched = np.r_[0:SR - 4800, 2 * SR:frames]
+    np.testing.assert_allclose(out[untouched], mix[untouched], atol=1e-6)
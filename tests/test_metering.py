@@ -0,0 +1,83 @@
+import numpy as np
+from src.audio.engine import AudioEngine
+from src.audio.metering import MeterBank
+from src.utils.dsp import TruePeakDetector
+
+
+def _sine(freq, seconds, sr=48000, amplitude=1.0):
+    t = np.arange(int(seconds * sr))
+    return (amplitude * np.sin(2 * np.pi * freq * t / sr)).astype(np.float32)
+
+
+def _feed(meters, left, right, index=0):
+    bs = meters.block_size
+    for start in range(0, len(left) - bs + 1, bs):
+        meters.write_stereo(index, np.stack([left[start:start + bs], right[start:start + bs]], axis=1))
+        meters.process()
+
+
+def test_sine_peak_rms_and_loudness():
+    meters = MeterBank(1, sr=48000, block_size=512)
+    tone = _sine(997, 4.0)
+    _feed(meters, tone, np.zeros_like(tone))
+    levels = meters.read()
+    assert abs(levels["peak_db"][0, 0]) < 0.01
+    assert abs(levels["rms_db"][0, 0] + 3.01) < 0.02
+    assert levels["peak_db"][0, 1] <= -120.0
+    # BS.1770: a full-scale 997 Hz sine in one channel reads -3.01 LUFS
+    assert abs(levels["momentary_lufs"][0] + 3.01) < 0.05
+    assert abs(levels["short_term_lufs"][0] + 3.01) < 0.05
+
+
+def test_true_peak_catches_intersample_overs():
+    meters = MeterBank(1, sr=48000, block_size=480)
+    # fs/4 sine sampled at +-45 degrees: samples peak at 0.707 of the waveform
+    tone = _sine(12000, 1.0)
+    t = np.arange(len(tone))
+    tone = np.sin(2 * np.pi * 12000 * t / 48000 + np.pi / 4).astype(np.float32)
+    _feed(meters, tone, tone)
+    levels = meters.read()
+    assert abs(levels["peak_db"][0, 0] + 3.01) < 0.05
+    assert levels["true_peak_db"][0, 0] > -0.5
+
+
+def test_readings_are_published_at_the_configured_rate():
+    meters = MeterBank(2, sr=48000, block_size=512, publish_hz=30.0)
+    assert meters.publish_every == 3
+    silence = np.zeros(512 * 9, dtype=np.float32)
+    _feed(meters, silence, silence)
+    assert meters.read()["sequence"] == 3
+
+
+def test_true_peak_covers_every_block_between_publishes():
+    meters = MeterBank(1, sr=48000, block_size=64, publish_hz=250.0)
+    assert meters.publish_every == 3
+    noise = np.random.default_rng(3).standard_normal((64 * 3, 2)).astype(np.float32) * 0.1
+    noise[30:32] = [[0.9, 0.9], [-0.9, -0.9]]  # the over is in the first block, not the publishing one
+    _feed(meters, noise[:, 0], noise[:, 1])
+    # Same as one continuous pass over all three blocks
+    detector = TruePeakDetector(2, 64)
+    expected = np.zeros(2, dtype=np.float32)
+    for start in range(0, len(noise), 64):
+        detector.process(noise[start:start + 64], expected)
+    levels = meters.read()
+    np.testing.assert_allclose(levels["true_peak_db"][0], 20 * np.log10(expected), atol=1e-4)
+    assert np.all(levels["true_peak_db"][0] >= levels["peak_db"][0])
+
+    # Silence after the history has run out reads silent again
+    silence = np.zeros(64 * 6, dtype=np.float32)
+    _feed(meters, silence, silence)
+    assert np.all(meters.read()["true_peak_db"][0] <= -120.0)
+
+
+def test_engine_meters_channels_and_master():
+    engine = AudioEngine(sr=48000, buffer_size=512, num_channels=4, backend="null", debug_allocations=True)
+    for _ in range(engine.meters.publish_every):
+        engine.add_audio(np.full(512, 0.5, dtype=np.float32), channel_id=2)
+        engine.backend.run_blocks(1)
+    levels = engine.get_meters()
+    master = engine.meters.index("master")
+    np.testing.assert_allclose(levels["peak_db"][1], 20 * np.log10(0.5), atol=0.01)
+    assert levels["peak_db"][0, 0] <= -120.0
+    assert levels["peak_db"][master, 0] > -120.0
+    assert engine.allocation_guard.violations == []
@@ -0,0 +1,38 @@
+import numpy as np
+from src.audio.parameters import LINEAR, ParameterStore
+
+
+def test_one_pole_smoothing_converges_without_jumps():
+    store = ParameterStore(sr=48000, block_size=480, smoothing_ms=50.0)
+    pid = store.register("ch1.volume", default=0.0)
+    store.set(pid, 1.0)
+    values = []
+    for _ in range(200):
+        store.process_block()
+        values.append(store.get(pid))
+    assert 0.0 < values[0] < 0.5
+    assert np.all(np.diff(values) >= 0)
+    assert values[-1] == 1.0
+
+
+def test_linear_smoothing_and_clamping():
+    store = ParameterStore(sr=48000, block_size=480, smoothing_ms=100.0)
+    pid = store.register("ch1.pan", default=0.0, minimum=-1.0, maximum=1.0, mode=LINEAR)
+    store.set(pid, 5.0)  # clamped to the maximum
+    store.process_block()
+    # Full range (2.0) in 10 blocks -> 0.2 per block
+    assert np.isclose(store.get(pid), 0.2)
+
+
+def test_ramps_are_per_sample_and_continuous():
+    store = ParameterStore(sr=48000, block_size=64, smoothing_ms=0)
+    first = store.register_group(["a", "b"], default=0.0)
+    store.set(first, 1.0)
+    store.set(first + 1, 0.5)
+    store.process_block()
+    out = np.zeros((2, 64), dtype=np.float32)
+    store.ramps(first, 2, out)
+    assert np.isclose(out[0, -1], 1.0) and np.isclose(out[1, -1], 0.5)
+    assert np.all(np.diff(out[0]) > 0)
+    single = np.zeros(64, dtype=np.float32)
+    np.testing.assert_allclose(store.ramp(first, single), out[0])
@@ -0,0 +1,109 @@
+import time
+import numpy as np
+from src.audio.engine import AudioEngine
+from src.audio.plugin_host import DUMMY_PLUGIN, PluginHost
+
+
+def _block(frames=256, value=0.5):
+    return np.full((frames, 2), value, dtype=np.float32)
+
+
+def test_dummy_plugin_runs_out_of_process():
+    host = PluginHost(DUMMY_PLUGIN, 48000, 256, options={"gain": 0.5, "latency_samples": 64}).start()
+    try:
+        assert host.latency_samples == 64
+        for _ in range(20):
+            block = _block()
+            assert host.process(block)
+            assert np.allclose(block, 0.25)
+        stats = host.cpu_stats()
+        assert stats["blocks"] == 20 and stats["timeouts"] == 0
+        assert stats["max_us"] >= stats["mean_us"] > 0
+    finally:
+        host.close()
+
+
+def test_slow_plugin_is_replaced_with_silence():
+    # 20 ms per block against a 5.3 ms budget
+    host = PluginHost(DUMMY_PLUGIN, 48000, 256, options={"process_ms": 20.0}).start()
+    try:
+        block = _block()
+        assert not host.process(block)
+        assert np.all(block == 0)
+        assert host.timeouts == 1
+    finally:
+        host.close()
+
+
+def test_crashed_plugin_is_bypassed_with_silence():
+    host = PluginHost(DUMMY_PLUGIN, 48000, 256, timeout_ms=200, options={"crash_after": 2}).start()
+    try:
+        assert host.process(_block()) and host.process(_block())
+        for _ in range(3):
+            block = _block()
+            assert not host.process(block)
+            assert np.all(block == 0)
+        assert host.crashed
+    finally:
+        host.close()
+
+
+def test_engine_hosts_channel_plugins():
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=2, backend="null", input_channels=0,
+                         metering=False)
+    host = engine.load_vst3_plugin(DUMMY_PLUGIN, 1, timeout_ms=1000, options={"gain": 2.0, "latency_samples": 32})
+    try:
+        assert host is not None
+        assert engine.get_channel_latency(1)["plugin"] == 32
+        assert engine.get_channel_latency(2)["compensation"] == 32
+        engine.set_volume(1, 1.0)
+        engine.add_audio(_block(value=0.1)[:, :1].ravel(), channel_id=1)
+        engine.backend.run_blocks(1)
+        assert engine.get_plugin_stats(1)[DUMMY_PLUGIN]["blocks"] == 1
+    finally:
+        engine.unload_vst3_plugins(1)
+    assert engine.get_channel_latency(1)["plugin"] == 0
+    # Closed only once the callback is past the snapshot that used it
+    assert host.cpu_stats()["blocks"] == 1 and engine.config.deferred == 1
+    engine.backend.run_blocks(1)
+    engine.config.reclaim()
+    assert host.cpu_stats()["blocks"] == 0 and engine.config.deferred == 0
+
+
+def test_stalled_plugins_share_one_deadline_per_callback():
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=2, backend="null", input_channels=0,
+                         metering=False)
+    hosts = [engine.load_vst3_plugin(DUMMY_PLUGIN, channel, timeout_ms=100, options={"process_ms": 500.0})
+             for channel in (1, 2)]
+    try:
+        start = time.perf_counter()
+        engine.backend.run_blocks(1)
+        # Both workers were woken before either was waited for
+        assert time.perf_counter() - start < 0.18
+        assert [host.timeouts for host in hosts] == [1, 1]
+    finally:
+        engine.stop()
+        for channel in (1, 2):
+            engine.unload_vst3_plugins(channel)
+        engine.config.reclaim(force=True)
+
+
+def test_plugins_on_silent_channels_stop_running_after_their_tail():
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=2, backend="null", input_channels=0,
+                         metering=False)
+    host = engine.load_vst3_plugin(DUMMY_PLUGIN, 1, timeout_ms=1000)
+    try:
+        engine._plugin_gates[host].configure(gap_seconds=0.02)
+        engine.add_audio(_block(value=0.1)[:, :1].ravel(), channel_id=1)
+        engine.backend.run_blocks(16)
+        ran = host.cpu_stats()["blocks"]
+        assert 1 <= ran < 16
+        engine.backend.run_blocks(16)
+        assert host.cpu_stats()["blocks"] == ran
+        # Sound on the channel wakes it straight away
+        engine.add_audio(_block(value=0.1)[:, :1].ravel(), channel_id=1)
+        engine.backend.run_blocks(1)
+        assert host.cpu_stats()["blocks"] == ran + 1
+    finally:
+        engine.unload_vst3_plugins(1)
+        engine.config.reclaim(force=True)
@@ -0,0 +1,55 @@
+import json
+import os
+import pytest
+import src.audio.plugin_scan as plugin_scan
+from src.audio.plugin_host import DUMMY_MANIFEST
+from src.audio.plugin_scan import PluginScanner, find_bundles
+
+
+def _bundle(folder, bundle, **options):
+    path = folder / f"{bundle}.vst3"
+    path.mkdir(parents=True)
+    (path / DUMMY_MANIFEST).write_text(json.dumps(options))
+    return str(path)
+
+
+@pytest.fixture
+def plugins(tmp_path):
+    folder = tmp_path / "vst3"
+    good = _bundle(folder, "Good", name="Good", latency_samples=12)
+    crash = _bundle(folder / "vendor", "Crash", crash_on_load=True)
+    hang = _bundle(folder, "Hang", load_ms=20000)
+    return folder, good, crash, hang
+
+
+def test_scan_probes_in_subprocesses_and_blacklists_failures(tmp_path, plugins):
+    folder, good, crash, hang = plugins
+    assert find_bundles(folder) == sorted([good, crash, hang])
+    scanner = PluginScanner(str(tmp_path / "cache.json"), timeout=3.0)
+    found = scanner.scan(str(folder))
+    assert [(p["name"], p["vendor"], p["latency_samples"], p["path"]) for p in found] == [
+        ("Good", "TuxTrax", 12, good)]
+    assert found[0]["parameters"] == ["gain"]
+    blacklisted = scanner.blacklisted()
+    assert blacklisted[crash].startswith("failed")
+    assert blacklisted[hang].startswith("timeout")
+
+
+def test_cache_only_reprobes_changed_bundles(tmp_path, plugins, monkeypatch):
+    folder, good, crash, hang = plugins
+    cache = str(tmp_path / "cache.json")
+    PluginScanner(cache, timeout=3.0).scan(str(folder))
+
+    probed = []
+    monkeypatch.setattr(plugin_scan, "probe_bundle", lambda path, timeout: probed.append(path) or
+                        {"mtime": plugin_scan.bundle_mtime(path), "status": "ok",
+                         "plugins": [{"name": "Changed"}], "error": ""})
+    scanner = PluginScanner(cache)
+    assert [p["name"] for p in scanner.scan(str(folder))] == ["Good"]
+    assert probed == []  # everything came from the cache, crashes stay blacklisted
+
+    manifest = os.path.join(good, DUMMY_MANIFEST)
+    stat = os.stat(manifest)
+    os.utime(manifest, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert [p["name"] for p in scanner.scan(str(folder))] == ["Changed"]
+    assert probed == [good]
@@ -0,0 +1,103 @@
+import numpy as np
+from src.mixer.sidechain import SidechainEngine
+from src.utils.dsp import EnvelopeFollower, _envelope_fallback, _envelope_kernel
+
+
+def _kick_pattern(sr, seconds=1.0):
+    t = np.arange(int(sr * seconds)) / sr
+    beat = (t % 0.25) < 0.05  # 16th-note bursts
+    return (np.sin(2 * np.pi * 60 * t) * beat).astype(np.float32)
+
+
+def test_envelope_kernel_and_fallback_agree():
+    rng = np.random.default_rng(0)
+    level = (rng.standard_normal((300, 3)) * 20 - 30).astype(np.float32)
+    attack = np.array([0.9, 0.99, 0.5])
+    release = np.array([0.1, 0.5, 0.01])
+    results = []
+    for step in (_envelope_kernel, _envelope_fallback):
+        held, smooth = np.full(3, -60.0), np.full(3, -60.0)
+        x = level.copy()
+        step(x, attack, release, held, smooth)
+        results.append((x, held, smooth))
+    for a, b in zip(*results):
+        np.testing.assert_allclose(a, b, atol=1e-3)
+
+
+def test_ducking_is_continuous_and_independent_of_block_size():
+    sr = 48000
+    trigger = _kick_pattern(sr)
+    main = np.full((len(trigger), 2), 0.5, dtype=np.float32)
+    outputs = []
+    for block in (64, 256, 1000):
+        engine = SidechainEngine(threshold=-24, ratio=4, attack=5, release=80)
+        outputs.append(np.concatenate([engine.process(main[i:i + block], trigger[i:i + block], sr)
+                                       for i in range(0, len(main), block)]))
+    np.testing.assert_allclose(outputs[0], outputs[1], atol=1e-5)
+    np.testing.assert_allclose(outputs[0], outputs[2], atol=1e-5)
+    # No steps at block edges: the gain moves smoothly sample to sample
+    assert np.max(np.abs(np.diff(outputs[1][:, 0]))) < 0.02
+    assert outputs[0].min() < 0.2 and outputs[0].max() <= 0.5 + 1e-6
+
+
+def test_gain_computer_honours_threshold_and_ratio():
+    sr = 48000
+    engine = SidechainEngine(threshold=-24, ratio=4, attack=1, release=50)
+    loud = np.ones(sr // 4, dtype=np.float32)  # 0 dBFS: 24 dB over, 18 dB of reduction
+    gain = engine.gain(loud, sr)
+    assert abs(engine.gain_reduction_db - 18.0) < 0.01
+    assert abs(gain[-1] - 10 ** (-18 / 20)) < 1e-3
+    quiet = np.full(sr // 2, 10 ** (-40 / 20), dtype=np.float32)
+    gain = engine.gain(quiet, sr)
+    assert np.all(np.diff(gain) >= -1e-7) and abs(gain[-1] - 1.0) < 1e-4  # released back to unity
+
+    engine.ratio = 1.0
+    assert np.allclose(engine.gain(loud, sr), 1.0)
+
+
+def test_follower_times_can_differ_per_row():
+    follower = EnvelopeFollower(2, 1000, attack_ms=1.0, release_ms=2.0)
+    follower.set_times(1.0, 1000.0, rows=1)
+    level = np.full((50, 2), -120.0, dtype=np.float32)
+    level[:10] = 0.0
+    follower.process(level)
+    assert level[-1, 0] < -100 and level[-1, 1] > -5
+
+
+def test_lookahead_ducks_before_the_transient_arrives():
+    sr, block = 48000, 256
+    engine = SidechainEngine(threshold=-30, ratio=10, attack=1, release=50, lookahead_ms=5, sr=sr)
+    assert engine.latency_samples == 240
+    trigger = np.zeros(sr // 4, dtype=np.float32)
+    trigger[4800:] = 1.0  # kick at 100 ms
+    main = np.ones((len(trigger), 2), dtype=np.float32)
+    out = np.concatenate([engine.process(main[i:i + block], trigger[i:i + block], sr)
+                          for i in range(0, len(main), block)])
+    assert np.all(out[:240] == 0)  # the delay line starts empty
+    # The main signal is 240 samples late, so the gain is already down when
+    # the (delayed) frame that coincides with the kick comes out
+    assert out[4800 + 240, 0] < 0.3 and out[4800 - 1, 0] == 1.0
+
+
+def test_multiband_ducks_only_the_selected_band():
+    sr, block = 48000, 512
+    t = np.arange(sr // 2) / sr
+    sub = np.sin(2 * np.pi * 50 * t)
+    hat = np.sin(2 * np.pi * 5000 * t)
+    main = np.stack([sub + hat, sub + hat], axis=1).astype(np.float32)
+    trigger = np.ones(len(t), dtype=np.float32)
+    engine = SidechainEngine(threshold=-24, ratio=20, attack=1, release=50, crossovers=(150,), duck_bands=(0,))
+    out = np.concatenate([engine.process(main[i:i + block], trigger[i:i + block], sr)
+                          for i in range(0, len(main), block)])
+    tail = out[-sr // 8:, 0]
+    spectrum = np.abs(np.fft.rfft(tail)) / (len(tail) / 2)
+    freqs = np.fft.rfftfreq(len(tail), 1 / sr)
+    assert spectrum[np.argmin(np.abs(freqs - 50))] < 0.15
+    assert abs(spectrum[np.argmin(np.abs(freqs - 5000))] - 1.0) < 0.02
+
+    # Unducked, the bands sum back to the input's level (all-pass)
+    engine = SidechainEngine(crossovers=(150, 2000))
+    silent = np.zeros(len(t), dtype=np.float32)
+    out = np.concatenate([engine.process(main[i:i + block], silent[i:i + block], sr)
+                          for i in range(0, len(main), block)])
+    assert abs(np.sqrt(np.mean(out[-sr // 8:] ** 2)) - np.sqrt(np.mean(main[-sr // 8:] ** 2))) < 0.01
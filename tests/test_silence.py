@@ -0,0 +1,85 @@
+import numpy as np
+from pedalboard import Delay, Pedalboard, Reverb
+from src.audio.engine import AudioEngine
+from src.audio.silence import TailGate, effect_gap_seconds
+from src.mixer.fx_rack import FXEngine
+
+
+def test_gap_covers_delay_repeats():
+    assert effect_gap_seconds(Reverb()) == 0.0
+    assert effect_gap_seconds(Delay(delay_seconds=0.25)) == 0.25
+    assert effect_gap_seconds(Pedalboard([Reverb(), Delay(delay_seconds=0.25)])) == 0.25
+
+
+def test_tail_gate_waits_for_the_hold_time():
+    gate = TailGate(48000, gap_seconds=0.012)  # 576 samples
+    assert not gate.should_skip(True)
+    gate.update(True, 0.0, 256)
+    gate.update(True, 0.0, 256)
+    assert not gate.bypassed
+    gate.update(True, 0.0, 256)
+    assert gate.should_skip(True)
+    assert not gate.should_skip(False)
+
+
+def test_fx_engine_skips_silent_input_after_tails_finish():
+    fx = FXEngine(sends=True)
+    sr, block = 48000, 512
+    out = np.zeros((block, 2), dtype=np.float32)
+    burst = (np.random.default_rng(0).standard_normal((block, 2)) * 0.5).astype(np.float32)
+    silence = np.zeros((block, 2), dtype=np.float32)
+    assert fx.process_block(burst, sr, out) is False
+
+    blocks = 0
+    while not fx._gate.bypassed:
+        fx.process_block(silence, sr, out)
+        blocks += 1
+        assert blocks < 2000
+    # The 0.5 s delay's repeats and the reverb decay both had to die out first
+    assert blocks * block / sr > 0.5
+
+    out.fill(7.0)
+    assert fx.process_block(silence, sr, out) is True
+    assert np.all(out == 7.0)  # skipped: samples untouched
+    assert fx.process_audio(silence, sr).max() == 0.0
+
+    assert fx.process_block(burst, sr, out) is False
+    assert not fx._gate.bypassed
+
+
+def test_engine_flags_silent_channels():
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=4, backend="null", debug_allocations=True)
+    engine.backend.run_blocks(16)
+    assert engine.channel_silent.all()
+    assert engine.master_silent and engine.master_gate.bypassed
+    engine.add_audio(np.full(256, 0.5, dtype=np.float32), channel_id=2)
+    out = engine.backend.run_blocks(1)
+    assert list(engine.channel_silent) == [True, False, True, True]
+    assert not engine.master_silent and np.abs(out).max() > 0
+    engine.backend.run_blocks(64)
+    assert engine.allocation_guard.violations == []
+
+
+def test_silent_channels_drop_out_of_eq_and_compressor():
+    engine = AudioEngine(sr=48000, buffer_size=256, num_channels=8, backend="null", metering=False,
+                         debug_allocations=True)
+    for channel_id in range(1, 9):
+        engine.set_eq(channel_id, "low", 6.0)
+        engine.set_compressor(channel_id, 8)
+    for _ in range(32):
+        engine.add_audio(np.full(256, 0.5, dtype=np.float32), channel_id=2)
+        engine.backend.run_blocks(1)
+    assert list(np.flatnonzero(engine.channel_dynamics._live)) == [1]
+    assert engine.channel_dynamics.gain_reduction_db[1] > 0
+    assert engine.allocation_guard.violations == []
+
+    # The filter tail of a channel that just went quiet still rings out
+    bank = engine.channel_eq.bank
+    block = np.zeros((256, 16), dtype=np.float32)
+    block[:, 2:4] = 0.5
+    bank.process_rows(block, np.zeros(8, dtype=bool))
+    silent = np.ones(8, dtype=bool)
+    assert bank.process_rows(np.zeros((256, 16), dtype=np.float32), silent) == 2
+    while bank.process_rows(np.zeros((256, 16), dtype=np.float32), silent):
+        pass
+    assert not bank._z1.any() and not bank._z2.any()
@@ -0,0 +1,84 @@
+import threading
+import time
+import numpy as np
+import pytest
+from pedalboard import Gain, Pedalboard
+from src.audio.engine import AudioEngine
+from src.audio.snapshot import ConfigSwap, EngineConfig
+
+
+def test_engine_config_is_immutable_and_validated():
+    config = EngineConfig(Pedalboard())
+    with pytest.raises(AttributeError):
+        config.fx_rack = Pedalboard()
+    line_in = np.zeros((128, 2), dtype=np.float32)
+    updated = config.replace(line_in_views=[(line_in[:, 0], line_in[:, 1])])
+    assert updated.version == 1 and config.line_in_views == ()
+    assert isinstance(updated.line_in_views, tuple)
+    updated.validate(128)
+    with pytest.raises(ValueError):
+        updated.validate(256)
+
+
+def test_replaced_snapshots_are_reclaimed_after_the_callback_moves_on():
+    swap = ConfigSwap(EngineConfig(Pedalboard()), 128)
+    first = swap.current
+    swap.update(fx_rack=Pedalboard([Gain(gain_db=-6)]))
+    assert swap.current is not first
+    assert swap.pending == 1 and swap.reclaim() == 0  # a block may still be using it
+    closed = []
+    swap.defer(lambda: closed.append(first))
+    assert swap.reclaim() == 0 and closed == []
+    swap.end_block()
+    assert swap.reclaim() == 1 and swap.pending == 0
+    assert closed == [first] and swap.deferred == 0
+    with pytest.raises(ValueError):
+        swap.update(fx_rack=None)
+    assert swap.current.version == 1
+
+
+def test_reclaimer_releases_without_waiting_for_another_change():
+    swap = ConfigSwap(EngineConfig(Pedalboard()), 128)
+    swap.update(fx_rack=Pedalboard([Gain(gain_db=-6)]))
+    closed = []
+    swap.defer(lambda: closed.append(True))
+    swap.start_reclaimer(interval=0.005)
+    try:
+        swap.end_block()
+        deadline = time.monotonic() + 2.0
+        while (swap.pending or not closed) and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert swap.pending == 0 and closed == [True]
+    finally:
+        swap.stop_reclaimer()
+
+def test_rerouting_all_channels_while_playing_does_not_glitch():
+    engine = AudioEngine(sr=48000, buffer_size=128, num_channels=32, backend="null", input_channels=2,
+                         metering=False)
+    engine.set_volume(1, 1.0)
+    engine.set_channel_source(1, np.full(4096, 0.5, dtype=np.float32))
+    for _ in range(64):  # let parameter smoothing settle
+        engine.backend.run_blocks(1)
+    expected = engine.backend.run_blocks(1).copy()
+    assert np.all(expected[:, 0] > 0.3)
+
+    stop = threading.Event()
+
+    def edit():
+        while not stop.is_set():
+            for channel_id in range(1, 33):
+                engine.route_line_in(channel_id)
+            engine.fx_rack = Pedalboard([Gain(gain_db=0.0)])
+            for channel_id in range(1, 33):
+                engine.unroute_line_in(channel_id)
+            engine.fx_rack = Pedalboard()
+
+    editor = threading.Thread(target=edit)
+    editor.start()
+    try:
+        for _ in range(300):
+            np.testing.assert_allclose(engine.backend.run_blocks(1), expected, atol=1e-4)
+    finally:
+        stop.set()
+        editor.join()
+    assert engine.config.current.version > 0